@@ -1,10 +1,8 @@
-from types import SimpleNamespace
-
-from django.conf import settings
 from rest_framework import authentication, exceptions
-from rest_framework_simplejwt.backends import TokenBackend
 from rest_framework_simplejwt.exceptions import TokenError
 
+from .jwt_verifier import get_verifier
+
 
 class SimpleJWTAuth(authentication.BaseAuthentication):
     def authenticate(self, request):
@@ -15,18 +13,8 @@ class SimpleJWTAuth(authentication.BaseAuthentication):
         token = header.split(" ", 1)[1].strip()
 
         try:
-            backend = TokenBackend(
-                algorithm=settings.SIMPLE_JWT["ALGORITHM"],
-                signing_key=settings.SIMPLE_JWT["SIGNING_KEY"],
-            )
-            payload = backend.decode(token, verify=True)
+            claims = get_verifier().verify(token)
         except TokenError as e:
             raise exceptions.AuthenticationFailed(str(e))
 
-        user = SimpleNamespace(
-            id=payload.get("sub") or payload.get("user_id"),
-            roles=payload.get("roles", []),
-            is_authenticated=True,
-        )
-
-        return (user, None)
+        return (claims.as_user(), None)
@@ -1,7 +1,10 @@
 from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 from src.langgraph.graph import build_graph #WITH ML MODEL TO PREDICT INTENT
+from src.llm.metrics import render_prometheus
+from src.llm.scheduler import LLMQuotaDeferred
 
 #from src.langgraph.graph_clone import build_graph #WTHOUT ML MODEL TO PREDICT INTENT 
 
@@ -44,6 +47,14 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/metrics/llm", response_class=PlainTextResponse)
+def llm_metrics():
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @router.post("/ask", response_model=AskResponse)
 def ask(payload: AskRequest):
     question = payload.question.strip()
@@ -60,6 +71,12 @@ def ask(payload: AskRequest):
                 "question": question,
             }
         )
+    except LLMQuotaDeferred as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         # 🔥 TEMP DEBUG
         print("🔥 AI ERROR:", repr(e))
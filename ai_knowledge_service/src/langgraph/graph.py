@@ -95,7 +95,7 @@ def chitchat_node(state: GraphState) -> GraphState:
     Must NOT answer unrelated questions.
     """
 
-    from src.llm.client import get_llm
+    from src.llm.client import get_llm, invoke_scheduled
 
     llm = get_llm()
     question = state["question"].strip()
@@ -124,7 +124,7 @@ User message: "{question}"
 Assistant response:
 """
 
-    response = llm.invoke(prompt)
+    response = invoke_scheduled(llm, prompt, call_site="chitchat")
 
     return {
         **state,
@@ -206,7 +206,7 @@ def answer_node(state: GraphState) -> GraphState:
             )
         }
 
-    from src.llm.client import get_llm
+    from src.llm.client import get_llm, invoke_scheduled
 
     llm = get_llm()
 
@@ -231,7 +231,7 @@ Question:
 Answer:
 """
 
-    response = llm.invoke(prompt)
+    response = invoke_scheduled(llm, prompt, call_site="answer")
     final_answer = response.content.strip()[:900]
 
     # Merge safety notice if present
@@ -83,7 +83,7 @@ def retrieve_node(state: GraphState) -> GraphState:
 
 
 def answer_node(state: GraphState) -> GraphState:
-    from src.llm.client import get_llm
+    from src.llm.client import get_llm, invoke_scheduled
 
     llm = get_llm()
 
@@ -115,7 +115,7 @@ Question:
 Answer:
 """
 
-    response = llm.invoke(prompt)
+    response = invoke_scheduled(llm, prompt, call_site="answer")
 
     # 🔥 PERFORMANCE OPTIMIZATION:
     # Hard cap answer length immediately
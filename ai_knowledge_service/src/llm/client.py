@@ -1,6 +1,16 @@
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from openai import RateLimitError
+
+from src.llm.metrics import invoke_llm
+from src.llm.scheduler import (
+    CALL_SITE_PRIORITY,
+    LLMQuotaDeferred,
+    acquire,
+    estimate_cost,
+    report_rate_limited,
+)
 
 load_dotenv()
 
@@ -18,3 +28,27 @@ def get_llm():
         temperature=0.2,
         max_tokens=300,
     )
+
+
+def invoke_scheduled(llm, prompt: str, *, call_site: str):
+    """
+    Waits for the shared Groq quota, then invokes the LLM
+    with token / latency accounting.
+    """
+
+    acquire(call_site, estimate_cost(prompt, max_tokens=llm.max_tokens or 0))
+
+    try:
+        return invoke_llm(llm, prompt, call_site=call_site)
+    except RateLimitError as e:
+        report_rate_limited()
+
+        try:
+            retry_after = float(e.response.headers.get("retry-after", 10))
+        except ValueError:
+            retry_after = 10
+
+        raise LLMQuotaDeferred(
+            retry_after,
+            CALL_SITE_PRIORITY.get(call_site, "interactive"),
+        ) from e
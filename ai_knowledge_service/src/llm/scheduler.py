@@ -0,0 +1,174 @@
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# PRIORITY CLASSES
+# (mirrors ai_service/ai_core/llm_scheduler.py)
+# -------------------------------------------------
+PRIORITY_INTERACTIVE = "interactive"  # AskAIAgentView Q&A
+PRIORITY_NUTRITION = "nutrition"  # meal nutrition estimation
+PRIORITY_PLAN = "plan"  # weekly diet / workout generation
+
+CALL_SITE_PRIORITY = {
+    "chitchat": PRIORITY_INTERACTIVE,
+    "answer": PRIORITY_INTERACTIVE,
+    "nutrition_estimate": PRIORITY_NUTRITION,
+    "diet_plan": PRIORITY_PLAN,
+    "workout_plan": PRIORITY_PLAN,
+}
+
+# Share of the bucket a class must leave untouched.
+# Lower classes stop early so interactive traffic always finds tokens.
+RESERVE_FRACTION = {
+    PRIORITY_INTERACTIVE: 0.0,
+    PRIORITY_NUTRITION: 0.2,
+    PRIORITY_PLAN: 0.4,
+}
+
+# How long a caller may block before it is deferred.
+MAX_WAIT_SEC = {
+    PRIORITY_INTERACTIVE: 10.0,
+    PRIORITY_NUTRITION: 2.0,
+    PRIORITY_PLAN: 0.0,
+}
+
+# Same key in ai_service and ai_knowledge_service → one global Groq quota
+BUCKET_KEY = "llm:groq:bucket"
+
+# KEYS[1] bucket hash
+# ARGV: capacity, refill_per_sec, cost, reserve, drain
+# returns {granted (0/1), wait_ms}
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local drain = tonumber(ARGV[5])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + (now - ts) / 1000 * rate)
+
+if drain == 1 then
+  tokens = 0
+end
+
+local granted = 0
+local wait_ms = 0
+
+if drain == 0 and tokens - cost >= reserve then
+  tokens = tokens - cost
+  granted = 1
+elseif drain == 0 then
+  wait_ms = math.ceil((cost + reserve - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 60000)
+
+return {granted, wait_ms}
+"""
+
+
+class LLMQuotaDeferred(Exception):
+    """
+    Raised when the shared LLM quota cannot serve this priority now.
+    Callers should retry after `retry_after` seconds, not fail.
+    """
+
+    def __init__(self, retry_after: float, priority: str):
+        self.retry_after = max(1, int(retry_after + 0.999))
+        self.priority = priority
+        super().__init__(
+            f"LLM quota busy for {priority} work, retry in {self.retry_after}s"
+        )
+
+
+_script = None
+
+
+def _get_script():
+    global _script
+
+    if _script is not None:
+        return _script
+
+    url = os.getenv("LLM_SCHEDULER_REDIS_URL")
+    if not url:
+        return None
+
+    import redis
+
+    client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+    _script = client.register_script(_TOKEN_BUCKET_LUA)
+    return _script
+
+
+def _bucket_params():
+    tpm = int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+    return tpm, tpm / 60.0
+
+
+def estimate_cost(*texts: str, max_tokens: int) -> int:
+    # ~4 chars per token is close enough for llama tokenizers
+    return sum(len(t) for t in texts) // 4 + max_tokens
+
+
+def acquire(call_site: str, cost: int):
+    """
+    Blocks until the shared bucket grants `cost` tokens for the
+    call site's priority, or raises LLMQuotaDeferred.
+    Redis down → fail open.
+    """
+    priority = CALL_SITE_PRIORITY.get(call_site, PRIORITY_PLAN)
+    capacity, rate = _bucket_params()
+    reserve = capacity * RESERVE_FRACTION[priority]
+    deadline = time.monotonic() + MAX_WAIT_SEC[priority]
+
+    while True:
+        try:
+            script = _get_script()
+            if script is None:
+                return
+
+            granted, wait_ms = script(
+                keys=[BUCKET_KEY],
+                args=[capacity, rate, min(cost, capacity), reserve, 0],
+            )
+        except Exception:
+            logger.warning("LLM scheduler unavailable, failing open", exc_info=True)
+            return
+
+        if granted:
+            return
+
+        wait = wait_ms / 1000
+        remaining = deadline - time.monotonic()
+
+        if wait > remaining:
+            raise LLMQuotaDeferred(wait, priority)
+
+        time.sleep(wait)
+
+
+def report_rate_limited():
+    """
+    Provider returned 429 → empty the shared bucket so every
+    consumer backs off instead of hammering Groq.
+    """
+    capacity, rate = _bucket_params()
+
+    try:
+        script = _get_script()
+        if script is not None:
+            script(keys=[BUCKET_KEY], args=[capacity, rate, 0, 0, 1])
+    except Exception:
+        logger.warning("LLM scheduler unavailable, cannot drain bucket", exc_info=True)
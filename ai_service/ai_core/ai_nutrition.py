@@ -3,6 +3,9 @@ import logging
 from django.conf import settings
 from openai import OpenAI
 
+from .llm_client import MODEL, scheduled_completion
+from .llm_scheduler import LLMQuotaDeferred
+
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """
@@ -51,8 +54,10 @@ Return ONLY JSON.
 """
 
         # ✅ Call Groq Chat Model
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # fast + free tier
+        response = scheduled_completion(
+            client,
+            call_site="nutrition_estimate",
+            model=MODEL,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
@@ -68,6 +73,10 @@ Return ONLY JSON.
 
         return data
 
+    except LLMQuotaDeferred:
+        # quota busy → caller retries later, do NOT store zeros
+        raise
+
     except Exception:
         logger.exception("Nutrition estimation FAILED")
 
@@ -1,6 +1,17 @@
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 from django.conf import settings
 
+from .llm_metrics import instrumented_completion
+from .llm_scheduler import (
+    CALL_SITE_PRIORITY,
+    LLMQuotaDeferred,
+    acquire,
+    estimate_cost,
+    report_rate_limited,
+)
+
+MODEL = "llama-3.1-8b-instant"  # fast + free tier
+
 
 def get_client():
     """
@@ -16,16 +27,49 @@ def get_client():
     )
 
 
-def ask_ai(system_prompt: str, user_prompt: str):
+def scheduled_completion(client, *, call_site: str, **kwargs):
+    """
+    Every Groq call goes through the shared quota scheduler first.
+    Background work is deferred (LLMQuotaDeferred), never failed.
+    """
+
+    acquire(
+        call_site,
+        estimate_cost(
+            *(m["content"] for m in kwargs["messages"]),
+            max_tokens=kwargs.get("max_tokens", 0),
+        ),
+    )
+
+    try:
+        return instrumented_completion(client, call_site=call_site, **kwargs)
+    except RateLimitError as e:
+        report_rate_limited()
+
+        try:
+            retry_after = float(e.response.headers.get("retry-after", 10))
+        except ValueError:
+            retry_after = 10
+
+        raise LLMQuotaDeferred(
+            retry_after,
+            CALL_SITE_PRIORITY.get(call_site, "plan"),
+        ) from e
+
+
+def ask_ai(system_prompt: str, user_prompt: str, *, call_site: str = "unknown"):
     """
     Calls Groq LLM and returns raw response text.
     Expected output: JSON string.
+    `call_site` tags token / latency accounting.
     """
 
     client = get_client()
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",  # fast + free tier
+    response = scheduled_completion(
+        client,
+        call_site=call_site,
+        model=MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
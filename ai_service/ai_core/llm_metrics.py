@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger("llm.usage")
+
+# -----------------------------
+# IN-PROCESS AGGREGATES
+# (call_site, model, outcome) -> counters
+# -----------------------------
+_lock = threading.Lock()
+_stats = {}
+
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _usage_tokens(response):
+    """
+    Reads token usage from an OpenAI-compatible response.
+    Groq fills `usage`, but never trust it blindly.
+    """
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return 0, 0
+
+    return (
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+def record_llm_call(
+    *,
+    call_site: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency_ms: float,
+    outcome: str,
+):
+    key = (call_site, model, outcome)
+
+    with _lock:
+        entry = _stats.setdefault(
+            key,
+            {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latency_ms_sum": 0.0,
+                "latency_buckets": [0] * len(LATENCY_BUCKETS_MS),
+            },
+        )
+        entry["calls"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["latency_ms_sum"] += latency_ms
+
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                entry["latency_buckets"][i] += 1
+
+    # one JSON line per call → easy to grep / ship to log pipeline
+    logger.info(
+        json.dumps(
+            {
+                "event": "llm_call",
+                "call_site": call_site,
+                "model": model,
+                "outcome": outcome,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_ms": round(latency_ms, 1),
+            }
+        )
+    )
+
+
+def instrumented_completion(client, *, call_site: str, **kwargs):
+    """
+    Wraps client.chat.completions.create and records
+    tokens, latency and outcome for the given call site.
+    """
+    model = kwargs.get("model", "unknown")
+    started = time.perf_counter()
+
+    try:
+        response = client.chat.completions.create(**kwargs)
+    except Exception as e:
+        record_llm_call(
+            call_site=call_site,
+            model=model,
+            prompt_tokens=0,
+            completion_tokens=0,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            outcome="rate_limited" if getattr(e, "status_code", None) == 429 else "error",
+        )
+        raise
+
+    prompt_tokens, completion_tokens = _usage_tokens(response)
+
+    record_llm_call(
+        call_site=call_site,
+        model=getattr(response, "model", None) or model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        outcome="ok",
+    )
+
+    return response
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {key: {**v, "latency_buckets": list(v["latency_buckets"])} for key, v in _stats.items()}
+
+
+def render_prometheus() -> str:
+    """
+    Prometheus text exposition of the per-call-site aggregates.
+    """
+    lines = [
+        "# TYPE llm_calls_total counter",
+        "# TYPE llm_prompt_tokens_total counter",
+        "# TYPE llm_completion_tokens_total counter",
+        "# TYPE llm_latency_ms histogram",
+    ]
+
+    for (call_site, model, outcome), v in sorted(snapshot().items()):
+        labels = f'call_site="{call_site}",model="{model}",outcome="{outcome}"'
+
+        lines.append(f"llm_calls_total{{{labels}}} {v['calls']}")
+        lines.append(f"llm_prompt_tokens_total{{{labels}}} {v['prompt_tokens']}")
+        lines.append(f"llm_completion_tokens_total{{{labels}}} {v['completion_tokens']}")
+
+        for bound, count in zip(LATENCY_BUCKETS_MS, v["latency_buckets"]):
+            lines.append(f'llm_latency_ms_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'llm_latency_ms_bucket{{{labels},le="+Inf"}} {v["calls"]}')
+        lines.append(f"llm_latency_ms_sum{{{labels}}} {round(v['latency_ms_sum'], 1)}")
+        lines.append(f"llm_latency_ms_count{{{labels}}} {v['calls']}")
+
+    return "\n".join(lines) + "\n"
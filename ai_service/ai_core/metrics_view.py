@@ -0,0 +1,19 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+from .llm_metrics import render_prometheus
+
+
+class LLMMetricsView(APIView):
+    """
+    Prometheus scrape endpoint for per-call-site LLM usage.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(),
+            content_type="text/plain; version=0.0.4",
+        )
@@ -150,4 +150,10 @@ TRAINER_SERVICE_URL = os.getenv("TRAINER_SERVICE_URL")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
\ No newline at end of file
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+# -------------------------------------------------------------------
+# LLM quota scheduler (shared with ai_knowledge_service)
+# -------------------------------------------------------------------
+LLM_SCHEDULER_REDIS_URL = os.getenv("LLM_SCHEDULER_REDIS_URL")
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
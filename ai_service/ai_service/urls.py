@@ -21,6 +21,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from ai_core.metrics_view import LLMMetricsView
+
 schema_view = get_schema_view(
     openapi.Info(
         title="AI Service API",
@@ -36,6 +38,9 @@ urlpatterns = [
     path("api/v1/diet/", include("diet_app.urls")),
     path("api/v1/workout/", include("workout_app.urls")),
 
+    # LLM token / latency metrics (Prometheus)
+    path("api/v1/metrics/llm/", LLMMetricsView.as_view()),
+
     # Swagger
     re_path(r"^swagger/$", schema_view.with_ui("swagger", cache_timeout=0)),
     re_path(r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0)),
@@ -12,6 +12,7 @@ from ai_core.calculations import (
 )
 from ai_core.guardrails import GuardrailError, validate_profile_for_diet
 from ai_core.llm_client import ask_ai
+from ai_core.llm_scheduler import LLMQuotaDeferred
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -71,7 +72,7 @@ class GenerateDietView(APIView):
 
             # --- AI ---
             prompt = build_prompt(profile, calories, macros)
-            ai_text = ask_ai(SYSTEM_PROMPT, prompt)
+            ai_text = ask_ai(SYSTEM_PROMPT, prompt, call_site="diet_plan")
             meals = json.loads(ai_text)
 
             # --- RESPONSE ---
@@ -96,6 +97,12 @@ class GenerateDietView(APIView):
 
         except GuardrailError as e:
             return Response({"error": str(e)}, status=400)
+        except LLMQuotaDeferred as e:
+            return Response(
+                {"error": str(e), "retry_after": e.retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)},
+            )
 
         except Exception as e:
             import traceback
@@ -123,6 +130,12 @@ class NutritionEstimateView(APIView):
         try:
             result = estimate_nutrition(food_text)
             logger.info("NutritionEstimateView returning response")
+        except LLMQuotaDeferred as e:
+            return Response(
+                {"error": str(e), "retry_after": e.retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)},
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)},
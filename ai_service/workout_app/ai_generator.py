@@ -53,7 +53,7 @@ FORMAT:
 }}
 """
 
-    raw = ask_ai(system_prompt, user_prompt)
+    raw = ask_ai(system_prompt, user_prompt, call_site="workout_plan")
 
     try:
         data = json.loads(raw)
@@ -2,6 +2,8 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ai_core.llm_scheduler import LLMQuotaDeferred
+
 from .ai_generator import generate_weekly_workout
 
 
@@ -37,6 +39,12 @@ class GenerateWorkoutAPIView(APIView):
                 min_duration=data["min_duration"],
                 max_duration=data["max_duration"],
             )
+        except LLMQuotaDeferred as e:
+            return Response(
+                {"error": str(e), "retry_after": e.retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(e.retry_after)},
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
 
@@ -8,3 +11,17 @@ class IsAdmin(BasePermission):
             and request.user.is_authenticated
             and request.user.role == "admin"
         )
+
+
+class IsInternalService(BasePermission):
+    """
+    Service-to-service endpoints: the caller sends the shared
+    INTERNAL_SERVICE_TOKEN in X-Internal-Token. Unset token → nobody
+    gets in (fails closed).
+    """
+
+    def has_permission(self, request, view):
+        expected = settings.INTERNAL_SERVICE_TOKEN
+        supplied = request.headers.get("X-Internal-Token", "")
+
+        return bool(expected) and hmac.compare_digest(supplied.encode(), expected.encode())
@@ -20,7 +20,7 @@ from .views import (
     TrainerRegisterView,
     UserRegisterView,
 )
-from .user_detail_view import UserEmailByIdView
+from .user_detail_view import UserEmailByIdView, UserEmailsBulkView
 
 
 urlpatterns = [
@@ -74,4 +74,9 @@ urlpatterns = [
         UserEmailByIdView.as_view(),
         name="internal-user-email",
     ),
+    path(
+        "internal/users/emails/",
+        UserEmailsBulkView.as_view(),
+        name="internal-user-emails-bulk",
+    ),
 ]
@@ -1,8 +1,11 @@
+import uuid
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
 from .models import User
+from .permission import IsInternalService
 
 
 class UserEmailByIdView(APIView):
@@ -29,4 +32,45 @@ class UserEmailByIdView(APIView):
                 "user_id": str(user.id),
                 "email": user.email,
             }
-        )
\ No newline at end of file
+        )
+
+class UserEmailsBulkView(APIView):
+    """
+    Batch form of UserEmailByIdView: one round trip per chunk of users.
+    Unknown ids are simply absent from the result.
+
+    Internal only (user_service premium expiry): shared service token,
+    no end-user JWT.
+    """
+
+    authentication_classes = []
+    permission_classes = [IsInternalService]
+
+    MAX_IDS = 500
+
+    def post(self, request):
+        user_ids = request.data.get("user_ids")
+
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response(
+                {"error": "user_ids must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(user_ids) > self.MAX_IDS:
+            return Response(
+                {"error": f"at most {self.MAX_IDS} user_ids per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            ids = [uuid.UUID(str(u)) for u in user_ids]
+        except ValueError:
+            return Response(
+                {"error": "user_ids must be UUIDs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        emails = User.objects.filter(id__in=ids).values_list("id", "email")
+
+        return Response({"emails": {str(user_id): email for user_id, email in emails}})
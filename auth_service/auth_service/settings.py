@@ -180,10 +180,14 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
+# HS256 (default): JWT_SIGNING_KEY is the secret shared with every service.
+# RS256 / ES256: JWT_SIGNING_KEY is the private key (PEM, "\n" escapes
+# allowed), JWT_VERIFYING_KEY the public key the other services get.
 SIMPLE_JWT = {
     "VERIFY_AUDIENCE": False,
-    "ALGORITHM": "HS256",
-    "SIGNING_KEY": config("JWT_SIGNING_KEY"),
+    "ALGORITHM": config("JWT_ALGORITHM", default="HS256"),
+    "SIGNING_KEY": config("JWT_SIGNING_KEY").replace("\\n", "\n"),
+    "VERIFYING_KEY": config("JWT_VERIFYING_KEY", default="").replace("\\n", "\n"),
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),  # short lived
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
@@ -198,6 +202,9 @@ REST_FRAMEWORK = {
 
 GOOGLE_CLIENT_ID = config("GOOGLE_CLIENT_ID", default="")
 
+# shared secret other services send as X-Internal-Token on internal/ routes
+INTERNAL_SERVICE_TOKEN = config("INTERNAL_SERVICE_TOKEN", default="")
+
 CELERY_TASK_ALWAYS_EAGER = False
 
 # preferred: restrict CORS to dev origins (keeps behavior same as allow-all but safer)
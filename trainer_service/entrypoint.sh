@@ -37,6 +37,12 @@ case "${SERVICE_ROLE:-web}" in
     python manage.py run_rabbit_trainer_consumer
     ;;
 
+  trainer_events_consumer)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting TRAINER events (push) consumer..."
+    python manage.py run_trainer_events_consumer
+    ;;
+
   celery_worker)
     wait_for "rabbitmq" "5672" "RabbitMQ"
     echo "Starting TRAINER Celery worker..."
@@ -3,8 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from django.core.exceptions import ObjectDoesNotExist
-
+from .helper.push_devices import register_push_token, unregister_push_token
 from .models import TrainerProfile
 
 
@@ -20,11 +19,7 @@ class SaveFCMTokenView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            profile = TrainerProfile.objects.get(
-                user_id=request.user.id
-            )
-        except ObjectDoesNotExist:
+        if not TrainerProfile.objects.filter(user_id=request.user.id).exists():
             # This should NEVER happen if your system is correct
             return Response(
                 {
@@ -34,12 +29,28 @@ class SaveFCMTokenView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Idempotent save
-        if profile.fcm_token != token:
-            profile.fcm_token = token
-            profile.save(update_fields=["fcm_token"])
+        # Idempotent: one row per device token, several devices per user
+        register_push_token(
+            request.user.id,
+            token.strip(),
+            platform=str(request.data.get("platform", ""))[:16],
+        )
 
         return Response(
             {"status": "FCM token saved"},
             status=status.HTTP_200_OK,
         )
+
+    def delete(self, request):
+        # sign-out on one device: the others keep receiving
+        token = request.data.get("fcm_token")
+
+        if not token or not token.strip():
+            return Response(
+                {"error": "fcm_token is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        unregister_push_token(request.user.id, token.strip())
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,9 +1,33 @@
 import requests
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from requests.adapters import HTTPAdapter
 from rest_framework.response import Response
 
 USER_SERVICE_URL = settings.USER_SERVICE_URL
 
+# ✅ one pooled keep-alive session for every proxied call
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# bytes held in memory per streamed request / response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# upstream may take a while to store a large video
+STREAM_TIMEOUT = (5, 120)
+
+# response headers worth passing back to the client
+PASSTHROUGH_HEADERS = ("Content-Type", "Content-Disposition", "Cache-Control")
+
+
+def _upstream_error(exc):
+    # user_service never answered: gateway errors, not a crash here
+    if isinstance(exc, requests.Timeout):
+        return Response({"detail": "User service timed out"}, status=504)
+
+    return Response({"detail": "User service unavailable"}, status=502)
+
 
 def forward_request(request, method, path, *, data=None, files=None, params=None):
     headers = {
@@ -23,15 +47,18 @@ def forward_request(request, method, path, *, data=None, files=None, params=None
                 uploaded_file.content_type,
             )
 
-    resp = requests.request(
-        method=method,
-        url=url,
-        headers=headers,
-        data=data,
-        files=prepared_files,
-        params=params,
-        timeout=15,
-    )
+    try:
+        resp = _session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=data,
+            files=prepared_files,
+            params=params,
+            timeout=15,
+        )
+    except requests.RequestException as exc:
+        return _upstream_error(exc)
 
     if "application/json" in resp.headers.get("Content-Type", ""):
         return Response(resp.json(), status=resp.status_code)
@@ -42,4 +69,91 @@ def forward_request(request, method, path, *, data=None, files=None, params=None
     return Response(
         {"detail": resp.text or "Upstream service error"},
         status=resp.status_code,
-    )
\ No newline at end of file
+    )
+
+
+class _RequestBodyStream:
+    """
+    File-like view over the incoming request body.
+    `__len__` makes requests send Content-Length (not chunked),
+    `read()` lets urllib3 pull it in small blocks.
+    """
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        return self._stream.read(STREAM_CHUNK_SIZE if size is None or size < 0 else size)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _iter_upstream(resp):
+    try:
+        yield from resp.iter_content(STREAM_CHUNK_SIZE)
+    finally:
+        # give the pooled connection back
+        resp.close()
+
+
+def stream_request(request, method, path, *, params=None, forward_headers=()):
+    """
+    Raw passthrough: pipes the multipart body to user_service and the
+    reply back, chunk by chunk. The body is never parsed, buffered or
+    spooled to disk here, so memory stays at ~STREAM_CHUNK_SIZE.
+
+    MUST run before anything touches request.data / request.FILES.
+    """
+    django_request = request._request
+
+    try:
+        length = int(django_request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+
+    if length <= 0:
+        return Response(
+            {"detail": "Content-Length required"},
+            status=411,
+        )
+
+    headers = {
+        "Authorization": request.headers.get("Authorization"),
+        # boundary must survive untouched
+        "Content-Type": django_request.META.get("CONTENT_TYPE", ""),
+    }
+    for name in forward_headers:
+        if name in request.headers:
+            headers[name] = request.headers[name]
+
+    try:
+        resp = _session.request(
+            method=method,
+            url=f"{USER_SERVICE_URL}{path}",
+            headers=headers,
+            data=_RequestBodyStream(django_request, length),
+            params=params,
+            timeout=STREAM_TIMEOUT,
+            stream=True,
+        )
+    except requests.RequestException as exc:
+        return _upstream_error(exc)
+
+    response = StreamingHttpResponse(
+        _iter_upstream(resp),
+        status=resp.status_code,
+    )
+    for name in PASSTHROUGH_HEADERS:
+        if name in resp.headers:
+            response[name] = resp.headers[name]
+
+    return response
@@ -0,0 +1,134 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from trainer_app.models import PushDevice
+
+CACHE_VERSION = "v1"
+
+# Redis (shared): written through on register / prune, so the TTL only
+# bounds how long a missed invalidation can live
+TOKENS_TTL = 60 * 60 * 24
+
+# oldest devices beyond this are forgotten on register
+MAX_DEVICES_PER_USER = 10
+
+
+def _cache_key(user_id):
+    return f"push:tokens:{user_id}:{CACHE_VERSION}"
+
+
+def _normalize(user_id):
+    try:
+        return str(uuid.UUID(str(user_id)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _load(user_ids):
+    tokens = {user_id: [] for user_id in user_ids}
+
+    for user_id, token in (
+        PushDevice.objects.filter(user_id__in=user_ids)
+        .order_by("-last_seen_at")
+        .values_list("user_id", "token")
+    ):
+        tokens[str(user_id)].append(token)
+
+    return tokens
+
+
+def _refresh(*user_ids):
+    # write-through: the next send never falls back to Postgres
+    cache.set_many(
+        {_cache_key(k): v for k, v in _load(user_ids).items()},
+        TOKENS_TTL,
+    )
+
+
+# -------------------------------------------------
+# READ (send path)
+# -------------------------------------------------
+def get_push_tokens_many(user_ids):
+    """
+    Redis → Postgres for the misses only, in one query.
+    → {user_id: [token, ...]} (empty list = no devices, also cached)
+    """
+    keys = [k for k in {_normalize(u) for u in user_ids} if k]
+    if not keys:
+        return {}
+
+    # fail-open: Redis errors read as misses
+    cached = cache.get_many([_cache_key(k) for k in keys])
+    tokens = {k: cached[_cache_key(k)] for k in keys if _cache_key(k) in cached}
+
+    missing = [k for k in keys if k not in tokens]
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({_cache_key(k): v for k, v in loaded.items()}, TOKENS_TTL)
+        tokens.update(loaded)
+
+    return tokens
+
+
+def get_push_tokens(user_id):
+    key = _normalize(user_id)
+    return get_push_tokens_many([key]).get(key, []) if key else []
+
+
+# -------------------------------------------------
+# WRITE (registration / provider feedback)
+# -------------------------------------------------
+def register_push_token(user_id, token, platform=""):
+    user_id = _normalize(user_id)
+
+    with transaction.atomic():
+        previous = (
+            PushDevice.objects.select_for_update()
+            .filter(token=token)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+
+        PushDevice.objects.update_or_create(
+            token=token,
+            defaults={"user_id": user_id, "platform": platform},
+        )
+
+        stale = PushDevice.objects.filter(user_id=user_id).order_by("-last_seen_at")[
+            MAX_DEVICES_PER_USER:
+        ]
+        PushDevice.objects.filter(id__in=list(stale.values_list("id", flat=True))).delete()
+
+    # token changed hands (shared device): the old owner stops receiving
+    affected = {user_id} | ({str(previous)} if previous else set())
+    _refresh(*affected)
+
+
+def unregister_push_token(user_id, token):
+    user_id = _normalize(user_id)
+
+    if PushDevice.objects.filter(user_id=user_id, token=token).delete()[0]:
+        _refresh(user_id)
+
+
+def prune_push_tokens(tokens):
+    """
+    Drop tokens FCM reported as unregistered / foreign.
+    """
+    if not tokens:
+        return 0
+
+    owners = {
+        str(u)
+        for u in PushDevice.objects.filter(token__in=tokens).values_list(
+            "user_id", flat=True
+        )
+    }
+    deleted, _ = PushDevice.objects.filter(token__in=tokens).delete()
+
+    if owners:
+        _refresh(*owners)
+
+    return deleted
@@ -0,0 +1,106 @@
+import logging
+
+from trainer_service.firebase.push import invalid_tokens, send_push_batch
+
+from .push_devices import get_push_tokens_many, prune_push_tokens
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------
+# EVENT → PUSH
+# ----------------------------------------------------
+# event: (title, body, plural body when coalesced, data builder)
+EVENT_PUSHES = {
+    "TRAINER_BOOKED": (
+        "New Booking 👨‍🏫",
+        "A user booked a session with you",
+        "{count} users booked a session with you",
+        lambda p: {"type": "TRAINER_BOOKED", "booking_id": p.get("booking_id")},
+    ),
+    "NEW_CHAT_MESSAGE": (
+        "New Message 💬",
+        "You received a new chat message",
+        "You received {count} new chat messages",
+        lambda p: {"type": "NEW_CHAT_MESSAGE", "chat_room_id": p.get("chat_room_id")},
+    ),
+    "INCOMING_CALL": (
+        "Incoming Call 📞",
+        "You have an incoming call",
+        None,  # every call rings on its own
+        lambda p: {"type": "INCOMING_CALL", "call_id": p.get("call_id")},
+    ),
+}
+
+
+def _coalesce_key(event, payload):
+    if event == "NEW_CHAT_MESSAGE":
+        return payload.get("chat_room_id")
+    if event == "TRAINER_BOOKED":
+        return ""
+    return payload.get("call_id")
+
+
+def build_pushes(events, tokens):
+    """
+    events: [(event, payload)], oldest first
+    One push per (trainer, event, room / call): the latest payload wins,
+    counted events get the plural text.
+    → [(tokens, title, body, data)]
+    """
+    groups = {}
+
+    for event, payload in events:
+        trainer_user_id = str(payload.get("trainer_user_id"))
+        if event not in EVENT_PUSHES or not tokens.get(trainer_user_id):
+            # unknown events are safely ignored, as are trainers without devices
+            continue
+
+        key = (trainer_user_id, event, _coalesce_key(event, payload))
+        count = groups[key][1] + 1 if key in groups else 1
+        groups[key] = (payload, count)
+
+    pushes = []
+    for (trainer_user_id, event, _), (payload, count) in groups.items():
+        title, body, plural, build_data = EVENT_PUSHES[event]
+        data = build_data(payload)
+
+        if count > 1 and plural:
+            body = plural.format(count=count)
+            # FCM data values must be strings
+            data["count"] = str(count)
+
+        pushes.append((tokens[trainer_user_id], title, body, data))
+
+    return pushes
+
+
+def deliver_events(events):
+    """
+    One token preload (Redis, misses in one query) and one FCM batch
+    for the whole list. Returns the number of pushes sent.
+    """
+    trainer_ids = {
+        str(payload.get("trainer_user_id"))
+        for _, payload in events
+        if payload.get("trainer_user_id")
+    }
+    tokens = get_push_tokens_many(trainer_ids)
+
+    pushes = build_pushes(events, tokens)
+    if not pushes:
+        return 0
+
+    results = send_push_batch(pushes)
+
+    # the pushes are out: a failed cleanup must not get the batch resent
+    try:
+        prune_push_tokens(invalid_tokens(results))
+    except Exception:
+        logger.exception("Pruning invalid trainer push tokens failed")
+
+    failed = sum(1 for _, error in results if error is not None)
+    if failed:
+        logger.warning("FCM rejected %d of %d trainer pushes", failed, len(results))
+
+    return len(pushes)
@@ -0,0 +1,198 @@
+import io
+import json
+import multiprocessing
+import resource
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import force_authenticate
+from rest_framework.views import APIView
+
+from trainer_app.helper import proxy_helper
+from trainer_app.trainer_user_chat_view import TrainerSendMediaProxyView
+
+BOUNDARY = "benchboundary7MA4YWxkTrZu0gW"
+MB = 1024 * 1024
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    """Stands in for user_service: drains the body, answers with its size."""
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        received = 0
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 256 * 1024))
+            if not chunk:
+                break
+            received += len(chunk)
+            remaining -= len(chunk)
+
+        body = json.dumps({"received": received}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _MultipartStream(io.RawIOBase):
+    """
+    Generates a multipart upload of `size` bytes on the fly,
+    so the benchmark itself never holds the file in memory.
+    """
+
+    def __init__(self, size):
+        self._head = (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="room_id"\r\n\r\n'
+            "00000000-0000-0000-0000-000000000000\r\n"
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="type"\r\n\r\n'
+            "image\r\n"
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="bench.mp4"\r\n'
+            "Content-Type: video/mp4\r\n\r\n"
+        ).encode()
+        self._tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+        self._size = size
+        self._pos = 0
+        self.length = len(self._head) + size + len(self._tail)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        head_end = len(self._head)
+        file_end = head_end + self._size
+
+        if self._pos < head_end:
+            data = self._head[self._pos : self._pos + len(buf)]
+        elif self._pos < file_end:
+            data = b"\0" * min(len(buf), file_end - self._pos)
+        else:
+            data = self._tail[self._pos - file_end : self._pos - file_end + len(buf)]
+
+        buf[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class _BufferedMediaProxyView(APIView):
+    # previous behaviour: parse multipart, read file into memory, re-post
+    # (form fields copied by hand: QueryDict.copy() deep-copies the
+    # spooled upload and fails once it leaves memory)
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = {k: v for k, v in request.data.items() if k != "file"}
+
+        return proxy_helper.forward_request(
+            request,
+            method="POST",
+            path="/api/chat/send/media/",
+            data=data,
+            files=request.FILES,
+        )
+
+
+class _BenchUser:
+    is_authenticated = True
+
+
+def _build_request(size):
+    stream = _MultipartStream(size)
+
+    request = WSGIRequest(
+        {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/api/v1/trainer/chat/send/media/",
+            "SERVER_NAME": "bench",
+            "SERVER_PORT": "80",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BufferedReader(stream, 256 * 1024),
+            "CONTENT_TYPE": f"multipart/form-data; boundary={BOUNDARY}",
+            "CONTENT_LENGTH": str(stream.length),
+            "HTTP_AUTHORIZATION": "Bearer bench",
+        }
+    )
+    force_authenticate(request, user=_BenchUser())
+    return request
+
+
+def _run(mode, size, upstream, results):
+    proxy_helper.USER_SERVICE_URL = upstream
+    view = (TrainerSendMediaProxyView if mode == "streaming" else _BufferedMediaProxyView).as_view()
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+
+    try:
+        response = view(_build_request(size))
+        if response.streaming:
+            body = b"".join(response.streaming_content)
+        else:
+            response.render()
+            body = response.content
+        status = response.status_code
+        received = json.loads(body).get("received")
+    except Exception as e:
+        results.put({"mode": mode, "error": repr(e)})
+        return
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results.put(
+        {
+            "mode": mode,
+            "status": status,
+            "received": received,
+            "seconds": time.perf_counter() - started,
+            "peak_rss_mb": peak_kb / 1024,
+            "rss_growth_mb": (peak_kb - baseline_kb) / 1024,
+        }
+    )
+
+
+class Command(BaseCommand):
+    help = "Upload time and peak RSS of the media proxy: buffered vs streaming"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, nargs="+", default=[16, 64, 256])
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SinkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        upstream = f"http://127.0.0.1:{server.server_address[1]}"
+
+        # fresh process per run → ru_maxrss is that run's own peak
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+
+        self.stdout.write(f"{'mode':<10} {'size':>8} {'seconds':>8} {'peak rss':>10} {'growth':>9}")
+
+        try:
+            for size_mb in options["size_mb"]:
+                for mode in ("buffered", "streaming"):
+                    proc = ctx.Process(target=_run, args=(mode, size_mb * MB, upstream, results))
+                    proc.start()
+                    r = results.get()
+                    proc.join()
+
+                    if "error" in r or r["status"] >= 400:
+                        self.stderr.write(f"{mode} run failed: {r.get('error') or r['status']}")
+                        continue
+
+                    self.stdout.write(
+                        f"{mode:<10} {size_mb:>6}MB {r['seconds']:>8.2f} "
+                        f"{r['peak_rss_mb']:>8.1f}MB {r['rss_growth_mb']:>7.1f}MB"
+                    )
+        finally:
+            server.shutdown()
@@ -0,0 +1,192 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from kombu import Connection, Exchange, Queue
+
+from trainer_app.helper.trainer_events import deliver_events
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+
+# published by user_service (user_app/helper/trainer_events.py)
+exchange = Exchange("trainer_events", type="topic", durable=True)
+
+# ONE shared queue: every extra consumer process takes a share of it
+queue = Queue(
+    "trainer_service.trainer_events",
+    exchange,
+    routing_key="trainer.#",
+    durable=True,
+)
+
+# failed batches go back here; after this many deliveries an event is
+# parked for inspection instead of looping at the head of the queue
+dead_letter_queue = Queue(
+    "trainer_service.trainer_events.dead",
+    Exchange("trainer_events.dead", type="fanout", durable=True),
+    durable=True,
+)
+
+# a batch closes when full or this long after its first message
+BATCH_MAX = int(os.getenv("TRAINER_EVENTS_BATCH_MAX", "200"))
+BATCH_WINDOW_MS = float(os.getenv("TRAINER_EVENTS_BATCH_WINDOW_MS", "100"))
+MAX_ATTEMPTS = int(os.getenv("TRAINER_EVENTS_MAX_ATTEMPTS", "5"))
+
+# header counting failed deliveries (requeue() cannot carry one)
+ATTEMPTS_HEADER = "x-trainer-event-attempts"
+
+stop_requested = False
+
+
+def handle_signal(signum, frame):
+    global stop_requested
+    logger.info("Signal %s received, shutting down trainer events consumer...", signum)
+    stop_requested = True
+
+
+class Command(BaseCommand):
+    help = (
+        "RabbitMQ consumer for trainer_events (TRAINER_BOOKED, "
+        "NEW_CHAT_MESSAGE, INCOMING_CALL): batches deliveries, preloads "
+        "push tokens in bulk and coalesces pushes per trainer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-max", type=int, default=BATCH_MAX)
+        parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
+
+        attempt = 0
+
+        while not stop_requested:
+            conn = Connection(settings.CELERY_BROKER_URL)
+            try:
+                with conn:
+                    conn.ensure_connection(max_retries=3)
+                    attempt = 0
+                    logger.info("Connected. Listening on queue '%s'", queue.name)
+
+                    self.consume(conn, options["batch_max"], options["window_ms"] / 1000)
+
+            except conn.connection_errors as exc:
+                attempt += 1
+                delay = min(2 ** attempt, 30)
+                logger.warning(
+                    "RabbitMQ connection lost (attempt %d), retrying in %ds: %s",
+                    attempt,
+                    delay,
+                    exc,
+                )
+                time.sleep(delay)
+
+        logger.info("Trainer events consumer shut down cleanly")
+
+    # ----------------------------------------------------
+    # BATCH LOOP
+    # ----------------------------------------------------
+    def consume(self, conn, batch_max, window):
+        buffer = []
+
+        def on_message(body, message):
+            buffer.append((body, message))
+
+        with conn.Consumer(
+            queues=[queue],
+            callbacks=[on_message],
+            accept=["json"],
+            prefetch_count=batch_max,
+        ):
+            while not stop_requested:
+                # idle: wake up every second to notice a stop request
+                try:
+                    conn.drain_events(timeout=1)
+                except socket.timeout:
+                    continue
+
+                # first delivery opens the window: take what arrives within it
+                deadline = time.monotonic() + window
+                while len(buffer) < batch_max:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        conn.drain_events(timeout=remaining)
+                    except socket.timeout:
+                        break
+
+                self.flush(conn, buffer)
+                buffer.clear()
+
+    def flush(self, conn, buffer):
+        events, messages = [], []
+
+        for body, message in buffer:
+            if not isinstance(body, dict) or not body.get("event") or not isinstance(
+                body.get("payload"), dict
+            ):
+                logger.warning("Invalid trainer event, acking and dropping: %s", body)
+                message.ack()
+                continue
+
+            events.append((body["event"], body["payload"]))
+            messages.append(message)
+
+        if not events:
+            return
+
+        try:
+            sent = deliver_events(events)
+        except Exception:
+            # Redis / DB / FCM outage: back to the queue, a peer (or we) retries
+            logger.exception("Delivering %d trainer events failed, retrying", len(events))
+            self.retry_later(conn, messages)
+            time.sleep(1)
+            return
+
+        for message in messages:
+            message.ack()
+
+        logger.info("Delivered %d trainer events as %d pushes", len(events), sent)
+
+    def retry_later(self, conn, messages):
+        """
+        Republish each event with its attempt count (then ack the
+        original); past MAX_ATTEMPTS it goes to the dead-letter queue.
+        """
+        producer = conn.Producer()
+
+        for message in messages:
+            attempts = int((message.headers or {}).get(ATTEMPTS_HEADER, 0)) + 1
+
+            if attempts >= MAX_ATTEMPTS:
+                logger.error(
+                    "Trainer event failed %d times, dead-lettering: %s", attempts, message.payload
+                )
+                target = {
+                    "exchange": dead_letter_queue.exchange,
+                    "routing_key": "",
+                    "declare": [dead_letter_queue],
+                }
+            else:
+                # default exchange: straight back to this queue only
+                target = {"exchange": "", "routing_key": queue.name}
+
+            producer.publish(
+                message.payload,
+                serializer="json",
+                headers={**(message.headers or {}), ATTEMPTS_HEADER: attempts},
+                delivery_mode=2,
+                **target,
+            )
+            message.ack()
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:12
+
+import uuid
+
+from django.db import migrations, models
+
+
+def copy_fcm_tokens(apps, schema_editor):
+    # existing single-device tokens become the first registered device
+    TrainerProfile = apps.get_model("trainer_app", "TrainerProfile")
+    PushDevice = apps.get_model("trainer_app", "PushDevice")
+
+    rows = (
+        TrainerProfile.objects.exclude(fcm_token__isnull=True)
+        .exclude(fcm_token="")
+        .values_list("user_id", "fcm_token")
+    )
+    PushDevice.objects.bulk_create(
+        [PushDevice(user_id=user_id, token=token) for user_id, token in rows],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainer_app", "0003_trainerprofile_fcm_token"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushDevice",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("user_id", models.UUIDField(db_index=True)),
+                ("token", models.TextField(unique=True)),
+                ("platform", models.CharField(blank=True, max_length=16)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_seen_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(copy_fcm_tokens, migrations.RunPython.noop),
+    ]
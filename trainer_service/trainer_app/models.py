@@ -28,6 +28,24 @@ class TrainerProfile(models.Model):
         return self.certificates.first()
 
 
+class PushDevice(models.Model):
+    """
+    One row per FCM registration token: a trainer can have several devices.
+    Read through helper/push_devices (cached), never directly on send.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.UUIDField(db_index=True)
+    # a token moves to whoever signed in last on that device
+    token = models.TextField(unique=True)
+    platform = models.CharField(max_length=16, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"PushDevice({self.user_id}, {self.platform})"
+
+
 class TrainerCertificate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     trainer = models.ForeignKey(
@@ -36,3 +36,15 @@ class TrainerEndCallView(APIView):
             method="POST",
             path=f"/api/chat/calls/{call_id}/end/",
         )
+
+
+
+class TrainerCallHeartbeatView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, call_id):
+        return forward_request(
+            request=request,
+            method="POST",
+            path=f"/api/chat/calls/{call_id}/heartbeat/",
+        )
@@ -1,6 +1,6 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from .helper.proxy_helper import forward_request
+from .helper.proxy_helper import forward_request, stream_request
 
 
 
@@ -29,6 +29,19 @@ class TrainerChatHistoryProxyView(APIView):
     
 
 
+class TrainerChatSyncProxyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return forward_request(
+            request,
+            method="GET",
+            path="/api/chat/sync/",
+            params=request.query_params,
+        )
+
+
+
 class TrainerSendTextMessageProxyView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -46,17 +59,49 @@ class TrainerSendMediaProxyView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        # Copy data safely
-        data = request.data.copy()
+        # ✅ raw multipart passthrough: never touch request.data / FILES here,
+        # parsing would spool the whole upload before we forward it
+        return stream_request(
+            request,
+            method="POST",
+            path="/api/chat/send/media/",
+        )
 
-        # IMPORTANT: remove file fields from data
-        # Adjust key names if different
-        data.pop("file", None)
 
+
+class TrainerMediaUploadCreateProxyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
         return forward_request(
             request,
             method="POST",
-            path="/api/chat/send/media/",
-            data=data,
-            files=request.FILES,
-        )
\ No newline at end of file
+            path="/api/chat/uploads/",
+            data=request.data,
+        )
+
+
+
+class TrainerMediaUploadStatusProxyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        return forward_request(
+            request,
+            method="GET",
+            path=f"/api/chat/uploads/{upload_id}/",
+        )
+
+
+
+class TrainerMediaUploadChunkProxyView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id):
+        # raw chunk bytes, piped like send/media
+        return stream_request(
+            request,
+            method="PUT",
+            path=f"/api/chat/uploads/{upload_id}/chunk/",
+            forward_headers=("Upload-Offset",),
+        )
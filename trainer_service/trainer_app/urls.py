@@ -11,14 +11,19 @@ from .views import (
 from .trainer_user_chat_view import(
     TrainerChatRoomListProxyView,
     TrainerChatHistoryProxyView,
+    TrainerChatSyncProxyView,
     TrainerSendTextMessageProxyView,
     TrainerSendMediaProxyView,
+    TrainerMediaUploadCreateProxyView,
+    TrainerMediaUploadStatusProxyView,
+    TrainerMediaUploadChunkProxyView,
 )
 
 from .trainer_user_call_view import(
     TrainerStartCallView,
     TrainerAcceptCallView,
     TrainerEndCallView,
+    TrainerCallHeartbeatView,
     )
 
 from .ueserdata_trainer_view import TrainerUserOverviewProxyView    
@@ -53,8 +58,12 @@ urlpatterns = [
     #chat service urls
     path("chat/rooms/", TrainerChatRoomListProxyView.as_view()),
     path("chat/rooms/<uuid:room_id>/messages/", TrainerChatHistoryProxyView.as_view()),
+    path("chat/sync/", TrainerChatSyncProxyView.as_view()),
     path("chat/send/text/", TrainerSendTextMessageProxyView.as_view()),
     path("chat/send/media/", TrainerSendMediaProxyView.as_view()),
+    path("chat/uploads/", TrainerMediaUploadCreateProxyView.as_view()),
+    path("chat/uploads/<uuid:upload_id>/", TrainerMediaUploadStatusProxyView.as_view()),
+    path("chat/uploads/<uuid:upload_id>/chunk/", TrainerMediaUploadChunkProxyView.as_view()),
 
     #call service urls
     path(
@@ -75,6 +84,12 @@ urlpatterns = [
         name="trainer-end-call",
     ),
 
+    path(
+        "calls/<uuid:call_id>/heartbeat/",
+        TrainerCallHeartbeatView.as_view(),
+        name="trainer-call-heartbeat",
+    ),
+
     #user data over view proxy
     
     path(
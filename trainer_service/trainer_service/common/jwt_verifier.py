@@ -0,0 +1,152 @@
+"""
+Access-token verification shared by the REST auth class and the
+WebSocket middleware (same file in user, trainer and admin services).
+
+- one TokenBackend per process, built from SIMPLE_JWT once
+- verified tokens cached (LRU, keyed by SHA-256 of the token) until
+  their `exp`: a repeat request costs a hash and a dict lookup instead
+  of an HMAC / RSA verify and a JSON decode
+- claims extracted once per token (user id, role, roles)
+- RS256 / ES256: set JWT_VERIFYING_KEY (public PEM) and leave
+  JWT_SIGNING_KEY unset; services never hold the key that mints tokens
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+
+DEFAULT_CACHE_SIZE = 10_000
+
+
+class Claims:
+    __slots__ = ("user_id", "role", "roles", "payload", "expires_at")
+
+    def __init__(self, payload):
+        user_id = payload.get("sub") or payload.get("user_id") or payload.get("id")
+        if not user_id:
+            raise TokenError("Token missing user id")
+
+        # support both formats: "role": "x" and "roles": ["x", ...]
+        roles = payload.get("roles")
+        roles = list(roles) if isinstance(roles, (list, tuple)) else []
+        role = payload.get("role") or (roles[0] if roles else None)
+
+        self.user_id = str(user_id)
+        self.role = role
+        self.roles = roles or ([role] if role else [])
+        self.payload = payload
+        self.expires_at = payload.get("exp")
+
+    def as_user(self, **extra):
+        """
+        Lightweight request.user: every attribute the services' permission
+        classes read (role, roles), plus the raw payload.
+        """
+        return SimpleNamespace(
+            id=self.user_id,
+            role=self.role,
+            roles=self.roles,
+            token_payload=self.payload,
+            is_authenticated=True,
+            **extra,
+        )
+
+
+class TokenVerifier:
+    """
+    Thread-safe; every failure raises TokenError and is never cached.
+    """
+
+    def __init__(self, backend, cache_size=DEFAULT_CACHE_SIZE):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def verify(self, token):
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+
+        with self._lock:
+            claims = self._cache.get(key)
+            if claims is not None:
+                if claims.expires_at > now:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._cache[key]
+
+        try:
+            payload = self.backend.decode(token, verify=True)
+        except TokenBackendError as e:
+            # one exception type for callers (decode raises its own family)
+            raise TokenError(str(e)) from e
+
+        claims = Claims(payload)
+
+        with self._lock:
+            self.misses += 1
+            # no exp → nothing says when to stop trusting it: not cached
+            if self.cache_size and isinstance(claims.expires_at, (int, float)):
+                self._cache[key] = claims
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def build_backend(jwt_settings):
+    algorithm = jwt_settings.get("ALGORITHM", "HS256")
+    signing_key = jwt_settings.get("SIGNING_KEY") or None
+    verifying_key = jwt_settings.get("VERIFYING_KEY") or ""
+
+    if algorithm.startswith("HS"):
+        if not signing_key:
+            raise ImproperlyConfigured(f"{algorithm} needs SIMPLE_JWT['SIGNING_KEY']")
+    elif not verifying_key:
+        raise ImproperlyConfigured(f"{algorithm} needs SIMPLE_JWT['VERIFYING_KEY'] (public key)")
+
+    return TokenBackend(
+        algorithm=algorithm,
+        signing_key=signing_key,
+        verifying_key=verifying_key,
+        audience=jwt_settings.get("AUDIENCE"),
+        issuer=jwt_settings.get("ISSUER"),
+        leeway=jwt_settings.get("LEEWAY", 0),
+    )
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    global _verifier
+
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier(
+                    build_backend(settings.SIMPLE_JWT),
+                    cache_size=getattr(settings, "JWT_VERIFY_CACHE_SIZE", DEFAULT_CACHE_SIZE),
+                )
+
+    return _verifier
+
+
+def reset_verifier():
+    """Settings changed (tests, benchmarks): rebuild on next use."""
+    global _verifier
+    _verifier = None
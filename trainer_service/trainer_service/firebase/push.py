@@ -1,5 +1,13 @@
 from firebase_admin import messaging
 
+from trainer_service import providers
+
+# FCM rejects batch / multicast calls above this many messages / tokens
+FCM_BATCH_LIMIT = 500
+
+# the token itself is dead: drop it from the registry instead of retrying
+INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
 
 def send_push(token, title, body, data=None):
     message = messaging.Message(
@@ -11,4 +19,63 @@ def send_push(token, title, body, data=None):
         data=data or {},
     )
 
-    return messaging.send(message)
\ No newline at end of file
+    return providers.fcm().send(message)
+
+
+def _chunks(items, size=FCM_BATCH_LIMIT):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def send_push_batch(pushes):
+    """
+    pushes: [(tokens, title, body, data)]
+
+    Identical payloads share one send_each_for_multicast, the rest go
+    out together through send_each: one HTTP round trip per 500.
+    → [(token, exception | None)] for every token attempted.
+    """
+    groups = {}
+    for tokens, title, body, data in pushes:
+        data = data or {}
+        key = (title, body, tuple(sorted(data.items())))
+        groups.setdefault(key, (title, body, data, []))[3].extend(tokens)
+
+    fcm = providers.fcm()
+    results = []
+    singles = []
+
+    for title, body, data, tokens in groups.values():
+        if len(tokens) == 1:
+            singles.append(
+                messaging.Message(
+                    notification=messaging.Notification(title=title, body=body),
+                    token=tokens[0],
+                    data=data,
+                )
+            )
+            continue
+
+        for chunk in _chunks(tokens):
+            response = fcm.send_each_for_multicast(
+                messaging.MulticastMessage(
+                    notification=messaging.Notification(title=title, body=body),
+                    tokens=chunk,
+                    data=data,
+                )
+            )
+            results.extend(
+                (token, r.exception) for token, r in zip(chunk, response.responses)
+            )
+
+    for chunk in _chunks(singles):
+        response = fcm.send_each(chunk)
+        results.extend(
+            (m.token, r.exception) for m, r in zip(chunk, response.responses)
+        )
+
+    return results
+
+
+def invalid_tokens(results):
+    return [token for token, error in results if isinstance(error, INVALID_TOKEN_ERRORS)]
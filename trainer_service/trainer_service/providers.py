@@ -0,0 +1,131 @@
+"""
+External providers behind one switch (same as user_service/providers.py).
+
+PROVIDER_BACKEND=live (default): FCM for real.
+PROVIDER_BACKEND=fake: an in-process stand-in with the same call surface.
+It records every call, sleeps FAKE_PROVIDER_LATENCY_MS per round trip
+and fails FAKE_PROVIDER_ERROR_RATE of the items the way FCM reports it.
+"""
+
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.conf import settings
+
+
+class ProviderDown(ConnectionError):
+    """Raised by every call of a fake whose `down` flag is set."""
+
+
+class FakeProvider:
+    """
+    calls: [(method, items)] in call order, one entry per round trip.
+    """
+
+    def __init__(self, latency=None, error_rate=None):
+        self.latency = (
+            settings.FAKE_PROVIDER_LATENCY_MS / 1000 if latency is None else latency
+        )
+        self.error_rate = (
+            settings.FAKE_PROVIDER_ERROR_RATE if error_rate is None else error_rate
+        )
+        self.down = False
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, method, items=1):
+        if self.down:
+            raise ProviderDown(f"{type(self).__name__}.{method}: provider down")
+
+        with self._lock:
+            self.calls.append((method, items))
+        time.sleep(self.latency)
+
+    def _fails(self):
+        return self.error_rate and random.random() < self.error_rate
+
+    def call_count(self, method=None):
+        return sum(1 for m, _ in self.calls if method in (None, m))
+
+    def item_count(self, method=None):
+        return sum(n for m, n in self.calls if method in (None, m))
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+        self.down = False
+
+
+# -------------------------------------------------
+# FCM (firebase_admin.messaging surface)
+# -------------------------------------------------
+class FakeFCM(FakeProvider):
+    """
+    Failed items come back as UnregisteredError, so token pruning runs.
+    """
+
+    def _responses(self, n):
+        from firebase_admin import messaging
+
+        return SimpleNamespace(
+            responses=[
+                SimpleNamespace(success=False, exception=messaging.UnregisteredError("fake"))
+                if self._fails()
+                else SimpleNamespace(success=True, exception=None, message_id=uuid.uuid4().hex)
+                for _ in range(n)
+            ]
+        )
+
+    def send(self, message, dry_run=False, app=None):
+        self._call("send")
+        if self._fails():
+            from firebase_admin import messaging
+
+            raise messaging.UnregisteredError("fake")
+        return f"projects/fake/messages/{uuid.uuid4().hex}"
+
+    def send_each(self, messages, dry_run=False, app=None):
+        self._call("send_each", len(messages))
+        return self._responses(len(messages))
+
+    def send_each_for_multicast(self, multicast_message, dry_run=False, app=None):
+        self._call("send_each_for_multicast", len(multicast_message.tokens))
+        return self._responses(len(multicast_message.tokens))
+
+
+# -------------------------------------------------
+# ACCESSORS
+# -------------------------------------------------
+FAKES = {
+    "fcm": FakeFCM,
+}
+
+_fakes = {}
+_fakes_lock = threading.Lock()
+
+
+def is_fake():
+    return settings.PROVIDER_BACKEND == "fake"
+
+
+def fake(name):
+    """
+    The process-wide fake for `name`: callers and benchmarks see the
+    same recorded calls.
+    """
+    with _fakes_lock:
+        if name not in _fakes:
+            _fakes[name] = FAKES[name]()
+        return _fakes[name]
+
+
+def fcm():
+    if is_fake():
+        return fake("fcm")
+
+    from firebase_admin import messaging
+
+    return messaging
@@ -136,13 +136,19 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# HS256 (default): JWT_SIGNING_KEY is the shared secret.
+# RS256 / ES256: JWT_VERIFYING_KEY is auth_service's public key (PEM, "\n"
+# escapes allowed) and JWT_SIGNING_KEY stays unset here.
 SIMPLE_JWT = {
-    "ALGORITHM": "HS256",
-    "SIGNING_KEY": config("JWT_SIGNING_KEY"),
+    "ALGORITHM": config("JWT_ALGORITHM", default="HS256"),
+    "SIGNING_KEY": config("JWT_SIGNING_KEY", default=""),
+    "VERIFYING_KEY": config("JWT_VERIFYING_KEY", default="").replace("\\n", "\n"),
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),  # short lived
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+# verified access tokens kept in memory per process (common/jwt_verifier.py)
+JWT_VERIFY_CACHE_SIZE = config("JWT_VERIFY_CACHE_SIZE", default=10000, cast=int)
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "trainer_service.common.auth.SimpleJWTAuth",
@@ -183,4 +189,9 @@ CACHES = {
 }
 
 # Fail open if Redis is down
-DJANGO_REDIS_IGNORE_EXCEPTIONS = True
\ No newline at end of file
+DJANGO_REDIS_IGNORE_EXCEPTIONS = True
+
+# live | fake: in-process FCM (trainer_service/providers.py)
+PROVIDER_BACKEND = os.getenv("PROVIDER_BACKEND", "live")
+FAKE_PROVIDER_LATENCY_MS = float(os.getenv("FAKE_PROVIDER_LATENCY_MS", "20"))
+FAKE_PROVIDER_ERROR_RATE = float(os.getenv("FAKE_PROVIDER_ERROR_RATE", "0"))
@@ -1,45 +1,121 @@
 import json
-import boto3
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-ses = boto3.client("ses")
+import boto3
+from botocore.config import Config
 
-def lambda_handler(event, context):
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# parallel SES calls per invocation (one HTTP connection each)
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "8"))
+
+# SES caps SendBulkTemplatedEmail at 50 destinations
+BULK_DESTINATIONS = 50
+
+# set → SendBulkTemplatedEmail with this template, else one SendEmail per record
+SES_TEMPLATE = os.environ.get("SES_TEMPLATE", "")
+
+ses = boto3.client("ses", config=Config(max_pool_connections=MAX_WORKERS))
+
+SUBJECT = "Your Premium Plan Has Expired"
+TEXT = (
+    "Hi,\n\n"
+    "Your premium subscription has expired.\n"
+    "Please renew to continue premium features.\n\n"
+    "— Team"
+)
+
+
+def _parse(record):
     """
-    Triggered by SQS
-    Message format:
-    {
-        "email": "user@gmail.com"
-    }
+    → email, or None for records that can never succeed (dropped, not retried)
     """
+    try:
+        email = json.loads(record["body"]).get("email")
+    except (ValueError, AttributeError):
+        logger.warning("Dropping malformed record %s", record.get("messageId"))
+        return None
 
-    for record in event["Records"]:
-        body = json.loads(record["body"])
-        email = body.get("email")
+    if not email:
+        logger.warning("Dropping record %s without email", record.get("messageId"))
+    return email or None
 
-        if not email:
-            continue
 
+def _send_one(item):
+    message_id, email = item
+    try:
         ses.send_email(
             Source=os.environ["FROM_EMAIL"],
             Destination={"ToAddresses": [email]},
             Message={
-                "Subject": {
-                    "Data": "Your Premium Plan Has Expired",
-                    "Charset": "UTF-8",
-                },
-                "Body": {
-                    "Text": {
-                        "Data": (
-                            "Hi,\n\n"
-                            "Your premium subscription has expired.\n"
-                            "Please renew to continue premium features.\n\n"
-                            "— Team"
-                        ),
-                        "Charset": "UTF-8",
-                    }
-                },
+                "Subject": {"Data": SUBJECT, "Charset": "UTF-8"},
+                "Body": {"Text": {"Data": TEXT, "Charset": "UTF-8"}},
             },
         )
+        return []
+    except Exception:
+        logger.exception("SendEmail failed for record %s", message_id)
+        return [message_id]
+
+
+def _send_bulk(chunk):
+    """
+    One SendBulkTemplatedEmail for up to 50 records; per-destination
+    status comes back in the same order as the destinations.
+    """
+    try:
+        response = ses.send_bulk_templated_email(
+            Source=os.environ["FROM_EMAIL"],
+            Template=SES_TEMPLATE,
+            DefaultTemplateData="{}",
+            Destinations=[
+                {"Destination": {"ToAddresses": [email]}, "ReplacementTemplateData": "{}"}
+                for _, email in chunk
+            ],
+        )
+    except Exception:
+        logger.exception("SendBulkTemplatedEmail failed for %d records", len(chunk))
+        return [message_id for message_id, _ in chunk]
+
+    failed = []
+    for (message_id, _), status in zip(chunk, response["Status"]):
+        if status.get("Status") != "Success":
+            logger.warning("SES rejected record %s: %s", message_id, status)
+            failed.append(message_id)
+    return failed
+
+
+def lambda_handler(event, context):
+    """
+    Triggered by SQS (ReportBatchItemFailures enabled)
+    Message format:
+    {
+        "email": "user@gmail.com"
+    }
+
+    Only records listed in batchItemFailures go back to the queue:
+    emails already sent in this batch are never redelivered.
+    """
+    items = []
+    for record in event["Records"]:
+        email = _parse(record)
+        if email:
+            items.append((record["messageId"], email))
+
+    if SES_TEMPLATE:
+        send = _send_bulk
+        work = [items[i : i + BULK_DESTINATIONS] for i in range(0, len(items), BULK_DESTINATIONS)]
+    else:
+        send = _send_one
+        work = items
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        failed = [message_id for ids in pool.map(send, work) for message_id in ids]
+
+    if failed:
+        logger.info("%d of %d records failed, returned for retry", len(failed), len(items))
 
-    return {"statusCode": 200}
\ No newline at end of file
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]}
@@ -0,0 +1,131 @@
+"""
+Local harness for lambda_function: synthetic SQS batches against a
+stubbed SES client (latency + failure injection), no AWS needed.
+
+    python local_harness.py --records 1000 --latency-ms 60 --fail-rate 0.01
+
+Reports records/second for the old one-by-one loop, the thread pool
+(SendEmail) and SendBulkTemplatedEmail, plus batchItemFailures checks.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("FROM_EMAIL", "no-reply@example.com")
+
+import lambda_function  # noqa: E402
+
+
+class StubSES:
+    def __init__(self, latency, fail_rate):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def _count(self, sent):
+        with self._lock:
+            self.calls += 1
+            self.sent += sent
+
+    def send_email(self, **kwargs):
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self._count(0)
+            raise RuntimeError("Throttling: Maximum sending rate exceeded")
+        self._count(1)
+        return {"MessageId": str(uuid.uuid4())}
+
+    def send_bulk_templated_email(self, **kwargs):
+        time.sleep(self.latency)
+        status = [
+            {"Status": "MessageRejected", "Error": "stub"}
+            if random.random() < self.fail_rate
+            else {"Status": "Success", "MessageId": str(uuid.uuid4())}
+            for _ in kwargs["Destinations"]
+        ]
+        self._count(sum(s["Status"] == "Success" for s in status))
+        return {"Status": status}
+
+
+def make_event(n):
+    return {
+        "Records": [
+            {"messageId": str(uuid.uuid4()), "body": json.dumps({"email": f"user{i}@example.com"})}
+            for i in range(n)
+        ]
+    }
+
+
+def legacy_handler(event):
+    # the previous handler: serial, first exception fails the whole batch
+    for record in event["Records"]:
+        email = json.loads(record["body"]).get("email")
+        lambda_function.ses.send_email(
+            Source=os.environ["FROM_EMAIL"],
+            Destination={"ToAddresses": [email]},
+            Message={},
+        )
+
+
+def run(label, handler, events, stub):
+    started = time.perf_counter()
+    failed = redelivered = 0
+
+    for event in events:
+        try:
+            result = handler(event)
+            failed += len(result["batchItemFailures"])
+        except Exception:
+            # whole batch comes back, including the emails already sent
+            redelivered += len(event["Records"])
+
+    elapsed = time.perf_counter() - started
+    records = sum(len(e["Records"]) for e in events)
+    print(
+        f"{label:<10} {records / elapsed:8.0f} records/s  ses calls {stub.calls:5d}  "
+        f"sent {stub.sent:5d}  item failures {failed:4d}  batch redelivered {redelivered:5d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100, help="SQS batch per invocation")
+    parser.add_argument("--latency-ms", type=float, default=60)
+    parser.add_argument("--fail-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    batches = [
+        make_event(min(args.batch_size, args.records - i))
+        for i in range(0, args.records, args.batch_size)
+    ]
+
+    # malformed and empty records are dropped, never retried
+    lambda_function.ses = StubSES(0, 0)
+    result = lambda_function.lambda_handler(
+        {"Records": [{"messageId": "bad", "body": "not json"}, {"messageId": "empty", "body": "{}"}]},
+        None,
+    )
+    assert result == {"batchItemFailures": []}, result
+
+    for label, template, handler in (
+        ("legacy", "", lambda e: legacy_handler(e) or {"batchItemFailures": []}),
+        ("pool", "", lambda e: lambda_function.lambda_handler(e, None)),
+        ("bulk", "premium-expired", lambda e: lambda_function.lambda_handler(e, None)),
+    ):
+        stub = StubSES(args.latency_ms / 1000, args.fail_rate)
+        lambda_function.ses = stub
+        lambda_function.SES_TEMPLATE = template
+        run(label, handler, batches, stub)
+
+
+if __name__ == "__main__":
+    main()
@@ -65,6 +65,7 @@ def emit_call_event(call_id, payload):
             {
                 "type": "call_event",
                 "payload": payload,
+                "call_id": str(call_id),
             },
         )
 
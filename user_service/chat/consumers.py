@@ -1,10 +1,247 @@
+import asyncio
 import json
+import uuid
+
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from .models import ChatRoom
 
+from .helper import call_state
+from .helper.message_batcher import PersistFailed, RoomClosed, get_batcher
+from .helper.outbound_queue import OutboundQueueMixin
+from .helper.signal_relay import TokenBucket, should_trace, signal_event, trace, trace_delivery
+from .helper.room_membership import get_room_membership, peek_room_membership
+from .models import Message
+
+
+class ChatSendMixin:
+    """
+    Text send over a socket, shared by ChatConsumer and StreamConsumer.
+    Needs self.user_id; `reply` keys are echoed on ack / error frames.
+    """
+
+    async def send_chat_text(self, room, data, **reply):
+        try:
+            # client-chosen idempotency key (unique per sender): retries are
+            # stored once; the message id itself is always ours
+            client_id = uuid.UUID(str(data.get("client_id")))
+        except ValueError:
+            await self._send_error("client_id must be a UUID", **reply)
+            return
+
+        text = str(data.get("text", "")).strip()
+        if not text:
+            await self._send_error("Text is required", client_id, **reply)
+            return
+
+        msg = Message(
+            client_id=client_id,
+            room_id=room.id,
+            sender_user_id=self.user_id,
+            sender_role=(
+                Message.SENDER_USER
+                if self.user_id == room.user_id
+                else Message.SENDER_TRAINER
+            ),
+            type=Message.TEXT,
+            text=text,
+        )
+
+        # ack + room broadcast only once the batch has committed; the
+        # receive loop keeps going meanwhile (pipelined sends)
+        waiter = get_batcher().submit(msg)
+
+        if not hasattr(self, "chat_sends"):
+            self.chat_sends = set()
+        task = asyncio.ensure_future(self._ack_when_stored(waiter, room.id, client_id, reply))
+        self.chat_sends.add(task)
+        task.add_done_callback(self.chat_sends.discard)
+
+    async def _ack_when_stored(self, waiter, room_id, client_id, reply):
+        try:
+            # shielded: a cancelled ack never cancels the store itself
+            stored = await asyncio.shield(waiter)
+        except PersistFailed:
+            await self._send_error("Message not saved, resend it", client_id, **reply)
+            return
+        except RoomClosed:
+            # same answer as REST send to an inactive room
+            await self._send_error("Room is closed", client_id, **reply)
+            await self.on_room_closed(room_id)
+            return
+
+        await self.send(
+            text_data=json.dumps(
+                {"type": "ack", "client_id": str(client_id), "id": str(stored.id), **reply}
+            )
+        )
+
+    async def finish_chat_sends(self):
+        """
+        On disconnect: store this socket's queued messages now rather
+        than on the batch timer, then drop the acks nobody can receive.
+        """
+        sends = getattr(self, "chat_sends", None)
+        if not sends:
+            return
+
+        await get_batcher().flush()
+        for task in list(sends):
+            task.cancel()
+
+    async def on_room_closed(self, room_id):
+        """The room was deactivated while this socket was in it."""
+
+    async def _send_error(self, detail, client_id=None, **reply):
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "error",
+                    "detail": detail,
+                    "client_id": str(client_id) if client_id else None,
+                    **reply,
+                }
+            )
+        )
+
+
+# well inside HEARTBEAT_TIMEOUT_SEC: one lost refresh never drops a call
+CALL_KEEPALIVE_SEC = call_state.HEARTBEAT_TIMEOUT_SEC / 3
+
+
+class CallRelayMixin:
+    """
+    Call signal relay shared by CallConsumer and StreamConsumer.
+
+    Sockets in a call group announce themselves (call_peer_hello / ack /
+    bye), so each one knows the other channels in the call. With exactly
+    one peer, signals go straight to its channel: no group fanout and no
+    echo for the sender to drop. Otherwise they go through the group.
+
+    While joined, the socket itself is the call heartbeat (shipped
+    clients never send one): a keepalive refreshes the call deadline
+    until the socket leaves or disconnects.
+    """
+
+    direct_relay = True
+
+    def _peers(self, call_id):
+        # None once we left (late hello / ack for an old call)
+        return getattr(self, "call_peers", {}).get(str(call_id))
+
+    async def join_call_relay(self, call_id):
+        if not hasattr(self, "call_peers"):
+            self.call_peers = {}
+            self.call_keepalives = {}
+            self.signal_bucket = TokenBucket()
+
+        self.call_peers.setdefault(str(call_id), set())
+        if str(call_id) not in self.call_keepalives:
+            self.call_keepalives[str(call_id)] = asyncio.create_task(
+                self._keep_call_alive(call_id)
+            )
+        await self.channel_layer.group_add(f"call_{call_id}", self.channel_name)
+        await self.channel_layer.group_send(
+            f"call_{call_id}",
+            {"type": "call_peer_hello", "call_id": str(call_id), "channel": self.channel_name},
+        )
+
+    async def leave_call_relay(self, call_id):
+        getattr(self, "call_peers", {}).pop(str(call_id), None)
+        keepalive = getattr(self, "call_keepalives", {}).pop(str(call_id), None)
+        if keepalive is not None:
+            keepalive.cancel()
+        await self.channel_layer.group_send(
+            f"call_{call_id}",
+            {"type": "call_peer_bye", "call_id": str(call_id), "channel": self.channel_name},
+        )
+        await self.channel_layer.group_discard(f"call_{call_id}", self.channel_name)
+
+    async def _keep_call_alive(self, call_id):
+        # no-op while ringing; a dead socket stops refreshing → dropped
+        while True:
+            await call_heartbeat(call_id, self.scope["user"].id)
+            await asyncio.sleep(CALL_KEEPALIVE_SEC)
+
+    async def relay_signal(self, call_id, payload):
+        """False when this connection is over its rate limit."""
+        peers = self._peers(call_id)
+
+        if not self.signal_bucket.allow():
+            return False
+
+        traced = should_trace()
+        event = signal_event(call_id, payload, self.channel_name, traced)
+
+        if self.direct_relay and peers is not None and len(peers) == 1:
+            mode = "direct"
+            await self.channel_layer.send(next(iter(peers)), event)
+        else:
+            mode = "group"
+            await self.channel_layer.group_send(f"call_{call_id}", event)
+
+        if traced:
+            trace(
+                "signal_sent",
+                call_id=call_id,
+                kind=payload.get("type"),
+                mode=mode,
+                peers=len(peers or ()),
+                bytes=len(str(payload)),
+            )
+
+        return True
+
+    # ---- peer discovery (group events) ----
+    async def call_peer_hello(self, event):
+        peers = self._peers(event["call_id"])
+        if peers is None or event["channel"] == self.channel_name:
+            return
+
+        peers.add(event["channel"])
+        await self.channel_layer.send(
+            event["channel"],
+            {"type": "call_peer_ack", "call_id": event["call_id"], "channel": self.channel_name},
+        )
+
+    async def call_peer_ack(self, event):
+        peers = self._peers(event["call_id"])
+        if peers is not None:
+            peers.add(event["channel"])
+
+    async def call_peer_bye(self, event):
+        peers = self._peers(event["call_id"])
+        if peers is not None:
+            peers.discard(event["channel"])
+
+
+async def get_allowed_room(room_id, user_id):
+    # ⚡ reconnect storms: in-process hit needs no thread hop,
+    # then Redis, then ONE indexed DB read
+    found, room = peek_room_membership(room_id)
+    if not found:
+        room = await database_sync_to_async(get_room_membership)(room_id)
+
+    if room is None or not room.is_active:
+        return None
+
+    if not room.has_participant(user_id):
+        return None
+
+    return room
+
+
+@sync_to_async
+def call_heartbeat(call_id, user_id):
+    try:
+        return call_state.heartbeat(call_id, user_id)
+    except call_state.CallStateUnavailable:
+        return False
+
+
+class ChatConsumer(OutboundQueueMixin, ChatSendMixin, AsyncWebsocketConsumer):
+    outbound_kind = "chat"
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
         self.group_name = f"chat_{self.room_id}"
@@ -14,43 +251,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
-        allowed = await self._is_user_allowed(user.id)
-        if not allowed:
+        self.room = await get_allowed_room(self.room_id, user.id)
+        if self.room is None:
             await self.close()
             return
 
+        self.user_id = uuid.UUID(str(user.id))
+
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        self.start_outbound()
 
     async def disconnect(self, close_code):
+        await self.finish_chat_sends()
+        await self.stop_outbound()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-    # WS is receive-only. No receive().
+    async def on_room_closed(self, room_id):
+        await self.close()
+
+    # -------------------------------------------------
+    # SEND OVER SOCKET
+    # {"type": "send", "client_id": "<uuid>", "text": "..."}
+    # -------------------------------------------------
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "")
+        except ValueError:
+            await self._send_error("Invalid JSON")
+            return
+
+        if not isinstance(data, dict) or data.get("type") != "send":
+            await self._send_error("Unsupported message type")
+            return
+
+        await self.send_chat_text(self.room, data)
 
+    # -------------------------------------------------
+    # GROUP EVENTS → bounded outbound queue
+    # -------------------------------------------------
     async def chat_message(self, event):
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "message",
-                    "payload": event["payload"],
-                }
-            )
+        # payload is already JSON → splice it in, no decode/encode round trip
+        self.enqueue_frame('{"type":"message","payload":' + event["payload_json"] + "}")
+
+    async def chat_read(self, event):
+        # only the newest cursor matters; droppable (sync restores it)
+        self.enqueue_frame(
+            json.dumps({"type": "read", "payload": event["payload"]}),
+            key=("read", event["payload"].get("reader_id")),
+            critical=False,
         )
 
-    @database_sync_to_async
-    def _is_user_allowed(self, user_id):
-        return (
-            ChatRoom.objects.filter(
-                id=self.room_id,
-                is_active=True,
-                user_id=user_id,
-            ).exists()
-            or ChatRoom.objects.filter(
-                id=self.room_id,
-                is_active=True,
-                trainer_user_id=user_id,
-            ).exists()
-        )
 
 
 
@@ -60,7 +311,9 @@ import logging
 logger = logging.getLogger("django")
 
 
-class UserCallConsumer(AsyncJsonWebsocketConsumer):
+class UserCallConsumer(OutboundQueueMixin, AsyncJsonWebsocketConsumer):
+    outbound_kind = "user_call"
+
     async def connect(self):
         user = self.scope.get("user")
 
@@ -83,6 +336,7 @@ class UserCallConsumer(AsyncJsonWebsocketConsumer):
         )
 
         await self.accept()
+        self.start_outbound()
 
         logger.error(f"✅ USER WS CONNECTED → {self.group_name}")
 
@@ -91,6 +345,8 @@ class UserCallConsumer(AsyncJsonWebsocketConsumer):
             f"🔌 USER WS DISCONNECT → {getattr(self, 'group_name', None)} code={close_code}"
         )
 
+        await self.stop_outbound()
+
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(
                 self.group_name,
@@ -104,9 +360,15 @@ class UserCallConsumer(AsyncJsonWebsocketConsumer):
 
         payload = event.get("payload")
 
-        logger.error(f"📤 USER WS SEND TO CLIENT → {payload}")
+        logger.error(f"📤 USER WS QUEUED FOR CLIENT → {payload}")
 
-        await self.send_json(payload)
+        # INCOMING_CALL → CALL_MISSED for a slow client: only the latest
+        # state of each call is kept
+        call_id = payload.get("call_id")
+        self.enqueue_frame(
+            json.dumps(payload),
+            key=("call", call_id) if call_id else None,
+        )
 
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
@@ -115,7 +377,7 @@ import logging
 logger = logging.getLogger("django")
 
 
-class CallConsumer(AsyncJsonWebsocketConsumer):
+class CallConsumer(CallRelayMixin, AsyncJsonWebsocketConsumer):
     async def connect(self):
         user = self.scope.get("user")
         self.call_id = str(self.scope["url_route"]["kwargs"]["call_id"])
@@ -131,62 +393,39 @@ class CallConsumer(AsyncJsonWebsocketConsumer):
 
         self.group_name = f"call_{self.call_id}"
 
-        logger.error(f"➕ ADD TO CALL GROUP → {self.group_name}")
-
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name,
-        )
-
+        await self.join_call_relay(self.call_id)
         await self.accept()
 
         logger.error(f"✅ CALL WS CONNECTED → {self.group_name}")
 
     async def disconnect(self, close_code):
+        if not hasattr(self, "group_name"):
+            return
+
         logger.error(
             f"🔌 CALL WS DISCONNECT → {self.group_name} code={close_code}"
         )
 
-        await self.channel_layer.group_discard(
-            self.group_name,
-            self.channel_name,
-        )
-
-        logger.error(f"➖ REMOVED FROM CALL GROUP → {self.group_name}")
+        await self.leave_call_relay(self.call_id)
 
+    # ⚡ per-message path: no logging here (SDP / ICE bursts);
+    # sampled traces come from CallRelayMixin
     async def receive_json(self, content):
-        logger.error(
-            f"📥 CALL WS RECEIVE_JSON → from={self.channel_name} content={content}"
-        )
-
-        if not isinstance(content, dict):
-            logger.error("⚠️ INVALID WS PAYLOAD (not dict)")
+        if not isinstance(content, dict) or "type" not in content:
             return
 
-        if "type" not in content:
-            logger.error("⚠️ INVALID WS PAYLOAD (missing type)")
+        # keep-alive for the Redis call state, not relayed to the peer
+        if content["type"] == "heartbeat":
+            active = await call_heartbeat(self.call_id, self.scope["user"].id)
+            await self.send_json({"type": "heartbeat", "active": active})
             return
 
-        await self.channel_layer.group_send(
-            self.group_name,
-            {
-                "type": "call_event",
-                "payload": content,
-                "sender": self.channel_name,
-            },
-        )
-
-        logger.error("📡 CALL WS RELAYED TO GROUP")
+        if not await self.relay_signal(self.call_id, content):
+            await self.send_json({"type": "error", "detail": "Rate limit exceeded"})
 
     async def call_event(self, event):
-        logger.error(f"📥 CALL WS EVENT RECEIVED → {event}")
-
         if event.get("sender") == self.channel_name:
-            logger.error("↩️ SKIP ECHO TO SENDER")
             return
 
-        payload = event.get("payload")
-
-        logger.error(f"📤 CALL WS SEND TO CLIENT → {payload}")
-
-        await self.send_json(payload)
\ No newline at end of file
+        trace_delivery(event, "call")
+        await self.send_json(event["payload"])
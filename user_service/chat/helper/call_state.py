@@ -0,0 +1,333 @@
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError
+
+from chat.call_events import emit_call_event, emit_user_call_event
+from chat.models import Call
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# TIMING
+# -----------------------------
+RING_TIMEOUT_SEC = 45  # unanswered → CALL_MISSED
+HEARTBEAT_TIMEOUT_SEC = 60  # active call without heartbeat / call socket → dropped
+# keys never outlive a lost sweeper by more than this; accept and every
+# heartbeat push it forward, so a long active call keeps its keys
+STATE_TTL_SEC = 60 * 60
+
+STATUS_RINGING = "ringing"
+STATUS_ACTIVE = "active"
+
+# sorted set: call_id scored by the ms deadline of its current state
+DEADLINES_KEY = "call:deadlines"
+
+
+def call_key(call_id):
+    return f"call:{call_id}"
+
+
+def room_key(room_id):
+    return f"call:room:{room_id}"
+
+
+# KEYS: call, room, deadlines
+# ARGV: call_id, room_id, caller_id, callee_id, caller_role, now_ms, ring_ms, ttl
+# → {1, replaced_call_id|""} or {0, "busy"}
+_START_LUA = """
+local current = redis.call('GET', KEYS[2])
+local replaced = ''
+
+if current then
+  local status = redis.call('HGET', 'call:' .. current, 'status')
+  if status == 'active' then
+    return {0, 'busy'}
+  end
+  if status == 'ringing' then
+    replaced = current
+  end
+end
+
+redis.call('HSET', KEYS[1],
+  'call_id', ARGV[1], 'room_id', ARGV[2],
+  'caller_id', ARGV[3], 'callee_id', ARGV[4], 'caller_role', ARGV[5],
+  'status', 'ringing', 'created_ms', ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[8])
+redis.call('ZADD', KEYS[3], tonumber(ARGV[6]) + tonumber(ARGV[7]), ARGV[1])
+
+return {1, replaced}
+"""
+
+# KEYS: call, deadlines
+# ARGV: call_id, user_id, now_ms, heartbeat_ms, ttl
+_ACCEPT_LUA = """
+local state = redis.call('HMGET', KEYS[1], 'status', 'callee_id', 'caller_id', 'room_id')
+if not state[1] then
+  return {0, 'gone'}
+end
+if state[2] ~= ARGV[2] then
+  return {0, 'forbidden'}
+end
+if state[1] ~= 'ringing' then
+  return {0, 'not_ringing'}
+end
+
+redis.call('HSET', KEYS[1], 'status', 'active', 'accepted_ms', ARGV[3])
+redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[4]), ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+local room_key = 'call:room:' .. state[4]
+if redis.call('GET', room_key) == ARGV[1] then
+  redis.call('EXPIRE', room_key, ARGV[5])
+end
+return {1, state[3]}
+"""
+
+# KEYS: call, deadlines
+# ARGV: call_id, user_id, now_ms, heartbeat_ms, ttl
+_HEARTBEAT_LUA = """
+local state = redis.call('HMGET', KEYS[1], 'status', 'caller_id', 'callee_id', 'room_id')
+if state[1] ~= 'active' then
+  return 0
+end
+if state[2] ~= ARGV[2] and state[3] ~= ARGV[2] then
+  return 0
+end
+
+redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[4]), ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+local room_key = 'call:room:' .. state[4]
+if redis.call('GET', room_key) == ARGV[1] then
+  redis.call('EXPIRE', room_key, ARGV[5])
+end
+return 1
+"""
+
+# KEYS: call, deadlines
+# ARGV: call_id, user_id ("" = system), expected status ("" = any),
+#       now_ms ("" = no deadline check)
+# → flat HGETALL of the removed call, or {} when nothing was ended
+_END_LUA = """
+local state = redis.call('HGETALL', KEYS[1])
+if #state == 0 then
+  -- hash hit its hard TTL: drop the orphaned deadline too
+  redis.call('ZREM', KEYS[2], ARGV[1])
+  return {}
+end
+
+local call = {}
+for i = 1, #state, 2 do
+  call[state[i]] = state[i + 1]
+end
+
+if ARGV[2] ~= '' and call['caller_id'] ~= ARGV[2] and call['callee_id'] ~= ARGV[2] then
+  return {}
+end
+if ARGV[3] ~= '' and call['status'] ~= ARGV[3] then
+  return {}
+end
+if ARGV[4] ~= '' then
+  local deadline = redis.call('ZSCORE', KEYS[2], ARGV[1])
+  if deadline and tonumber(deadline) > tonumber(ARGV[4]) then
+    return {}
+  end
+end
+
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+
+local room_key = 'call:room:' .. call['room_id']
+if redis.call('GET', room_key) == ARGV[1] then
+  redis.call('DEL', room_key)
+end
+
+return state
+"""
+
+
+class CallStateUnavailable(Exception):
+    """Redis for call state is down: calls cannot be signalled."""
+
+
+_client = None
+_scripts = {}
+
+
+def _get_client():
+    global _client
+
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(
+            settings.CALL_STATE_REDIS_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+            decode_responses=True,
+        )
+        _scripts.update(
+            start=_client.register_script(_START_LUA),
+            accept=_client.register_script(_ACCEPT_LUA),
+            heartbeat=_client.register_script(_HEARTBEAT_LUA),
+            end=_client.register_script(_END_LUA),
+        )
+
+    return _client
+
+
+def _run(name, keys, args):
+    try:
+        _get_client()
+        return _scripts[name](keys=keys, args=args)
+    except Exception as e:
+        logger.exception("Call state script %s failed", name)
+        raise CallStateUnavailable(str(e)) from e
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _as_dict(flat):
+    return dict(zip(flat[::2], flat[1::2])) if flat else None
+
+
+# -------------------------------------------------
+# TRANSITIONS (each one atomic script)
+# -------------------------------------------------
+def start_call(call_id, room_id, caller_id, callee_id, caller_role):
+    """
+    → (True, replaced_ringing_call_id or None) | (False, "busy")
+    """
+    ok, detail = _run(
+        "start",
+        [call_key(call_id), room_key(room_id), DEADLINES_KEY],
+        [
+            str(call_id),
+            str(room_id),
+            str(caller_id),
+            str(callee_id),
+            caller_role,
+            _now_ms(),
+            RING_TIMEOUT_SEC * 1000,
+            STATE_TTL_SEC,
+        ],
+    )
+    return bool(ok), (detail or None)
+
+
+def accept_call(call_id, user_id):
+    """→ (True, caller_id) | (False, "gone" | "forbidden" | "not_ringing")"""
+    ok, detail = _run(
+        "accept",
+        [call_key(call_id), DEADLINES_KEY],
+        [
+            str(call_id),
+            str(user_id),
+            _now_ms(),
+            HEARTBEAT_TIMEOUT_SEC * 1000,
+            STATE_TTL_SEC,
+        ],
+    )
+    return bool(ok), detail
+
+
+def heartbeat(call_id, user_id):
+    return bool(
+        _run(
+            "heartbeat",
+            [call_key(call_id), DEADLINES_KEY],
+            [
+                str(call_id),
+                str(user_id),
+                _now_ms(),
+                HEARTBEAT_TIMEOUT_SEC * 1000,
+                STATE_TTL_SEC,
+            ],
+        )
+    )
+
+
+def end_call(call_id, user_id=None, *, only_status="", only_if_expired=False):
+    """
+    Removes the call and returns its final state dict, or None when
+    it was already gone / not allowed. Exactly one caller wins.
+    """
+    return _as_dict(
+        _run(
+            "end",
+            [call_key(call_id), DEADLINES_KEY],
+            [
+                str(call_id),
+                str(user_id) if user_id else "",
+                only_status,
+                _now_ms() if only_if_expired else "",
+            ],
+        )
+    )
+
+
+def get_call(call_id):
+    try:
+        return _get_client().hgetall(call_key(call_id)) or None
+    except Exception as e:
+        raise CallStateUnavailable(str(e)) from e
+
+
+def expired_call_ids(limit=500):
+    try:
+        return _get_client().zrangebyscore(DEADLINES_KEY, 0, _now_ms(), start=0, num=limit)
+    except Exception as e:
+        raise CallStateUnavailable(str(e)) from e
+
+
+# -------------------------------------------------
+# FINAL ROW + EVENTS (once per call, by whoever ended it)
+# -------------------------------------------------
+def _from_ms(ms):
+    return datetime.fromtimestamp(int(ms) / 1000, tz=dt_timezone.utc) if ms else None
+
+
+def finish_call(state, reason):
+    """
+    `state` is what end_call() returned. Writes the Call row with its
+    duration and tells both participants.
+    """
+    call_id = state["call_id"]
+    ended_at = datetime.now(dt_timezone.utc)
+    accepted_at = _from_ms(state.get("accepted_ms"))
+
+    try:
+        Call.objects.update_or_create(
+            id=call_id,
+            defaults={
+                "room_id": state["room_id"],
+                "started_by": state["caller_id"],
+                "caller_role": state["caller_role"],
+                "status": Call.STATUS_ENDED,
+                "end_reason": reason,
+                "created_at": _from_ms(state["created_ms"]),
+                "accepted_at": accepted_at,
+                "ended_at": ended_at,
+                "duration_sec": (
+                    int((ended_at - accepted_at).total_seconds()) if accepted_at else 0
+                ),
+            },
+        )
+    except IntegrityError:
+        # room deleted mid-call; nothing left to attach the row to
+        logger.warning("Call %s ended after its room was deleted", call_id)
+
+    event = {
+        "type": "CALL_MISSED" if reason == Call.END_MISSED else "CALL_ENDED",
+        "call_id": call_id,
+        "reason": reason,
+    }
+
+    for uid in (state["caller_id"], state["callee_id"]):
+        emit_user_call_event(uid, event)
+
+    emit_call_event(call_id, event)
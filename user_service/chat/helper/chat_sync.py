@@ -0,0 +1,123 @@
+import base64
+import uuid
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+
+from chat.models import ChatRoom, Message
+
+from .message_encoder import message_dict
+
+# rows commit a little after their updated_at: every catch-up re-reads
+# this window, clients upsert by id so repeats are harmless
+SYNC_SLACK = timedelta(seconds=10)
+
+SYNC_MAX_MESSAGES = 500
+
+
+# -------------------------------------------------
+# CURSOR: "iso" (caught up, re-read the slack window)
+#      or "iso|message_id" (mid-backlog, strict keyset)
+# -------------------------------------------------
+def encode_sync_cursor(ts, msg_id=None):
+    raw = ts.isoformat() if msg_id is None else f"{ts.isoformat()}|{msg_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_sync_cursor(token):
+    """
+    "" → None (first sync). Raises ValueError when malformed.
+    """
+    if not token:
+        return None
+
+    parts = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+    if len(parts) > 2:
+        raise ValueError("bad sync cursor")
+
+    ts = datetime.fromisoformat(parts[0])
+    msg_id = uuid.UUID(parts[1]) if len(parts) == 2 else None
+    return ts, msg_id
+
+
+def _room_dict(room, user_id):
+    return {
+        "id": room.id,
+        "user_id": room.user_id,
+        "trainer_user_id": room.trainer_user_id,
+        "is_active": room.is_active,
+        "last_message_at": room.last_message_at,
+        "last_message_preview": room.last_message_preview,
+        "created_at": room.created_at,
+        "unread_count": getattr(room, room.unread_field_for(user_id)),
+        "last_read_at": getattr(room, room.read_cursor_field_for(user_id)),
+        "peer_last_read_at": getattr(
+            room, room.read_cursor_field_for(room.other_participant_id(user_id))
+        ),
+    }
+
+
+def sync_changes(user_id, cursor, now, *, request=None):
+    """
+    Everything that changed in the user's rooms since `cursor`:
+    rooms (read state, unread, activation) + new / updated messages,
+    oldest change first.
+    """
+    user_id = str(user_id)
+    mine = Q(user_id=user_id) | Q(trainer_user_id=user_id)
+
+    rooms = ChatRoom.objects.filter(mine)
+
+    # first sync: room state only, history loads per room as before
+    if cursor is None:
+        return {
+            "cursor": encode_sync_cursor(now),
+            "has_more": False,
+            "rooms": [_room_dict(r, user_id) for r in rooms],
+            "messages": [],
+            "deleted": [],
+        }
+
+    since, after_id = cursor
+    floor = since if after_id else since - SYNC_SLACK
+
+    # ONE indexed query: (room, updated_at) joined to the user's rooms
+    messages = (
+        Message.objects.filter(
+            Q(room__user_id=user_id) | Q(room__trainer_user_id=user_id)
+        )
+        .select_related("room")
+        .defer("search_vector")
+        .order_by("updated_at", "id")
+    )
+    if after_id:
+        messages = messages.filter(
+            Q(updated_at__gt=since) | Q(updated_at=since, id__gt=after_id)
+        )
+    else:
+        messages = messages.filter(updated_at__gt=floor)
+
+    batch = list(messages[: SYNC_MAX_MESSAGES + 1])
+    has_more = len(batch) > SYNC_MAX_MESSAGES
+    batch = batch[:SYNC_MAX_MESSAGES]
+
+    out, deleted = [], []
+    for msg in batch:
+        if msg.is_deleted:
+            deleted.append(msg.id)
+        elif msg.is_ready:
+            # unfinished uploads show up once the media worker bumps them
+            out.append(message_dict(msg, room=msg.room, request=request))
+
+    if has_more:
+        next_cursor = encode_sync_cursor(batch[-1].updated_at, batch[-1].id)
+    else:
+        next_cursor = encode_sync_cursor(now)
+
+    return {
+        "cursor": next_cursor,
+        "has_more": has_more,
+        "rooms": [_room_dict(r, user_id) for r in rooms.filter(updated_at__gt=floor)],
+        "messages": out,
+        "deleted": deleted,
+    }
@@ -0,0 +1,90 @@
+import io
+import json
+import logging
+import mimetypes
+import subprocess
+
+from PIL import Image
+
+from chat.models import Message
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+PROBE_TIMEOUT_SEC = 30
+
+
+def probe_media(path, msg_type, file_name):
+    """
+    Server-side metadata: mime_type for every media type,
+    duration_sec for audio / video (ffprobe).
+    Missing ffprobe or unreadable files → best-effort partial result.
+    """
+    meta = {"mime_type": mimetypes.guess_type(file_name)[0] or ""}
+
+    if msg_type == Message.IMAGE:
+        try:
+            with Image.open(path) as img:
+                meta["mime_type"] = Image.MIME.get(img.format, meta["mime_type"])
+        except Exception:
+            logger.warning("Image probe failed: %s", path, exc_info=True)
+        return meta
+
+    try:
+        out = subprocess.run(
+            [
+                "ffprobe",
+                "-v", "error",
+                "-print_format", "json",
+                "-show_format",
+                path,
+            ],
+            capture_output=True,
+            check=True,
+            timeout=PROBE_TIMEOUT_SEC,
+        )
+        duration = float(json.loads(out.stdout)["format"]["duration"])
+        meta["duration_sec"] = max(1, round(duration))
+    except Exception:
+        logger.warning("ffprobe failed: %s", path, exc_info=True)
+
+    return meta
+
+
+def _video_frame(path):
+    out = subprocess.run(
+        [
+            "ffmpeg",
+            "-v", "error",
+            "-ss", "1",
+            "-i", path,
+            "-frames:v", "1",
+            "-f", "image2pipe",
+            "-vcodec", "png",
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+        timeout=PROBE_TIMEOUT_SEC,
+    )
+    return Image.open(io.BytesIO(out.stdout))
+
+
+def make_thumbnail(path, msg_type):
+    """
+    JPEG bytes of a THUMBNAIL_SIZE preview, or None (audio / failure).
+    """
+    if msg_type not in (Message.IMAGE, Message.VIDEO):
+        return None
+
+    try:
+        img = Image.open(path) if msg_type == Message.IMAGE else _video_frame(path)
+
+        with img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            buf = io.BytesIO()
+            img.convert("RGB").save(buf, "JPEG", quality=80)
+            return buf.getvalue()
+    except Exception:
+        logger.warning("Thumbnail failed: %s", path, exc_info=True)
+        return None
@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+
+# client hint; any chunk size up to MAX_CHUNK_SIZE is accepted
+CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_UPLOAD_SIZE = 512 * 1024 * 1024
+
+# bytes held in memory while copying / hashing
+COPY_BLOCK = 64 * 1024
+
+
+def _path(name):
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def append_chunk(upload, stream, length):
+    """
+    Appends `length` bytes from the request stream to the partial file,
+    block by block (never the whole chunk in memory).
+    Returns the number of bytes actually written.
+    """
+    written = 0
+
+    with open(_path(upload.partial_name), "ab") as out:
+        # a previous attempt may have died mid-write: cut back to the
+        # last acknowledged offset before appending
+        out.truncate(upload.received_bytes)
+        out.seek(upload.received_bytes)
+
+        while written < length:
+            block = stream.read(min(COPY_BLOCK, length - written))
+            if not block:
+                break
+            out.write(block)
+            written += len(block)
+
+    return written
+
+
+def discard_partial(upload):
+    try:
+        os.remove(default_storage.path(upload.partial_name))
+    except FileNotFoundError:
+        pass
+
+
+def partial_sha256(upload):
+    digest = hashlib.sha256()
+
+    with open(default_storage.path(upload.partial_name), "rb") as f:
+        for block in iter(lambda: f.read(COPY_BLOCK), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def content_name(sha256, file_name):
+    # content-addressed: identical bytes share one stored file
+    ext = os.path.splitext(file_name)[1].lower()[:10]
+    return f"chat_media/{sha256[:2]}/{sha256}{ext}"
+
+
+def promote_partial(upload):
+    """
+    Moves the verified partial file to its content-addressed name
+    (a rename, not a copy). Returns the storage name.
+    """
+    name = content_name(upload.sha256, upload.file_name)
+    target = _path(name)
+
+    if os.path.exists(target):
+        discard_partial(upload)
+    else:
+        os.replace(default_storage.path(upload.partial_name), target)
+
+    return name
@@ -0,0 +1,167 @@
+import base64
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import orjson
+from django.db import transaction
+
+from chat.models import ArchivedMessageChunk, ChatRoom, Message
+
+# messages older than this move to cold storage
+HOT_RETENTION = timedelta(days=90)
+
+ARCHIVE_CHUNK_MESSAGES = 500
+
+# columns kept in the archive (search_vector is rebuilt on restore, not stored)
+ARCHIVED_FIELDS = (
+    "id",
+    "sender_user_id",
+    "sender_role",
+    "type",
+    "text",
+    "file",
+    "thumbnail",
+    "file_size",
+    "mime_type",
+    "duration_sec",
+    "sha256",
+    "is_ready",
+    "read_at",
+    "is_deleted",
+    "created_at",
+)
+
+_UUID_FIELDS = ("id", "sender_user_id")
+_DATETIME_FIELDS = ("read_at", "created_at")
+
+
+def _pack(rows):
+    return zlib.compress(orjson.dumps(rows), 6)
+
+
+def _unpack(payload):
+    rows = orjson.loads(zlib.decompress(bytes(payload)))
+
+    for row in rows:
+        for f in _UUID_FIELDS:
+            row[f] = uuid.UUID(row[f])
+        for f in _DATETIME_FIELDS:
+            if row[f] is not None:
+                row[f] = datetime.fromisoformat(row[f])
+
+    return rows
+
+
+def _sort_key(row):
+    return (row["created_at"], str(row["id"]))
+
+
+def _archivable(qs):
+    return qs.filter(is_ready=True)
+
+
+def archive_room_chunk(room_id, cutoff):
+    """
+    Moves the oldest ARCHIVE_CHUNK_MESSAGES hot messages created before
+    `cutoff` into one compressed chunk. Returns how many were moved.
+
+    Media still uploading (is_ready=False) stays hot: its created_at is
+    when it was sent, and finishing it later must update the live row.
+    """
+    with transaction.atomic():
+        rows = list(
+            _archivable(Message.objects.filter(room_id=room_id, created_at__lt=cutoff))
+            .order_by("created_at", "id")
+            .values(*ARCHIVED_FIELDS)[:ARCHIVE_CHUNK_MESSAGES]
+        )
+
+        if not rows:
+            return 0
+
+        # take every message sharing the last timestamp, so the
+        # boundary splits hot and cold exactly
+        boundary = rows[-1]["created_at"]
+        taken = {r["id"] for r in rows}
+        rows += [
+            r
+            for r in _archivable(
+                Message.objects.filter(room_id=room_id, created_at=boundary)
+            ).values(*ARCHIVED_FIELDS)
+            if r["id"] not in taken
+        ]
+        rows.sort(key=_sort_key)
+
+        ArchivedMessageChunk.objects.create(
+            room_id=room_id,
+            first_created_at=rows[0]["created_at"],
+            last_created_at=boundary,
+            message_count=len(rows),
+            payload=_pack(rows),
+        )
+
+        Message.objects.filter(id__in=[r["id"] for r in rows]).delete()
+        ChatRoom.objects.filter(pk=room_id).update(archived_through=boundary)
+
+        return len(rows)
+
+
+def rooms_with_cold_messages(cutoff):
+    # (created_at, room) index: range scan on the cutoff, room from the index
+    return (
+        _archivable(Message.objects.filter(created_at__lt=cutoff))
+        .values_list("room_id", flat=True)
+        .distinct()
+    )
+
+
+# -------------------------------------------------
+# READ-THROUGH (history pages past the hot boundary)
+# -------------------------------------------------
+def encode_archive_cursor(msg):
+    raw = f"{msg.created_at.isoformat()}|{msg.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_archive_cursor(token):
+    """
+    "" → start at the hot boundary. Raises ValueError when malformed.
+    """
+    if not token:
+        return None
+
+    created_at, msg_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+    created_at = datetime.fromisoformat(created_at)
+
+    # compared with aware row timestamps: a naive one would raise TypeError
+    if created_at.tzinfo is None:
+        raise ValueError("archive cursor timestamp has no timezone")
+
+    return (created_at, str(uuid.UUID(msg_id)))
+
+
+def read_archive(room, cursor, limit):
+    """
+    Up to `limit` archived messages older than `cursor`, newest first,
+    as unsaved Message instances. Returns (messages, has_more).
+    """
+    chunks = ArchivedMessageChunk.objects.filter(room=room).order_by("-last_created_at")
+    if cursor is not None:
+        chunks = chunks.filter(first_created_at__lte=cursor[0])
+
+    out = []
+
+    for chunk in chunks.iterator(chunk_size=4):
+        for row in reversed(_unpack(chunk.payload)):
+            if cursor is not None and _sort_key(row) >= cursor:
+                continue
+
+            if row["is_deleted"] or not row["is_ready"]:
+                continue
+
+            if len(out) == limit:
+                return out, True
+
+            out.append(Message(room_id=room.id, **row))
+
+    return out, False
@@ -0,0 +1,260 @@
+import asyncio
+import atexit
+import logging
+from collections import defaultdict
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from chat.models import ChatRoom, Message
+from chat.ws_notify import message_event as ws_message_event
+from user_app.helper import outbox
+
+from .message_events import message_event
+from .room_state import record_new_messages
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 50
+FLUSH_INTERVAL_SEC = 0.05
+
+# a failing batch goes back to the queue this often before senders get an error
+MAX_PERSIST_ATTEMPTS = 3
+RETRY_DELAY_SEC = 0.5
+
+
+# persist_batch outcome per message
+STORED = "stored"
+DUPLICATE = "duplicate"  # client retry of a message already stored
+ROOM_CLOSED = "room_closed"  # room deactivated since the socket joined it
+
+
+class PersistFailed(Exception):
+    """Message not stored after MAX_PERSIST_ATTEMPTS flushes: client resends."""
+
+
+class RoomClosed(Exception):
+    """Room is no longer active: the message was dropped, not stored."""
+
+
+class MessageBatcher:
+    """
+    Collects WebSocket-sent messages and persists them in small batches:
+    one bulk_create + one room UPDATE per room per flush.
+
+    Nothing is acked or broadcast before its batch has committed: submit()
+    returns a future resolving to the stored message. A failed batch is
+    re-queued; after MAX_PERSIST_ATTEMPTS its futures fail instead.
+    """
+
+    def __init__(self):
+        self._pending = []
+        # (sender, client_id) → future, from submit until stored / given up
+        self._waiters = {}
+        self._attempts = {}
+        self._flush_handle = None
+
+    def submit(self, msg):
+        key = client_key(msg)
+
+        waiter = self._waiters.get(key)
+        if waiter is not None:
+            # resend while the first copy is still queued
+            return waiter
+
+        waiter = self._waiters[key] = asyncio.get_running_loop().create_future()
+        self._pending.append(msg)
+
+        if len(self._pending) >= MAX_BATCH:
+            self._schedule(0)
+        elif self._flush_handle is None:
+            self._schedule(FLUSH_INTERVAL_SEC)
+
+        return waiter
+
+    def _schedule(self, delay):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(
+            delay,
+            lambda: asyncio.ensure_future(self.flush()),
+        )
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            stored = await database_sync_to_async(persist_batch)(batch)
+        except Exception:
+            logger.exception("Chat batch persist FAILED (%d messages)", len(batch))
+            self._requeue(batch)
+            return
+
+        channel_layer = get_channel_layer()
+
+        for sent, (msg, outcome) in zip(batch, stored):
+            # retries of an already stored message were broadcast back then
+            if outcome == STORED:
+                try:
+                    await channel_layer.group_send(f"chat_{msg.room_id}", ws_message_event(msg))
+                except Exception:
+                    # stored: clients pick it up on their next sync
+                    logger.exception("Broadcast of message %s failed", msg.id)
+
+            key = client_key(sent)
+            self._attempts.pop(key, None)
+            waiter = self._waiters.pop(key, None)
+            if waiter is None or waiter.done():
+                continue
+
+            if outcome == ROOM_CLOSED:
+                waiter.set_exception(RoomClosed(str(msg.room_id)))
+            else:
+                waiter.set_result(msg)
+
+    def _requeue(self, batch):
+        retry = []
+
+        for msg in batch:
+            key = client_key(msg)
+            attempts = self._attempts.get(key, 0) + 1
+
+            if attempts < MAX_PERSIST_ATTEMPTS:
+                self._attempts[key] = attempts
+                retry.append(msg)
+                continue
+
+            self._attempts.pop(key, None)
+            waiter = self._waiters.pop(key, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_exception(PersistFailed(str(msg.client_id)))
+
+        # ahead of newer messages: keeps send order
+        self._pending[:0] = retry
+        if self._pending:
+            self._schedule(RETRY_DELAY_SEC)
+
+    def flush_sync(self):
+        """
+        Process exit (the loop is gone): store what is still queued.
+        No broadcast; clients see the messages on their next sync.
+        """
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            persist_batch(batch)
+        except Exception:
+            logger.exception("Chat batch persist at exit FAILED (%d messages)", len(batch))
+
+
+def client_key(msg):
+    return (msg.sender_user_id, msg.client_id)
+
+
+def persist_batch(batch):
+    """
+    → [(message, outcome)] in batch order. Client retries of a message
+    an earlier flush (or another process) already stored come back as
+    the stored row with DUPLICATE; messages for a room deactivated since
+    the socket joined it are dropped with ROOM_CLOSED.
+
+    Dedupe happens in the transaction: the (sender, client_id) unique
+    constraint drops retries on insert, and only the rows actually
+    inserted move the room counters and notify.
+    """
+    with transaction.atomic():
+        # row locks (id order) hold off a concurrent deactivation until
+        # this batch has committed
+        active = set(
+            ChatRoom.objects.select_for_update()
+            .filter(id__in={m.room_id for m in batch}, is_active=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        accepted = [m for m in batch if m.room_id in active]
+
+        Message.objects.bulk_create(accepted, ignore_conflicts=True)
+
+        # ids are generated here, so a batch id present in the table is a
+        # row this insert wrote; the others hit the unique constraint
+        inserted = set(
+            Message.objects.filter(id__in=[m.id for m in accepted]).values_list("id", flat=True)
+        )
+        fresh = [m for m in accepted if m.id in inserted]
+
+        existing = {}
+        retries = [m for m in accepted if m.id not in inserted]
+        if retries:
+            existing = {
+                client_key(m): m
+                for m in Message.objects.filter(
+                    sender_user_id__in={m.sender_user_id for m in retries},
+                    client_id__in={m.client_id for m in retries},
+                )
+            }
+
+        by_room = defaultdict(list)
+        for m in fresh:
+            by_room[m.room_id].append(m)
+
+        for room_id, msgs in by_room.items():
+            record_new_messages(
+                room_id,
+                msgs[-1],
+                unread_for_user=sum(m.sender_role == Message.SENDER_TRAINER for m in msgs),
+                unread_for_trainer=sum(m.sender_role == Message.SENDER_USER for m in msgs),
+            )
+
+        rooms = ChatRoom.objects.in_bulk(list(by_room))
+
+        # 🔔 one push per room per sender per batch, not per message,
+        # all outbox rows in one insert
+        events = []
+        for room_id, msgs in by_room.items():
+            notified = set()
+            for m in msgs:
+                if m.sender_role not in notified:
+                    notified.add(m.sender_role)
+                    events.append(message_event(rooms[room_id], m))
+
+        outbox.add(*events)
+
+    def outcome(m):
+        if m.room_id not in active:
+            return m, ROOM_CLOSED
+        if m.id in inserted:
+            return m, STORED
+        return existing.get(client_key(m), m), DUPLICATE
+
+    return [outcome(m) for m in batch]
+
+
+_batchers = {}
+
+
+def get_batcher():
+    # one batcher per event loop (Daphne runs a single loop per process)
+    loop = asyncio.get_running_loop()
+
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = MessageBatcher()
+
+    return batcher
+
+
+@atexit.register
+def _flush_on_exit():
+    for batcher in list(_batchers.values()):
+        batcher.flush_sync()
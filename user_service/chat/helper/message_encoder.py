@@ -0,0 +1,75 @@
+from operator import attrgetter
+
+import orjson
+
+from .room_state import recipient_read_cursor
+
+# Wire shape of a chat message (same keys/order as MessageSerializer).
+# UUID / datetime stay native: orjson encodes them without a normalize pass.
+_SCALAR_FIELDS = (
+    "id",
+    "room_id",
+    "sender_user_id",
+    "sender_role",
+    "type",
+    "text",
+    "duration_sec",
+    "created_at",
+)
+_get_scalars = attrgetter(*_SCALAR_FIELDS)
+
+# UTC as "Z", like DRF's DateTimeField
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _url(field, request):
+    if not field:
+        return None
+
+    return request.build_absolute_uri(field.url) if request else field.url
+
+
+def message_dict(msg, *, room=None, request=None):
+    (
+        msg_id,
+        room_id,
+        sender_user_id,
+        sender_role,
+        msg_type,
+        text,
+        duration_sec,
+        created_at,
+    ) = _get_scalars(msg)
+
+    # read receipts come from the recipient's room cursor
+    read_at = None
+    if room is not None:
+        cursor = recipient_read_cursor(room, msg)
+        if cursor is not None and cursor >= created_at:
+            read_at = cursor
+
+    return {
+        "id": msg_id,
+        "room_id": room_id,
+        "sender_user_id": sender_user_id,
+        "sender_role": sender_role,
+        "type": msg_type,
+        "text": text,
+        "file": _url(msg.file, request),
+        "thumbnail": _url(msg.thumbnail, request),
+        "duration_sec": duration_sec,
+        "read_at": read_at,
+        "created_at": created_at,
+    }
+
+
+def encode(obj) -> bytes:
+    return orjson.dumps(obj, option=_OPTIONS)
+
+
+def encode_message(msg, *, room=None, request=None) -> bytes:
+    """
+    Wire-ready JSON for ONE message, built once and reused by the
+    HTTP response and the chat_message group event.
+    """
+    return encode(message_dict(msg, room=room, request=request))
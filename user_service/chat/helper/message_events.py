@@ -0,0 +1,37 @@
+from chat.models import Message
+from user_app.helper import outbox
+
+
+def message_event(room, msg):
+    """
+    Push side of a new chat message, as an unsaved outbox row.
+    """
+
+    # 🔔 Notify trainer ONLY when user sends message
+    if msg.sender_role == Message.SENDER_USER:
+        return outbox.trainer_event(
+            event="NEW_CHAT_MESSAGE",
+            payload={
+                "trainer_user_id": str(room.trainer_user_id),
+                "chat_room_id": str(room.id),
+            },
+        )
+
+    # 🔔 Trainer → User (user push)
+    return outbox.user_push(
+        user_id=room.user_id,
+        title="New Message 💬",
+        body="Your trainer sent you a message",
+        data={
+            "type": "NEW_CHAT_MESSAGE",
+            "room_id": str(room.id),
+        },
+    )
+
+
+def notify_message_recipient(room, msg):
+    """
+    Call inside the message's transaction: the push is relayed only
+    once the message is committed.
+    """
+    outbox.add(message_event(room, msg))
@@ -0,0 +1,144 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from chat.models import Message
+
+# must match the trigger config in migration 0009
+SEARCH_CONFIG = "simple"
+
+# only the newest N matches are ranked → cost stays flat as rooms grow
+MAX_RANKED_MATCHES = 1000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _visible(qs):
+    return qs.filter(is_deleted=False, is_ready=True)
+
+
+def _postgres_search(room_ids, query):
+    ts_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+
+    # GIN match + (room, created_at) index, capped before ranking
+    newest = (
+        _visible(Message.objects.filter(room_id__in=room_ids, search_vector=ts_query))
+        .order_by("-created_at")
+        .values("id")[:MAX_RANKED_MATCHES]
+    )
+
+    return (
+        Message.objects.filter(id__in=newest)
+        .defer("search_vector")
+        .annotate(rank=SearchRank(F("search_vector"), ts_query))
+        .order_by("-rank", "-created_at")
+    )
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class InProcessMessageIndex:
+    """
+    Fallback inverted index for non-Postgres databases (SQLite tests / dev).
+    Catches up on new rows before every search; results are
+    AND-matched and ranked by tf-idf.
+    """
+
+    # batched WS sends carry created_at up to a flush interval old
+    CATCH_UP_SLACK = timedelta(seconds=5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)  # term -> {message_id: tf}
+        self._room_of = {}  # message_id -> room_id
+        self._created_of = {}  # message_id -> created_at
+        self._watermark = None
+
+    def _catch_up(self):
+        qs = Message.objects.exclude(text="")
+        if self._watermark is not None:
+            qs = qs.filter(created_at__gte=self._watermark - self.CATCH_UP_SLACK)
+
+        rows = qs.values_list("id", "room_id", "text", "created_at")
+
+        for msg_id, room_id, text, created_at in rows.iterator():
+            if msg_id in self._room_of:
+                continue
+
+            self._room_of[msg_id] = room_id
+            self._created_of[msg_id] = created_at
+
+            for term in tokenize(text):
+                postings = self._postings[term]
+                postings[msg_id] = postings.get(msg_id, 0) + 1
+
+            if self._watermark is None or created_at > self._watermark:
+                self._watermark = created_at
+
+    def search(self, room_ids, query):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        room_ids = set(room_ids)
+
+        with self._lock:
+            self._catch_up()
+
+            postings = [self._postings.get(t, {}) for t in terms]
+            if not all(postings):
+                return []
+
+            # rarest term first → smallest candidate set
+            postings.sort(key=len)
+            matches = [
+                m for m in postings[0]
+                if self._room_of[m] in room_ids and all(m in p for p in postings[1:])
+            ]
+
+            matches.sort(key=self._created_of.__getitem__, reverse=True)
+            matches = matches[:MAX_RANKED_MATCHES]
+
+            total = len(self._room_of)
+            scores = {
+                m: sum(p[m] * math.log(1 + total / len(p)) for p in postings)
+                for m in matches
+            }
+
+        visible = _visible(Message.objects.filter(id__in=matches)).defer("search_vector").in_bulk()
+
+        return sorted(
+            visible.values(),
+            key=lambda m: (scores[m.id], m.created_at),
+            reverse=True,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+fallback_index = InProcessMessageIndex()
+
+
+def search_messages(room_ids, query):
+    """
+    Ranked messages matching `query` inside `room_ids`
+    (QuerySet on Postgres, list elsewhere; both paginate).
+    Hot table only: archived chunks carry no search vector.
+    """
+    if connection.vendor == "postgresql":
+        return _postgres_search(room_ids, query)
+
+    return fallback_index.search(room_ids, query)
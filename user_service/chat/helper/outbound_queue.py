@@ -0,0 +1,227 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+# -----------------------------
+# WHAT THIS BOUNDS (and what it does not)
+# -----------------------------
+# The caps below bound frames waiting for this consumer's writer task,
+# not the client's backlog. Under Daphne, `await self.send()` returns as
+# soon as the frame is in Twisted's transport buffer, which has no limit
+# and no backpressure towards the app: a slow client's backlog builds up
+# there, unseen. The writer then drains this queue almost immediately, so
+# coalescing, drops and the resync close only fire when the event loop
+# itself falls behind, and the queue metrics stay near zero for slow
+# clients. Bounding the real client backlog needs client acks (not in
+# the socket protocol yet) or an ASGI server whose send() awaits drain.
+
+# per connection: frames not yet handed to the ASGI server
+MAX_QUEUED_FRAMES = 256
+MAX_QUEUED_BYTES = 512 * 1024
+
+# overflow with nothing droppable → client reconnects and calls /chat/sync/
+RESYNC_CLOSE_CODE = 4008
+RESYNC_FRAME = json.dumps({"type": "resync", "reason": "backpressure", "sync": "/api/chat/sync/"})
+
+DEPTH_BUCKETS = (1, 4, 16, 64, 256)
+
+# -----------------------------
+# IN-PROCESS AGGREGATES (per consumer kind)
+# -----------------------------
+_lock = threading.Lock()
+_stats = {}
+
+
+def _entry(kind):
+    return _stats.setdefault(
+        kind,
+        {
+            "connections": 0,
+            "queued_frames": 0,
+            "queued_bytes": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "overflow_closes": 0,
+            "depth_buckets": [0] * len(DEPTH_BUCKETS),
+            "depth_count": 0,
+        },
+    )
+
+
+def _record(kind, **deltas):
+    with _lock:
+        entry = _entry(kind)
+        for name, delta in deltas.items():
+            entry[name] += delta
+
+
+def _record_depth(kind, depth):
+    with _lock:
+        entry = _entry(kind)
+        entry["depth_count"] += 1
+        for i, bound in enumerate(DEPTH_BUCKETS):
+            if depth <= bound:
+                entry["depth_buckets"][i] += 1
+
+
+class _Frame:
+    __slots__ = ("key", "text", "size", "critical")
+
+    def __init__(self, key, text, critical):
+        self.key = key
+        self.text = text
+        self.size = len(text)
+        self.critical = critical
+
+
+class OutboundQueueMixin:
+    """
+    Channel-layer handlers enqueue instead of awaiting self.send(), so a
+    send that blocks never stalls this consumer's channel (and with it the
+    shared layer capacity). A writer task drains the queue in order.
+    Under Daphne send() does not block on the client: see the note at the
+    top of this module for what the caps do and do not bound.
+
+    Overflow policy, per enqueue:
+      1. same `key` already queued → replaced in place (status events)
+      2. over a cap → drop the oldest non-critical frame
+      3. still over with only critical frames → resync frame + close
+    """
+
+    outbound_kind = "ws"
+
+    def start_outbound(self):
+        self._out = deque()
+        self._out_keys = {}
+        self._out_bytes = 0
+        self._out_overflow = False
+        self._out_ready = asyncio.Event()
+        self._out_task = asyncio.ensure_future(self._drain_outbound())
+        _record(self.outbound_kind, connections=1)
+
+    async def stop_outbound(self):
+        task = getattr(self, "_out_task", None)
+        if task is None:
+            return
+
+        self._out_task = None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        _record(
+            self.outbound_kind,
+            connections=-1,
+            queued_frames=-len(self._out),
+            queued_bytes=-self._out_bytes,
+        )
+        self._out.clear()
+        self._out_keys.clear()
+
+    def enqueue_frame(self, text, *, key=None, critical=True):
+        if getattr(self, "_out_task", None) is None or self._out_overflow:
+            return
+
+        kind = self.outbound_kind
+
+        if key is not None and key in self._out_keys:
+            frame = self._out_keys[key]
+            self._out_bytes += len(text) - frame.size
+            _record(kind, coalesced=1, queued_bytes=len(text) - frame.size)
+            frame.text, frame.size = text, len(text)
+            return
+
+        frame = _Frame(key, text, critical)
+        self._out.append(frame)
+        self._out_bytes += frame.size
+        if key is not None:
+            self._out_keys[key] = frame
+        _record(kind, queued_frames=1, queued_bytes=frame.size)
+
+        while len(self._out) > MAX_QUEUED_FRAMES or self._out_bytes > MAX_QUEUED_BYTES:
+            victim = next((f for f in self._out if not f.critical), None)
+            if victim is None:
+                self._out_overflow = True
+                _record(kind, overflow_closes=1)
+                break
+
+            self._remove(victim)
+            _record(kind, dropped=1)
+
+        _record_depth(kind, len(self._out))
+        self._out_ready.set()
+
+    def _remove(self, frame):
+        self._out.remove(frame)
+        self._out_bytes -= frame.size
+        if frame.key is not None:
+            self._out_keys.pop(frame.key, None)
+        _record(self.outbound_kind, queued_frames=-1, queued_bytes=-frame.size)
+
+    async def _drain_outbound(self):
+        while True:
+            await self._out_ready.wait()
+
+            if self._out_overflow:
+                while self._out:
+                    self._remove(self._out[0])
+                await self.send(text_data=RESYNC_FRAME)
+                await self.close(code=RESYNC_CLOSE_CODE)
+                return
+
+            if not self._out:
+                self._out_ready.clear()
+                continue
+
+            frame = self._out.popleft()
+            self._out_bytes -= frame.size
+            if frame.key is not None:
+                self._out_keys.pop(frame.key, None)
+            _record(self.outbound_kind, queued_frames=-1, queued_bytes=-frame.size, sent=1)
+
+            # Daphne: returns once the frame is in Twisted's (unbounded)
+            # transport buffer, whether or not the client reads it
+            await self.send(text_data=frame.text)
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {k: {**v, "depth_buckets": list(v["depth_buckets"])} for k, v in _stats.items()}
+
+
+def render_prometheus() -> str:
+    """
+    Prometheus text exposition of per-consumer outbound queue state.
+    Queued frames / bytes are what waits on the writer task, not what the
+    client has yet to read (Daphne buffers that out of our sight).
+    """
+    lines = [
+        "# TYPE ws_connections gauge",
+        "# TYPE ws_outbound_queued_frames gauge",
+        "# TYPE ws_outbound_queued_bytes gauge",
+        "# TYPE ws_outbound_frames_total counter",
+        "# TYPE ws_outbound_depth histogram",
+    ]
+
+    for kind, v in sorted(snapshot().items()):
+        labels = f'consumer="{kind}"'
+
+        lines.append(f"ws_connections{{{labels}}} {v['connections']}")
+        lines.append(f"ws_outbound_queued_frames{{{labels}}} {v['queued_frames']}")
+        lines.append(f"ws_outbound_queued_bytes{{{labels}}} {v['queued_bytes']}")
+
+        for outcome in ("sent", "coalesced", "dropped", "overflow_closes"):
+            lines.append(
+                f'ws_outbound_frames_total{{{labels},outcome="{outcome}"}} {v[outcome]}'
+            )
+
+        for bound, count in zip(DEPTH_BUCKETS, v["depth_buckets"]):
+            lines.append(f'ws_outbound_depth_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'ws_outbound_depth_bucket{{{labels},le="+Inf"}} {v["depth_count"]}')
+        lines.append(f"ws_outbound_depth_count{{{labels}}} {v['depth_count']}")
+
+    return "\n".join(lines) + "\n"
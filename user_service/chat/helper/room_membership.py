@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from chat.models import ChatRoom
+
+CACHE_VERSION = "v1"
+
+# Redis (shared): invalidated explicitly on activate / deactivate
+MEMBERSHIP_TTL = 60 * 10
+
+# In-process LRU: NOT invalidated across processes,
+# so keep it short (worst-case staleness after a removal)
+LOCAL_TTL = 15
+LOCAL_MAX_ROOMS = 10_000
+
+# cached marker for "no such room" (reconnect loops on deleted rooms)
+_MISSING = "missing"
+
+
+class RoomMembership(NamedTuple):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    trainer_user_id: uuid.UUID
+    is_active: bool
+
+    def has_participant(self, user_id):
+        return str(user_id) in (str(self.user_id), str(self.trainer_user_id))
+
+
+def _cache_key(room_id):
+    return f"chat:room_membership:{room_id}:{CACHE_VERSION}"
+
+
+class _LocalLRU:
+    def __init__(self, max_size, ttl):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+
+            if len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+_local = _LocalLRU(LOCAL_MAX_ROOMS, LOCAL_TTL)
+
+
+def _normalize(room_id):
+    try:
+        return str(uuid.UUID(str(room_id)))
+    except ValueError:
+        return None
+
+
+def _decode(value):
+    if value == _MISSING:
+        return None
+
+    return RoomMembership(
+        id=uuid.UUID(value["id"]),
+        user_id=uuid.UUID(value["user_id"]),
+        trainer_user_id=uuid.UUID(value["trainer_user_id"]),
+        is_active=value["is_active"],
+    )
+
+
+def peek_room_membership(room_id):
+    """
+    In-process lookup only (safe from async code, no I/O).
+    Returns (found, membership_or_None).
+    """
+    key = _normalize(room_id)
+    if key is None:
+        return True, None
+
+    value = _local.get(key)
+    if value is None:
+        return False, None
+
+    return True, _decode(value)
+
+
+def get_room_membership(room_id):
+    """
+    LRU → Redis → Postgres. Returns RoomMembership or None (no such room).
+    Sync: call through database_sync_to_async from consumers.
+    """
+    key = _normalize(room_id)
+    if key is None:
+        return None
+
+    value = _local.get(key)
+
+    if value is None:
+        # fail-open: Redis errors read as a miss
+        value = cache.get(_cache_key(key))
+
+        if value is None:
+            row = (
+                ChatRoom.objects.filter(id=key)
+                .values("user_id", "trainer_user_id", "is_active")
+                .first()
+            )
+            value = (
+                {
+                    "id": key,
+                    "user_id": str(row["user_id"]),
+                    "trainer_user_id": str(row["trainer_user_id"]),
+                    "is_active": row["is_active"],
+                }
+                if row
+                else _MISSING
+            )
+            cache.set(_cache_key(key), value, MEMBERSHIP_TTL)
+
+        _local.set(key, value)
+
+    return _decode(value)
+
+
+def invalidate_room_membership(*room_ids):
+    """
+    Call AFTER COMMIT whenever a room is created, activated or deactivated.
+    """
+    keys = [k for k in map(_normalize, room_ids) if k]
+
+    for key in keys:
+        _local.delete(key)
+
+    if keys:
+        cache.delete_many([_cache_key(k) for k in keys])
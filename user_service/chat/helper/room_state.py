@@ -0,0 +1,104 @@
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from chat.models import ChatRoom, Message
+
+PREVIEW_LENGTH = 120
+
+
+def message_preview(msg):
+    if msg.type == Message.TEXT:
+        return (msg.text or "")[:PREVIEW_LENGTH]
+
+    return f"[{msg.type}]"
+
+
+def record_new_messages(room_id, last_msg, *, unread_for_user=0, unread_for_trainer=0):
+    """
+    ONE atomic UPDATE per room:
+    last message info + recipient unread counters (F() increments,
+    so concurrent senders never lose a count).
+
+    Monotonic: a message older than the room's last one (a media upload
+    finishing after newer texts, a late batch) bumps the counters but
+    never moves last_message_at / the preview backwards.
+    """
+    sent_at = last_msg.created_at
+    is_newest = Q(last_message_at__isnull=True) | Q(last_message_at__lte=sent_at)
+
+    updates = {
+        # Coalesce: GREATEST with NULL is NULL outside PostgreSQL
+        "last_message_at": Greatest(Coalesce("last_message_at", Value(sent_at)), Value(sent_at)),
+        "last_message_preview": Case(
+            When(is_newest, then=Value(message_preview(last_msg))),
+            default=F("last_message_preview"),
+        ),
+        "updated_at": timezone.now(),
+    }
+
+    if unread_for_user:
+        updates["user_unread_count"] = F("user_unread_count") + unread_for_user
+
+    if unread_for_trainer:
+        updates["trainer_unread_count"] = F("trainer_unread_count") + unread_for_trainer
+
+    ChatRoom.objects.filter(pk=room_id).update(**updates)
+
+
+def record_new_message(room, msg):
+    # the recipient (not the sender) gets the unread bump
+    if msg.sender_role == Message.SENDER_USER:
+        record_new_messages(room.pk, msg, unread_for_trainer=1)
+    else:
+        record_new_messages(room.pk, msg, unread_for_user=1)
+
+
+def mark_room_read(room, user_id):
+    """
+    Advance the reader's cursor to the newest message and zero their
+    unread counter: ONE single-row UPDATE, skipped when already there.
+    Returns the new cursor, or None when nothing changed.
+
+    The cursor is read from the row in the statement that zeroes the
+    counter, so a message landing meanwhile is covered by both or neither.
+    """
+    cursor_field = room.read_cursor_field_for(user_id)
+    counter_field = room.unread_field_for(user_id)
+    row = ChatRoom.objects.filter(pk=room.pk)
+
+    updated = (
+        row.filter(last_message_at__isnull=False)
+        .filter(
+            Q(**{f"{cursor_field}__isnull": True})
+            | Q(**{f"{cursor_field}__lt": F("last_message_at")})
+            # counted but not newer than the cursor (late batch / media)
+            | Q(**{f"{counter_field}__gt": 0})
+        )
+        .update(
+            **{
+                cursor_field: F("last_message_at"),
+                counter_field: 0,
+                "updated_at": timezone.now(),
+            }
+        )
+    )
+
+    if not updated:
+        return None
+
+    upto = row.values_list(cursor_field, flat=True).first()
+
+    setattr(room, cursor_field, upto)
+    setattr(room, counter_field, 0)
+    return upto
+
+
+def recipient_read_cursor(room, msg):
+    """
+    Cursor of whoever received `msg` (drives read receipts).
+    """
+    if msg.sender_role == Message.SENDER_USER:
+        return room.trainer_last_read_at
+
+    return room.user_last_read_at
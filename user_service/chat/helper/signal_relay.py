@@ -0,0 +1,72 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+
+# ICE trickle bursts to a few dozen candidates; a sustained stream
+# above this is a broken or abusive client
+SIGNAL_RATE_PER_SEC = 20
+SIGNAL_BURST = 60
+
+# sampled structured traces instead of one log line per SDP / ICE message
+trace_logger = logging.getLogger("chat.signal")
+
+
+class TokenBucket:
+    """Per-connection limiter (single event loop → no lock needed)."""
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate or SIGNAL_RATE_PER_SEC
+        self.burst = burst or SIGNAL_BURST
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def allow(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+def should_trace():
+    return random.random() < settings.CALL_SIGNAL_TRACE_SAMPLE_RATE
+
+
+def trace(event, **fields):
+    trace_logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+def signal_event(call_id, payload, sender, traced):
+    """Channel-layer event, same shape for group and direct relay."""
+    event = {
+        "type": "call_event",
+        "payload": payload,
+        "sender": sender,
+        "call_id": str(call_id),
+    }
+
+    if traced:
+        # wall clock: sender and receiver may be different workers
+        event["sent_at"] = time.time()
+
+    return event
+
+
+def trace_delivery(event, channel):
+    if "sent_at" not in event:
+        return
+
+    trace(
+        "signal_delivered",
+        call_id=event.get("call_id"),
+        kind=event["payload"].get("type"),
+        channel=channel,
+        relay_ms=round((time.time() - event["sent_at"]) * 1000, 3),
+    )
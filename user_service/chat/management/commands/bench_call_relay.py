@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import re_path
+
+from channels.routing import URLRouter
+
+from chat.consumers import CallConsumer, CallRelayMixin
+from chat.helper import signal_relay
+
+
+class _CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.records = 0
+        self.bytes = 0
+        self._last = None
+
+    def emit(self, record):
+        # the same record can reach this handler from several loggers
+        if record is self._last:
+            return
+        self._last = record
+        self.records += 1
+        self.bytes += len(self.format(record))
+
+
+class Command(BaseCommand):
+    help = "Benchmark: call signal relay latency and log volume, group fanout vs direct peer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=2000)
+        parser.add_argument("--sample-rate", type=float, default=0.01)
+        parser.add_argument(
+            "--in-memory",
+            action="store_true",
+            help="use the in-memory channel layer instead of CHANNEL_LAYERS",
+        )
+
+    def handle(self, *args, **options):
+        layers = None
+        if options["in_memory"]:
+            layers = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+        with override_settings(
+            CALL_SIGNAL_TRACE_SAMPLE_RATE=options["sample_rate"],
+            **({"CHANNEL_LAYERS": layers} if layers else {}),
+        ):
+            channel_layers.backends.clear()
+            asyncio.run(self._run(options["messages"]))
+
+    async def _run(self, n):
+        router = URLRouter([re_path(r"^ws/calls/(?P<call_id>[0-9a-f-]+)/$", CallConsumer.as_asgi())])
+
+        def app_for(user_id):
+            user = SimpleNamespace(id=user_id, is_authenticated=True)
+
+            async def app(scope, receive, send):
+                return await router(dict(scope, user=user), receive, send)
+
+            return app
+
+        # measure the relay, not the limiter
+        default_rate = signal_relay.SIGNAL_RATE_PER_SEC, signal_relay.SIGNAL_BURST
+        signal_relay.SIGNAL_RATE_PER_SEC = signal_relay.SIGNAL_BURST = 10**9
+
+        # count log lines instead of printing them
+        counter = _CountingHandler()
+        loggers = [logging.getLogger(), logging.getLogger("django"), signal_relay.trace_logger]
+        saved = [(lg.handlers, lg.level) for lg in loggers]
+        for lg in loggers:
+            lg.handlers = [counter]
+        loggers[0].setLevel(logging.INFO)
+
+        try:
+            for direct in (False, True):
+                CallRelayMixin.direct_relay = direct
+                counter.records = counter.bytes = 0
+
+                latencies, burst = await self._run_mode(app_for, n)
+
+                name = "direct" if direct else "group"
+                self.stdout.write(
+                    f"{name:<7} p50 {statistics.median(latencies):7.3f} ms  "
+                    f"p95 {statistics.quantiles(latencies, n=20)[-1]:7.3f} ms  "
+                    f"burst {n / burst:9.0f} msg/s  "
+                    f"logs {counter.records / (2 * n):.3f} lines/msg "
+                    f"({counter.bytes} bytes)"
+                )
+
+            signal_relay.SIGNAL_RATE_PER_SEC, signal_relay.SIGNAL_BURST = default_rate
+            await self._run_rate_limit(app_for)
+        finally:
+            CallRelayMixin.direct_relay = True
+            signal_relay.SIGNAL_RATE_PER_SEC, signal_relay.SIGNAL_BURST = default_rate
+            for lg, (handlers, level) in zip(loggers, saved):
+                lg.handlers = handlers
+                lg.setLevel(level)
+
+    async def _connect_pair(self, app_for):
+        call_id = uuid.uuid4()
+        a = WebsocketCommunicator(app_for(uuid.uuid4()), f"/ws/calls/{call_id}/")
+        b = WebsocketCommunicator(app_for(uuid.uuid4()), f"/ws/calls/{call_id}/")
+
+        await a.connect()
+        await b.connect()
+        # let hello / ack settle so both sides know their peer
+        await asyncio.sleep(0.1)
+        return a, b
+
+    async def _run_mode(self, app_for, n):
+        a, b = await self._connect_pair(app_for)
+        candidate = {"type": "ice", "candidate": "candidate:1 1 udp 2122260223 10.0.0.1 5000 typ host"}
+
+        # one at a time: relay latency
+        latencies = []
+        for _ in range(n):
+            started = time.perf_counter()
+            await a.send_json_to(candidate)
+            await b.receive_json_from()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        # trickle-ICE style burst: throughput
+        started = time.perf_counter()
+        for _ in range(n):
+            await a.send_json_to(candidate)
+        for _ in range(n):
+            await b.receive_json_from()
+        burst = time.perf_counter() - started
+
+        await a.disconnect()
+        await b.disconnect()
+        return latencies, burst
+
+    async def _run_rate_limit(self, app_for):
+        a, b = await self._connect_pair(app_for)
+        sent = signal_relay.SIGNAL_BURST * 2
+
+        for _ in range(sent):
+            await a.send_json_to({"type": "ice"})
+
+        rejected = 0
+        while not await a.receive_nothing(0.05):
+            frame = await a.receive_json_from()
+            rejected += frame.get("type") == "error"
+
+        self.stdout.write(
+            f"limit   {rejected}/{sent} rejected at "
+            f"{signal_relay.SIGNAL_RATE_PER_SEC}/s burst {signal_relay.SIGNAL_BURST}"
+        )
+
+        await a.disconnect()
+        await b.disconnect()
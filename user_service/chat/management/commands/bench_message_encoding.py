@@ -0,0 +1,60 @@
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat.helper.message_encoder import encode_message
+from chat.helper.message_normalizer import normalize_for_ws
+from chat.models import Message
+from chat.serializers import MessageSerializer
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: DRF serializer + normalize_for_ws vs the orjson message encoder"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        n = options["messages"]
+        now = timezone.now()
+
+        # unsaved instances: measures encoding only, no DB
+        messages = [
+            Message(
+                id=uuid.uuid4(),
+                room_id=uuid.uuid4(),
+                sender_user_id=uuid.uuid4(),
+                sender_role=Message.SENDER_USER,
+                type=Message.TEXT,
+                text=f"message number {i} " * 4,
+                created_at=now,
+            )
+            for i in range(n)
+        ]
+
+        def old_path(msg):
+            # REST response + WS group event, each serialized separately
+            MessageSerializer(msg).data
+            json.dumps(normalize_for_ws(MessageSerializer(msg).data))
+
+        def new_path(msg):
+            encode_message(msg).decode()
+
+        results = {}
+        for name, fn in (("serializer", old_path), ("encoder", new_path)):
+            started = time.perf_counter()
+            for msg in messages:
+                fn(msg)
+            results[name] = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{name:<10} {results[name] * 1000:8.1f} ms total  "
+                f"{results[name] / n * 1e6:6.1f} µs/message"
+            )
+
+        self.stdout.write(
+            f"speedup    {results['serializer'] / results['encoder']:.1f}x"
+        )
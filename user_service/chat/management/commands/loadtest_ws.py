@@ -0,0 +1,247 @@
+import asyncio
+import gc
+import json
+import logging
+import resource
+import statistics
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.backends import TokenBackend
+
+from chat.call_events import emit_user_call_event
+from chat.models import ChatRoom, Message
+from chat.ws_notify import notify_new_message
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # peak, not current: only meaningful as an upper bound
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        return "n/a"
+
+    q = statistics.quantiles(values, n=100)
+    return (
+        f"p50 {q[49]:8.2f} ms  p95 {q[94]:8.2f} ms  "
+        f"p99 {q[98]:8.2f} ms  max {max(values):8.2f} ms"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "WebSocket load test: opens many authenticated ChatConsumer, "
+        "UserCallConsumer and CallConsumer sockets against the real ASGI app, "
+        "fans out through notify_new_message / emit_user_call_event and "
+        "reports connect rate, delivery latency and memory per socket. "
+        "Run with --settings=user_service.settings_loadtest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=1000, help="chat rooms (2 sockets each)")
+        parser.add_argument("--users", type=int, default=1000, help="user call sockets")
+        parser.add_argument("--calls", type=int, default=250, help="calls (2 sockets each)")
+        parser.add_argument("--rounds", type=int, default=10)
+        parser.add_argument("--interval", type=float, default=0.5, help="seconds between rounds")
+        parser.add_argument("--concurrency", type=int, default=200, help="parallel connects")
+        parser.add_argument(
+            "--with-logs",
+            action="store_true",
+            help="keep the per-event ERROR logging on (off by default)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            call_command("migrate", verbosity=0, interactive=False)
+
+        django_logger = logging.getLogger("django")
+        level = django_logger.level
+        if not options["with_logs"]:
+            django_logger.setLevel(logging.CRITICAL)
+
+        try:
+            asyncio.run(self._run(options))
+        finally:
+            django_logger.setLevel(level)
+
+    # -------------------------------------------------
+    # SETUP
+    # -------------------------------------------------
+    def _tokens(self, user_ids):
+        backend = TokenBackend(
+            algorithm=settings.SIMPLE_JWT.get("ALGORITHM", "HS256"),
+            signing_key=settings.SIMPLE_JWT.get("SIGNING_KEY"),
+        )
+        return {uid: backend.encode({"sub": str(uid), "roles": ["user"]}) for uid in user_ids}
+
+    def _create_rooms(self, n):
+        rooms = [ChatRoom(user_id=uuid.uuid4(), trainer_user_id=uuid.uuid4()) for _ in range(n)]
+        ChatRoom.objects.bulk_create(rooms, batch_size=500)
+        return rooms
+
+    async def _connect_all(self, app, targets, concurrency):
+        """targets: [(kind, path)] → (communicators, failures, seconds)"""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def connect(path):
+            async with sem:
+                comm = WebsocketCommunicator(app, path)
+                connected, _ = await comm.connect(timeout=30)
+                return comm if connected else None
+
+        started = time.perf_counter()
+        comms = await asyncio.gather(*(connect(path) for _, path in targets))
+        elapsed = time.perf_counter() - started
+
+        return comms, sum(c is None for c in comms), elapsed
+
+    # -------------------------------------------------
+    # RUN
+    # -------------------------------------------------
+    async def _run(self, options):
+        from user_service.asgi import application
+
+        rooms = await sync_to_async(self._create_rooms)(options["rooms"])
+        users = [uuid.uuid4() for _ in range(options["users"])]
+        calls = [(uuid.uuid4(), uuid.uuid4(), uuid.uuid4()) for _ in range(options["calls"])]
+
+        tokens = await sync_to_async(self._tokens)(
+            [r.user_id for r in rooms]
+            + [r.trainer_user_id for r in rooms]
+            + users
+            + [uid for call in calls for uid in call[1:]]
+        )
+
+        kinds = {
+            "chat": [
+                f"/ws/chat/{r.id}/?token={tokens[uid]}"
+                for r in rooms
+                for uid in (r.user_id, r.trainer_user_id)
+            ],
+            "user": [f"/ws/user/call/?token={tokens[uid]}" for uid in users],
+            "call": [
+                f"/ws/calls/{call_id}/?token={tokens[uid]}"
+                for call_id, *uids in calls
+                for uid in uids
+            ],
+        }
+
+        gc.collect()
+        rss_before = _rss_bytes()
+
+        sockets = {}
+        for kind, paths in kinds.items():
+            if not paths:
+                continue
+
+            comms, failed, elapsed = await self._connect_all(
+                application, [(kind, p) for p in paths], options["concurrency"]
+            )
+            sockets[kind] = comms
+            self.stdout.write(
+                f"connect  {kind:<5} {len(paths) - failed:6d} ok {failed:4d} failed  "
+                f"{elapsed:6.2f} s  {len(paths) / elapsed:8.0f} sockets/s"
+            )
+
+        gc.collect()
+        total = sum(len(c) for c in sockets.values())
+        rss_grown = _rss_bytes() - rss_before
+        self.stdout.write(
+            f"memory   +{rss_grown / 2**20:.1f} MB RSS for {total} sockets  "
+            f"({rss_grown / max(total, 1) / 1024:.1f} KB/socket, incl. test client)"
+        )
+
+        # let CallConsumer peers finish their hello / ack
+        await asyncio.sleep(0.2)
+
+        latencies = {kind: [] for kind in sockets}
+        readers = [
+            asyncio.create_task(self._read(comm, kind, latencies[kind]))
+            for kind, comms in sockets.items()
+            for comm in comms
+            if comm is not None
+        ]
+
+        call_pairs = list(zip(*[iter(sockets.get("call", []))] * 2))
+
+        for _ in range(options["rounds"]):
+            # server-side fanout runs in a worker thread, as in views / tasks
+            await sync_to_async(self._fanout_round, thread_sensitive=False)(rooms, users)
+
+            for a, b in call_pairs:
+                if a is not None and b is not None:
+                    await a.send_json_to({"type": "loadtest", "sent": time.perf_counter()})
+
+            await asyncio.sleep(options["interval"])
+
+        # drain
+        await asyncio.sleep(max(1.0, options["interval"]))
+
+        expected = {
+            "chat": len(rooms) * 2,
+            "user": len(users),
+            "call": len(call_pairs),
+        }
+        for kind, values in latencies.items():
+            want = expected[kind] * options["rounds"]
+            self.stdout.write(
+                f"deliver  {kind:<5} {len(values):7d}/{want:<7d} {_percentiles(values)}"
+            )
+
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+        for comms in sockets.values():
+            await asyncio.gather(*(c.disconnect() for c in comms if c is not None))
+
+        await sync_to_async(
+            ChatRoom.objects.filter(id__in=[r.id for r in rooms]).delete
+        )()
+
+    def _fanout_round(self, rooms, users):
+        now = timezone.now()
+
+        for room in rooms:
+            message = Message(
+                id=uuid.uuid4(),
+                room_id=room.id,
+                sender_user_id=room.user_id,
+                sender_role=Message.SENDER_USER,
+                type=Message.TEXT,
+                text=repr(time.perf_counter()),
+                created_at=now,
+            )
+            notify_new_message(room.id, message)
+
+        for user_id in users:
+            emit_user_call_event(user_id, {"type": "LOADTEST", "sent": time.perf_counter()})
+
+    async def _read(self, comm, kind, out):
+        while True:
+            frame = await comm.receive_from(timeout=3600)
+            received = time.perf_counter()
+
+            data = json.loads(frame)
+            if kind == "chat":
+                sent = data.get("payload", {}).get("text")
+            else:
+                sent = data.get("sent")
+
+            try:
+                out.append((received - float(sent)) * 1000)
+            except (TypeError, ValueError):
+                pass
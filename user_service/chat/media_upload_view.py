@@ -0,0 +1,232 @@
+import uuid
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from chat.models import ChatRoom, MediaUpload, Message
+from chat.serializers import MediaUploadCreateSerializer
+from chat.tasks import process_chat_media
+from chat.ws_notify import notify_new_message
+
+from .helper.media_store import CHUNK_SIZE, MAX_CHUNK_SIZE, append_chunk
+from .helper.message_encoder import encode_message
+from .helper.message_events import notify_message_recipient
+from .helper.room_state import record_new_message
+
+
+def _user_uuid(request):
+    try:
+        return uuid.UUID(str(request.user.id))
+    except ValueError:
+        return None
+
+
+def _upload_state(upload):
+    return {
+        "upload_id": upload.id,
+        "status": upload.status,
+        "received_bytes": upload.received_bytes,
+        "total_size": upload.total_size,
+        "chunk_size": CHUNK_SIZE,
+        "message_id": upload.message_id,
+    }
+
+
+def _sender_role(room, user_uuid):
+    return Message.SENDER_USER if user_uuid == room.user_id else Message.SENDER_TRAINER
+
+
+# -------------------------------------------------
+# START (or resume) A CHUNKED MEDIA UPLOAD
+# same sha256 already stored by this sender → message created at once
+# -------------------------------------------------
+class MediaUploadCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = MediaUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        room = get_object_or_404(ChatRoom, id=data["room_id"], is_active=True)
+
+        user_uuid = _user_uuid(request)
+        if user_uuid is None:
+            return Response(
+                {"detail": "Invalid user id in token"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if user_uuid not in (room.user_id, room.trainer_user_id):
+            return Response(
+                {"detail": "Forbidden"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # ♻️ dedupe: only against the sender's own files (a bare hash
+        # must never unlock someone else's media)
+        stored = (
+            Message.objects.filter(
+                sender_user_id=user_uuid,
+                sha256=data["sha256"],
+                type=data["type"],
+                is_ready=True,
+            )
+            .exclude(file="")
+            .order_by("-created_at")
+            .first()
+        )
+
+        if stored is not None:
+            return self._send_stored(request, room, user_uuid, stored, data)
+
+        # 🔁 resume: same sender, same room, same bytes still uploading
+        upload = MediaUpload.objects.filter(
+            room=room,
+            uploader_user_id=user_uuid,
+            sha256=data["sha256"],
+            status=MediaUpload.STATUS_UPLOADING,
+        ).first()
+
+        if upload is not None:
+            return Response(_upload_state(upload), status=status.HTTP_200_OK)
+
+        upload = MediaUpload.objects.create(
+            room=room,
+            uploader_user_id=user_uuid,
+            type=data["type"],
+            text=data.get("text", ""),
+            file_name=data["file_name"],
+            mime_type=data.get("mime_type", ""),
+            total_size=data["total_size"],
+            sha256=data["sha256"],
+        )
+
+        return Response(_upload_state(upload), status=status.HTTP_201_CREATED)
+
+    def _send_stored(self, request, room, user_uuid, stored, data):
+        with transaction.atomic():
+            msg = Message.objects.create(
+                room=room,
+                sender_user_id=user_uuid,
+                sender_role=_sender_role(room, user_uuid),
+                type=stored.type,
+                text=data.get("text", ""),
+                file=stored.file.name,
+                thumbnail=stored.thumbnail.name or None,
+                file_size=stored.file_size,
+                mime_type=stored.mime_type,
+                duration_sec=stored.duration_sec,
+                sha256=stored.sha256,
+            )
+
+            record_new_message(room, msg)
+            notify_message_recipient(room, msg)
+
+        body = encode_message(msg)
+
+        transaction.on_commit(lambda: notify_new_message(room.id, msg, body))
+
+        return HttpResponse(
+            body,
+            status=status.HTTP_201_CREATED,
+            content_type="application/json",
+        )
+
+
+# -------------------------------------------------
+# UPLOAD STATUS (client asks where to resume)
+# -------------------------------------------------
+class MediaUploadStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(
+            MediaUpload,
+            id=upload_id,
+            uploader_user_id=_user_uuid(request),
+        )
+        return Response(_upload_state(upload))
+
+
+# -------------------------------------------------
+# APPEND ONE CHUNK
+# PUT raw bytes, header Upload-Offset = bytes already acknowledged
+# -------------------------------------------------
+class MediaUploadChunkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response(
+                {"detail": "Upload-Offset and Content-Length are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if length <= 0 or length > MAX_CHUNK_SIZE:
+            return Response(
+                {"detail": f"Chunk must be 1..{MAX_CHUNK_SIZE} bytes"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        with transaction.atomic():
+            # row lock: one writer per upload
+            upload = get_object_or_404(
+                MediaUpload.objects.select_for_update(),
+                id=upload_id,
+                uploader_user_id=_user_uuid(request),
+            )
+
+            if (
+                upload.status != MediaUpload.STATUS_UPLOADING
+                or offset != upload.received_bytes
+            ):
+                # client resumes from received_bytes
+                return Response(_upload_state(upload), status=status.HTTP_409_CONFLICT)
+
+            if offset + length > upload.total_size:
+                return Response(
+                    {"detail": "Chunk exceeds declared total_size"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            # raw body straight to disk, never parsed / fully buffered
+            upload.received_bytes += append_chunk(upload, request.stream, length)
+
+            if upload.received_bytes == upload.total_size:
+                # hidden until the media worker verifies + processes it
+                upload.message = Message.objects.create(
+                    room=upload.room,
+                    sender_user_id=upload.uploader_user_id,
+                    sender_role=_sender_role(upload.room, upload.uploader_user_id),
+                    type=upload.type,
+                    text=upload.text,
+                    file_size=upload.total_size,
+                    mime_type=upload.mime_type,
+                    sha256=upload.sha256,
+                    is_ready=False,
+                )
+                upload.status = MediaUpload.STATUS_PROCESSING
+
+                transaction.on_commit(
+                    lambda: process_chat_media.delay(str(upload.id))
+                )
+
+            upload.save(update_fields=["received_bytes", "status", "message", "updated_at"])
+
+        return Response(
+            _upload_state(upload),
+            status=(
+                status.HTTP_202_ACCEPTED
+                if upload.status == MediaUpload.STATUS_PROCESSING
+                else status.HTTP_200_OK
+            ),
+        )
@@ -0,0 +1,21 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+from .helper.outbound_queue import render_prometheus
+
+
+class WebSocketMetricsView(APIView):
+    """
+    Prometheus scrape endpoint for WebSocket outbound queues
+    (per ASGI process: scrape every replica). Depths count frames not yet
+    handed to Daphne, not the client's unread backlog.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(),
+            content_type="text/plain; version=0.0.4",
+        )
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+
+
+def backfill_unread_counters(apps, schema_editor):
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+    Message = apps.get_model("chat", "Message")
+
+    latest = Message.objects.filter(room=OuterRef("pk")).order_by("-created_at")
+
+    rooms = ChatRoom.objects.annotate(
+        unread_for_user=Count(
+            "messages",
+            filter=Q(messages__read_at__isnull=True, messages__sender_role="trainer"),
+        ),
+        unread_for_trainer=Count(
+            "messages",
+            filter=Q(messages__read_at__isnull=True, messages__sender_role="user"),
+        ),
+        latest_text=Subquery(latest.values("text")[:1]),
+        latest_type=Subquery(latest.values("type")[:1]),
+    )
+
+    batch = []
+    for room in rooms.iterator(chunk_size=500):
+        room.user_unread_count = room.unread_for_user
+        room.trainer_unread_count = room.unread_for_trainer
+
+        if room.latest_type == "text":
+            room.last_message_preview = (room.latest_text or "")[:120]
+        elif room.latest_type:
+            room.last_message_preview = f"[{room.latest_type}]"
+
+        batch.append(room)
+
+        if len(batch) >= 500:
+            ChatRoom.objects.bulk_update(
+                batch,
+                ["user_unread_count", "trainer_unread_count", "last_message_preview"],
+            )
+            batch = []
+
+    if batch:
+        ChatRoom.objects.bulk_update(
+            batch,
+            ["user_unread_count", "trainer_unread_count", "last_message_preview"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_call_caller_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="last_message_preview",
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddField(
+            model_name="chatroom",
+            name="trainer_unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="chatroom",
+            name="user_unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="chatroom",
+            index=models.Index(
+                fields=["user_id", "is_active", "-last_message_at"],
+                name="chat_chatro_user_id_503164_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chatroom",
+            index=models.Index(
+                fields=["trainer_user_id", "is_active", "-last_message_at"],
+                name="chat_chatro_trainer_99aa98_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
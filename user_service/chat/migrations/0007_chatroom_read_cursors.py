@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:57
+
+from django.db import migrations, models
+from django.db.models import Max, Q
+
+
+def backfill_read_cursors(apps, schema_editor):
+    """
+    Cursor = newest message the participant had already marked read.
+    """
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+
+    rooms = ChatRoom.objects.annotate(
+        user_read_upto=Max(
+            "messages__created_at",
+            filter=Q(messages__read_at__isnull=False, messages__sender_role="trainer"),
+        ),
+        trainer_read_upto=Max(
+            "messages__created_at",
+            filter=Q(messages__read_at__isnull=False, messages__sender_role="user"),
+        ),
+    )
+
+    batch = []
+    for room in rooms.iterator(chunk_size=500):
+        room.user_last_read_at = room.user_read_upto
+        room.trainer_last_read_at = room.trainer_read_upto
+        batch.append(room)
+
+        if len(batch) >= 500:
+            ChatRoom.objects.bulk_update(batch, ["user_last_read_at", "trainer_last_read_at"])
+            batch = []
+
+    if batch:
+        ChatRoom.objects.bulk_update(batch, ["user_last_read_at", "trainer_last_read_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_chatroom_unread_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="trainer_last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="chatroom",
+            name="user_last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_read_cursors, migrations.RunPython.noop),
+    ]
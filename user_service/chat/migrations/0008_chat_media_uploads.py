@@ -0,0 +1,110 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_chatroom_read_cursors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="is_ready",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="sha256",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="thumbnail",
+            field=models.FileField(
+                blank=True, null=True, upload_to="chat_media/thumbs/"
+            ),
+        ),
+        migrations.CreateModel(
+            name="MediaUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("uploader_user_id", models.UUIDField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("text", "Text"),
+                            ("image", "Image"),
+                            ("audio", "Audio"),
+                            ("video", "Video"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("text", models.TextField(blank=True)),
+                ("file_name", models.CharField(max_length=255)),
+                ("mime_type", models.CharField(blank=True, max_length=50)),
+                ("total_size", models.PositiveBigIntegerField()),
+                ("received_bytes", models.PositiveBigIntegerField(default=0)),
+                ("sha256", models.CharField(max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("uploading", "Uploading"),
+                            ("processing", "Processing"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="uploading",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "message",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload",
+                        to="chat.message",
+                    ),
+                ),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads",
+                        to="chat.chatroom",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["uploader_user_id", "sha256", "status"],
+                        name="chat_mediau_uploade_49d790_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="chat_mediau_status_23f0e9_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:08
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Postgres only: SQLite (tests) uses the in-process fallback index
+CREATE_SEARCH_SQL = [
+    """
+    CREATE INDEX chat_message_search_gin
+        ON chat_message USING gin (search_vector)
+    """,
+    """
+    CREATE TRIGGER chat_message_search_vector_update
+        BEFORE INSERT OR UPDATE OF text ON chat_message
+        FOR EACH ROW EXECUTE FUNCTION
+        tsvector_update_trigger(search_vector, 'pg_catalog.simple', text)
+    """,
+    """
+    UPDATE chat_message
+        SET search_vector = to_tsvector('pg_catalog.simple', coalesce(text, ''))
+        WHERE text <> ''
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    "DROP TRIGGER IF EXISTS chat_message_search_vector_update ON chat_message",
+    "DROP INDEX IF EXISTS chat_message_search_gin",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for sql in CREATE_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for sql in DROP_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_chat_media_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
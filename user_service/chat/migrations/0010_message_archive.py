@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0009_message_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="archived_through",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ArchivedMessageChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("first_created_at", models.DateTimeField()),
+                ("last_created_at", models.DateTimeField()),
+                ("message_count", models.PositiveIntegerField()),
+                ("payload", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_chunks",
+                        to="chat.chatroom",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["room", "-last_created_at"],
+                        name="chat_archiv_room_id_ab44b2_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0010_message_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="call",
+            name="accepted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="call",
+            name="duration_sec",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="call",
+            name="end_reason",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("ended", "Ended"),
+                    ("missed", "Missed"),
+                    ("dropped", "Dropped"),
+                ],
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="call",
+            name="ended_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="call",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
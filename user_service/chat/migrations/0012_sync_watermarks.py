@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:33
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    # existing rows: nothing changed after they were written
+    apps.get_model("chat", "Message").objects.update(updated_at=F("created_at"))
+    apps.get_model("chat", "ChatRoom").objects.update(
+        updated_at=Coalesce(F("last_message_at"), F("created_at"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0011_call_lifecycle"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="chatroom",
+            index=models.Index(
+                fields=["user_id", "updated_at"], name="chat_chatro_user_id_1468b9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chatroom",
+            index=models.Index(
+                fields=["trainer_user_id", "updated_at"],
+                name="chat_chatro_trainer_186ca2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["room", "updated_at"], name="chat_messag_room_id_ff1851_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0012_sync_watermarks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="client_id",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="message",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("client_id__isnull", False)),
+                fields=("sender_user_id", "client_id"),
+                name="message_sender_client_id_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0013_message_client_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["created_at", "room"], name="chat_msg_created_room_idx"),
+        ),
+    ]
@@ -1,6 +1,9 @@
 import uuid
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -13,9 +16,25 @@ class ChatRoom(models.Model):
 
     # helps chat list ordering without heavy queries
     last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=120, blank=True)
+
+    # denormalized unread counters (one per participant)
+    user_unread_count = models.PositiveIntegerField(default=0)
+    trainer_unread_count = models.PositiveIntegerField(default=0)
+
+    # read cursors: everything created at or before this is read
+    user_last_read_at = models.DateTimeField(null=True, blank=True)
+    trainer_last_read_at = models.DateTimeField(null=True, blank=True)
+
+    # hot/cold boundary: messages at or before this live in
+    # ArchivedMessageChunk, not in the Message table
+    archived_through = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # delta sync watermark: queryset .update() calls must set it too
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -23,6 +42,15 @@ class ChatRoom(models.Model):
                 name="unique_user_trainer_chatroom",
             )
         ]
+        indexes = [
+            # room list: WHERE user_id / trainer_user_id = ? AND is_active
+            # ORDER BY last_message_at DESC
+            models.Index(fields=["user_id", "is_active", "-last_message_at"]),
+            models.Index(fields=["trainer_user_id", "is_active", "-last_message_at"]),
+            # delta sync: rooms changed since a cursor
+            models.Index(fields=["user_id", "updated_at"]),
+            models.Index(fields=["trainer_user_id", "updated_at"]),
+        ]
 
     def __str__(self):
         return f"ChatRoom({self.user_id} ↔ {self.trainer_user_id})"
@@ -39,6 +67,27 @@ class ChatRoom(models.Model):
 
         raise ValueError("User is not a participant of this room")
 
+    def participant_role(self, user_id):
+        if str(user_id) == str(self.user_id):
+            return "user"
+
+        if str(user_id) == str(self.trainer_user_id):
+            return "trainer"
+
+        raise ValueError("User is not a participant of this room")
+
+    def unread_field_for(self, user_id):
+        """
+        Name of the unread counter owned by this participant.
+        """
+        return f"{self.participant_role(user_id)}_unread_count"
+
+    def read_cursor_field_for(self, user_id):
+        """
+        Name of the read cursor owned by this participant.
+        """
+        return f"{self.participant_role(user_id)}_last_read_at"
+
 
 class Message(models.Model):
     TEXT = "text"
@@ -75,6 +124,10 @@ class Message(models.Model):
         choices=SENDER_CHOICES,
     )
 
+    # idempotency key chosen by the sending client (socket sends):
+    # unique per sender, never trusted as the primary key
+    client_id = models.UUIDField(null=True, blank=True)
+
     type = models.CharField(
         max_length=10,
         choices=TYPE_CHOICES,
@@ -95,21 +148,147 @@ class Message(models.Model):
     # for audio messages
     duration_sec = models.PositiveIntegerField(null=True, blank=True)
 
+    # content hash (dedupe) + preview produced by the media worker
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    thumbnail = models.FileField(
+        upload_to="chat_media/thumbs/",
+        null=True,
+        blank=True,
+    )
+
+    # chunked uploads stay hidden until the media worker finishes
+    is_ready = models.BooleanField(default=True)
+
+    # maintained by a Postgres trigger on INSERT / UPDATE OF text
+    # (GIN index + trigger live in migration 0009, Postgres only)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # read / delete control
+    # read_at is legacy: read state now lives on ChatRoom read cursors
     read_at = models.DateTimeField(null=True, blank=True)
     is_deleted = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # delta sync watermark: insert time, bumped on every later change
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["room", "created_at"]),
+            models.Index(fields=["room", "updated_at"]),
+            # archiver: rooms with messages older than the hot cutoff
+            models.Index(fields=["created_at", "room"], name="chat_msg_created_room_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sender_user_id", "client_id"],
+                condition=Q(client_id__isnull=False),
+                name="message_sender_client_id_uniq",
+            ),
         ]
 
     def __str__(self):
         return f"Message({self.type}) in {self.room_id}"
 
 
+class ArchivedMessageChunk(models.Model):
+    """
+    Cold storage: up to ARCHIVE_CHUNK_MESSAGES consecutive messages of one
+    room, zlib-compressed JSON, oldest first. Written by the archive job.
+    """
+
+    room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name="archived_chunks",
+    )
+
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField()
+
+    payload = models.BinaryField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # history read-through: newest chunks older than a cursor
+            models.Index(fields=["room", "-last_created_at"]),
+        ]
+
+    def __str__(self):
+        return f"ArchivedMessageChunk({self.room_id}) x{self.message_count}"
+
+
+class MediaUpload(models.Model):
+    """
+    Resumable chunked upload: bytes are appended to a partial file,
+    the Message is created once the last chunk lands.
+    """
+
+    STATUS_UPLOADING = "uploading"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, "Uploading"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name="uploads",
+    )
+    uploader_user_id = models.UUIDField()
+
+    type = models.CharField(max_length=10, choices=Message.TYPE_CHOICES)
+    text = models.TextField(blank=True)
+    file_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=50, blank=True)
+
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+    )
+    message = models.OneToOneField(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="upload",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # resume lookup: same uploader re-sends the same file
+            models.Index(fields=["uploader_user_id", "sha256", "status"]),
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"MediaUpload({self.file_name}) {self.received_bytes}/{self.total_size}"
+
+    @property
+    def partial_name(self):
+        return f"chat_media/partial/{self.id}.part"
+
+
 
 class Call(models.Model):
     STATUS_RINGING = "ringing"
@@ -130,6 +309,18 @@ class Call(models.Model):
         (CALLER_TRAINER, "Trainer"),
     ]
 
+    # live state is in Redis (chat.helper.call_state); the row is
+    # written once, when the call ends
+    END_ENDED = "ended"
+    END_MISSED = "missed"  # never answered
+    END_DROPPED = "dropped"  # heartbeats stopped
+
+    END_REASON_CHOICES = [
+        (END_ENDED, "Ended"),
+        (END_MISSED, "Missed"),
+        (END_DROPPED, "Dropped"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     room = models.ForeignKey(
@@ -151,7 +342,17 @@ class Call(models.Model):
         default=STATUS_RINGING,
     )
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    end_reason = models.CharField(
+        max_length=10,
+        choices=END_REASON_CHOICES,
+        blank=True,
+    )
+
+    # set from the ring time, not the row insert
+    created_at = models.DateTimeField(default=timezone.now)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    duration_sec = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
@@ -1,7 +1,17 @@
-from rest_framework.pagination import CursorPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class ChatMessageCursorPagination(CursorPagination):
     page_size = 20
     ordering = "-created_at"  # newest first
     cursor_query_param = "cursor"
+
+    # history past the hot boundary (see helper/message_archive.py)
+    archive_cursor_query_param = "archive_cursor"
+
+
+class ChatSearchPagination(PageNumberPagination):
+    # ranked results → page numbers, not cursors
+    page_size = 20
+    max_page_size = 50
+    page_size_query_param = "page_size"
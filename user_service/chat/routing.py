@@ -1,7 +1,14 @@
 from django.urls import re_path
 from .consumers import ChatConsumer, CallConsumer, UserCallConsumer
+from .stream_consumer import StreamConsumer
 
 websocket_urlpatterns = [
+    # 🔀 ONE multiplexed socket per client (chat + calls + user events)
+    re_path(
+        r"^ws/stream/$",
+        StreamConsumer.as_asgi(),
+    ),
+
     # Chat
     re_path(
         r"^ws/chat/(?P<room_id>[0-9a-f-]+)/$",
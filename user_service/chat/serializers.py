@@ -1,4 +1,6 @@
 # chat/serializers.py
+from chat.helper.media_store import MAX_UPLOAD_SIZE
+from chat.helper.room_state import recipient_read_cursor
 from chat.models import Message
 from rest_framework import serializers
 
@@ -34,6 +36,8 @@ class UserMessageCreateSerializer(serializers.Serializer):
 
 class MessageSerializer(serializers.ModelSerializer):
     file = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -45,15 +49,48 @@ class MessageSerializer(serializers.ModelSerializer):
             "type",
             "text",
             "file",
+            "thumbnail",
             "duration_sec",
             "read_at",
             "created_at",
         ]
 
-    def get_file(self, obj):
-        if not obj.file:
+    def _url(self, field):
+        if not field:
             return None
 
         request = self.context.get("request")
-        return request.build_absolute_uri(obj.file.url) if request else obj.file.url
+        return request.build_absolute_uri(field.url) if request else field.url
+
+    def get_file(self, obj):
+        return self._url(obj.file)
+
+    def get_thumbnail(self, obj):
+        return self._url(obj.thumbnail)
+
+    def get_read_at(self, obj):
+        # read receipts come from the recipient's room cursor
+        room = self.context.get("room")
+        if room is None:
+            return None
+
+        cursor = recipient_read_cursor(room, obj)
+        if cursor is None or cursor < obj.created_at:
+            return None
+
+        return serializers.DateTimeField().to_representation(cursor)
+
+
+class MediaUploadCreateSerializer(serializers.Serializer):
+    room_id = serializers.UUIDField()
+    type = serializers.ChoiceField(
+        choices=[Message.IMAGE, Message.AUDIO, Message.VIDEO]
+    )
+    file_name = serializers.CharField(max_length=255)
+    mime_type = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    total_size = serializers.IntegerField(min_value=1, max_value=MAX_UPLOAD_SIZE)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$")
+    text = serializers.CharField(required=False, allow_blank=True)
 
+    def validate_sha256(self, value):
+        return value.lower()
@@ -0,0 +1,260 @@
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .consumers import CallRelayMixin, ChatSendMixin, call_heartbeat, get_allowed_room
+from .helper import call_state
+from .helper.outbound_queue import OutboundQueueMixin
+from .helper.signal_relay import trace_delivery
+
+# per socket; a client rarely needs more than a few rooms + one call
+MAX_SUBSCRIPTIONS = 50
+
+
+class StreamConsumer(OutboundQueueMixin, CallRelayMixin, ChatSendMixin, AsyncWebsocketConsumer):
+    """
+    ONE authenticated socket per client (ws/stream/), multiplexing:
+      - user events (incoming calls), always on
+      - chat rooms   {"type": "subscribe", "channel": "chat", "room_id": ...}
+      - call signals {"type": "subscribe", "channel": "call", "call_id": ...}
+
+    Client → server:
+      {"type": "unsubscribe", "channel": ..., "room_id" | "call_id": ...}
+      {"type": "send", "room_id": ..., "client_id": ..., "text": ...}
+      {"type": "signal", "call_id": ..., "data": {...}}
+      {"type": "heartbeat", "call_id": ...}   (optional: a call subscription
+                                               already keeps the call alive)
+
+    Every server frame carries "channel" so the client can route it,
+    except {"type": "resync"} sent right before a backpressure close.
+    """
+
+    outbound_kind = "stream"
+
+    async def connect(self):
+        user = self.scope.get("user")
+
+        if not user or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.user_id = uuid.UUID(str(user.id))
+        self.user_group = f"user_{self.user_id}"
+
+        # group name → room membership (chat) or call id (call)
+        self.rooms = {}
+        self.calls = set()
+
+        await self.channel_layer.group_add(self.user_group, self.channel_name)
+        await self.accept()
+        self.start_outbound()
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, "user_group"):
+            return
+
+        await self.finish_chat_sends()
+        await self.stop_outbound()
+
+        groups = [self.user_group]
+        groups += [f"chat_{room_id}" for room_id in self.rooms]
+
+        for group in groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+        for call_id in self.calls:
+            await self.leave_call_relay(call_id)
+
+    # -------------------------------------------------
+    # CLIENT → SERVER
+    # -------------------------------------------------
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "")
+        except ValueError:
+            await self._send_error("Invalid JSON")
+            return
+
+        if not isinstance(data, dict):
+            await self._send_error("Unsupported message type")
+            return
+
+        handler = {
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+            "send": self._send_chat,
+            "signal": self._signal,
+            "heartbeat": self._heartbeat,
+        }.get(data.get("type"))
+
+        if handler is None:
+            await self._send_error("Unsupported message type")
+            return
+
+        await handler(data)
+
+    async def _subscribe(self, data):
+        channel = data.get("channel")
+
+        if len(self.rooms) + len(self.calls) >= MAX_SUBSCRIPTIONS:
+            await self._send_error("Too many subscriptions", channel=channel)
+            return
+
+        if channel == "chat":
+            room = await get_allowed_room(data.get("room_id"), self.user_id)
+            if room is None:
+                await self._send_error("Forbidden", channel="chat", room_id=data.get("room_id"))
+                return
+
+            room_id = str(room.id)
+            if room_id not in self.rooms:
+                await self.channel_layer.group_add(f"chat_{room_id}", self.channel_name)
+            self.rooms[room_id] = room
+
+            await self._send_frame({"type": "subscribed", "channel": "chat", "room_id": room_id})
+            return
+
+        if channel == "call":
+            call_id = await self._get_allowed_call(data.get("call_id"))
+            if call_id is None:
+                await self._send_error("Forbidden", channel="call", call_id=data.get("call_id"))
+                return
+
+            if call_id not in self.calls:
+                await self.join_call_relay(call_id)
+                self.calls.add(call_id)
+
+            await self._send_frame({"type": "subscribed", "channel": "call", "call_id": call_id})
+            return
+
+        await self._send_error("Unknown channel", channel=channel)
+
+    async def _unsubscribe(self, data):
+        channel = data.get("channel")
+
+        if channel == "chat":
+            room_id = str(data.get("room_id"))
+            if self.rooms.pop(room_id, None) is not None:
+                await self.channel_layer.group_discard(f"chat_{room_id}", self.channel_name)
+
+            await self._send_frame({"type": "unsubscribed", "channel": "chat", "room_id": room_id})
+            return
+
+        if channel == "call":
+            call_id = str(data.get("call_id"))
+            if call_id in self.calls:
+                self.calls.discard(call_id)
+                await self.leave_call_relay(call_id)
+
+            await self._send_frame({"type": "unsubscribed", "channel": "call", "call_id": call_id})
+            return
+
+        await self._send_error("Unknown channel", channel=channel)
+
+    async def on_room_closed(self, room_id):
+        room_id = str(room_id)
+        if self.rooms.pop(room_id, None) is not None:
+            await self.channel_layer.group_discard(f"chat_{room_id}", self.channel_name)
+            await self._send_frame({"type": "unsubscribed", "channel": "chat", "room_id": room_id})
+
+    async def _send_chat(self, data):
+        room_id = str(data.get("room_id"))
+        room = self.rooms.get(room_id)
+
+        if room is None:
+            await self._send_error("Not subscribed", channel="chat", room_id=room_id)
+            return
+
+        await self.send_chat_text(room, data, channel="chat", room_id=room_id)
+
+    async def _signal(self, data):
+        call_id = str(data.get("call_id"))
+        payload = data.get("data")
+
+        if call_id not in self.calls:
+            await self._send_error("Not subscribed", channel="call", call_id=call_id)
+            return
+
+        if not isinstance(payload, dict) or "type" not in payload:
+            await self._send_error("Invalid signal", channel="call", call_id=call_id)
+            return
+
+        # same relay as CallConsumer → both kinds of socket interoperate
+        if not await self.relay_signal(call_id, payload):
+            await self._send_error("Rate limit exceeded", channel="call", call_id=call_id)
+
+    async def _heartbeat(self, data):
+        call_id = str(data.get("call_id"))
+
+        if call_id not in self.calls:
+            await self._send_error("Not subscribed", channel="call", call_id=call_id)
+            return
+
+        active = await call_heartbeat(call_id, self.user_id)
+
+        await self._send_frame(
+            {"type": "heartbeat", "channel": "call", "call_id": call_id, "active": active}
+        )
+
+    # -------------------------------------------------
+    # GROUP EVENTS → CLIENT (bounded outbound queue)
+    # -------------------------------------------------
+    async def chat_message(self, event):
+        # pre-encoded payload spliced in as-is
+        self.enqueue_frame(
+            '{"channel":"chat","type":"message","payload":' + event["payload_json"] + "}"
+        )
+
+    async def chat_read(self, event):
+        payload = event["payload"]
+        self.enqueue_frame(
+            json.dumps({"channel": "chat", "type": "read", "payload": payload}),
+            key=("read", payload.get("room_id"), payload.get("reader_id")),
+            critical=False,
+        )
+
+    async def user_call_event(self, event):
+        call_id = event["payload"].get("call_id")
+        self.enqueue_frame(
+            json.dumps({"channel": "user", "type": "event", "payload": event["payload"]}),
+            key=("call", call_id) if call_id else None,
+        )
+
+    async def call_event(self, event):
+        if event.get("sender") == self.channel_name:
+            return
+
+        trace_delivery(event, "stream")
+        self.enqueue_frame(
+            json.dumps(
+                {
+                    "channel": "call",
+                    "type": "signal",
+                    "call_id": event.get("call_id"),
+                    "payload": event["payload"],
+                }
+            )
+        )
+
+    async def _send_frame(self, frame):
+        await self.send(text_data=json.dumps(frame))
+
+    @sync_to_async
+    def _get_allowed_call(self, call_id):
+        try:
+            call_id = str(uuid.UUID(str(call_id)))
+        except ValueError:
+            return None
+
+        # only live calls (ringing / active) can be signalled
+        try:
+            state = call_state.get_call(call_id)
+        except call_state.CallStateUnavailable:
+            return None
+
+        if not state or str(self.user_id) not in (state["caller_id"], state["callee_id"]):
+            return None
+
+        return call_id
@@ -0,0 +1,209 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .helper import call_state
+from .helper.media_probe import make_thumbnail, probe_media
+from .helper.message_archive import (
+    HOT_RETENTION,
+    archive_room_chunk,
+    rooms_with_cold_messages,
+)
+from .helper.media_store import (
+    content_name,
+    discard_partial,
+    partial_sha256,
+    promote_partial,
+)
+from .helper.message_events import notify_message_recipient
+from .helper.room_state import record_new_message
+from .models import Call, MediaUpload
+from .ws_notify import notify_new_message
+
+logger = logging.getLogger(__name__)
+
+# abandoned partial uploads are dropped after this
+STALE_UPLOAD_AGE = timedelta(hours=24)
+
+
+def _fail_upload(upload, msg):
+    with transaction.atomic():
+        upload.status = MediaUpload.STATUS_FAILED
+        upload.message = None
+        upload.save(update_fields=["status", "message", "updated_at"])
+        msg.delete()
+
+
+# -------------------------------------------------
+# MEDIA PIPELINE (after the last chunk is committed)
+# verify hash → store → metadata / thumbnail → announce
+# -------------------------------------------------
+@shared_task(
+    bind=True,
+    autoretry_for=(OSError,),
+    retry_backoff=5,
+    retry_kwargs={"max_retries": 3},
+)
+def process_chat_media(self, upload_id):
+    upload = (
+        MediaUpload.objects.select_related("message", "room")
+        .filter(id=upload_id, status=MediaUpload.STATUS_PROCESSING)
+        .first()
+    )
+
+    # already processed (duplicate delivery) or gone
+    if upload is None or upload.message is None:
+        return
+
+    msg = upload.message
+
+    # a retry after the move finds the content file instead of the partial
+    if default_storage.exists(upload.partial_name):
+        if partial_sha256(upload) != upload.sha256:
+            logger.warning("Upload %s failed hash check", upload_id)
+            discard_partial(upload)
+            _fail_upload(upload, msg)
+            return
+
+        name = promote_partial(upload)
+    else:
+        name = content_name(upload.sha256, upload.file_name)
+        if not default_storage.exists(name):
+            logger.warning("Upload %s lost its partial file", upload_id)
+            _fail_upload(upload, msg)
+            return
+
+    path = default_storage.path(name)
+
+    meta = probe_media(path, msg.type, upload.file_name)
+    thumb = make_thumbnail(path, msg.type)
+
+    msg.file.name = name
+    msg.mime_type = meta["mime_type"][:50] or upload.mime_type
+    msg.duration_sec = meta.get("duration_sec", msg.duration_sec)
+
+    if thumb:
+        thumb_name = f"chat_media/thumbs/{upload.sha256}.jpg"
+        if not default_storage.exists(thumb_name):
+            thumb_name = default_storage.save(thumb_name, ContentFile(thumb))
+        msg.thumbnail.name = thumb_name
+
+    room = upload.room
+
+    with transaction.atomic():
+        msg.is_ready = True
+        # hidden until now: it lands after whatever the reader has already
+        # seen, so read cursors / receipts never count it as read
+        msg.created_at = timezone.now()
+        msg.save(
+            update_fields=[
+                "file",
+                "mime_type",
+                "duration_sec",
+                "thumbnail",
+                "is_ready",
+                "created_at",
+                "updated_at",
+            ]
+        )
+
+        upload.status = MediaUpload.STATUS_DONE
+        upload.save(update_fields=["status", "updated_at"])
+
+        record_new_message(room, msg)
+        notify_message_recipient(room, msg)
+
+        # the message becomes visible only now
+        transaction.on_commit(lambda: notify_new_message(room.id, msg))
+
+
+@shared_task
+def purge_stale_uploads():
+    cutoff = timezone.now() - STALE_UPLOAD_AGE
+
+    stale = MediaUpload.objects.filter(
+        status=MediaUpload.STATUS_UPLOADING,
+        updated_at__lt=cutoff,
+    )
+
+    count = 0
+    for upload in stale.iterator():
+        discard_partial(upload)
+        upload.delete()
+        count += 1
+
+    if count:
+        logger.info("Purged %d stale chat uploads", count)
+
+
+# -------------------------------------------------
+# HOT → COLD ARCHIVE (bounded work per run)
+# -------------------------------------------------
+MAX_ARCHIVE_CHUNKS_PER_RUN = 200
+
+
+@shared_task
+def archive_old_messages():
+    cutoff = timezone.now() - HOT_RETENTION
+
+    chunks = moved = 0
+
+    for room_id in rooms_with_cold_messages(cutoff).iterator():
+        while chunks < MAX_ARCHIVE_CHUNKS_PER_RUN:
+            count = archive_room_chunk(room_id, cutoff)
+            if not count:
+                break
+            chunks += 1
+            moved += count
+
+        if chunks >= MAX_ARCHIVE_CHUNKS_PER_RUN:
+            break
+
+    if moved:
+        logger.info("Archived %d chat messages in %d chunks", moved, chunks)
+
+
+# -------------------------------------------------
+# CALL TIMEOUTS (state in Redis, see helper/call_state)
+# -------------------------------------------------
+@shared_task
+def expire_ringing_call(call_id):
+    # no-op when the call was accepted / ended meanwhile
+    state = call_state.end_call(
+        call_id,
+        only_status=call_state.STATUS_RINGING,
+        only_if_expired=True,
+    )
+    if state:
+        call_state.finish_call(state, Call.END_MISSED)
+
+
+@shared_task
+def sweep_call_deadlines():
+    """
+    Backstop for lost countdown tasks, and the only place active
+    calls without heartbeats are dropped (a connected call socket
+    counts as one, see CallRelayMixin).
+    """
+    ended = 0
+
+    for call_id in call_state.expired_call_ids():
+        state = call_state.end_call(call_id, only_if_expired=True)
+        if not state:
+            continue
+
+        reason = (
+            Call.END_MISSED
+            if state["status"] == call_state.STATUS_RINGING
+            else Call.END_DROPPED
+        )
+        call_state.finish_call(state, reason)
+        ended += 1
+
+    if ended:
+        logger.info("Timed out %d calls", ended)
@@ -1,5 +1,8 @@
 from chat.views import (
     ChatHistoryView,
+    ChatSearchView,
+    ChatSyncView,
+    MarkRoomReadView,
     SendMediaMessageView,
     SendTextMessageView,
     UserChatRoomListView,
@@ -7,16 +10,31 @@ from chat.views import (
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path
+from .metrics_view import WebSocketMetricsView
+from .media_upload_view import (
+    MediaUploadChunkView, MediaUploadCreateView, MediaUploadStatusView,
+)
 from .user_trainer_vcall_view import (
-    AcceptCallView, EndCallView, StartCallView,
+    AcceptCallView, CallHeartbeatView, EndCallView, StartCallView,
 )
 
 urlpatterns = [
     path("rooms/", UserChatRoomListView.as_view()),
     path("rooms/<uuid:room_id>/messages/", ChatHistoryView.as_view()),
+    path("rooms/<uuid:room_id>/read/", MarkRoomReadView.as_view()),
+    path("search/", ChatSearchView.as_view()),
+    path("sync/", ChatSyncView.as_view()),
     path("send/text/", SendTextMessageView.as_view()),
     path("send/media/", SendMediaMessageView.as_view()),
 
+    # WebSocket outbound queue metrics (Prometheus)
+    path("metrics/ws/", WebSocketMetricsView.as_view()),
+
+    # resumable chunked media upload
+    path("uploads/", MediaUploadCreateView.as_view()),
+    path("uploads/<uuid:upload_id>/", MediaUploadStatusView.as_view()),
+    path("uploads/<uuid:upload_id>/chunk/", MediaUploadChunkView.as_view()),
+
     path(
         "calls/start/<uuid:room_id>/",
         StartCallView.as_view(),
@@ -36,6 +54,13 @@ urlpatterns = [
         EndCallView.as_view(),
         name="end-call",
     ),
+
+    # keep an active call alive (missed heartbeats → dropped)
+    path(
+        "calls/<uuid:call_id>/heartbeat/",
+        CallHeartbeatView.as_view(),
+        name="call-heartbeat",
+    ),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
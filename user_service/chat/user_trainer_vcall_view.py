@@ -1,21 +1,41 @@
-from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.shortcuts import get_object_or_404
 
-from chat.models import ChatRoom, Call
+from chat.models import Call
+from .helper import call_state
+from .helper.call_state import CallStateUnavailable, finish_call
+from .helper.room_membership import get_room_membership
 from .call_events import emit_user_call_event, emit_call_event
-from user_app.tasks import emit_webhook
-from user_app.tasks import send_user_notification
+from user_app.helper import outbox
 import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CallStateView(APIView):
+    """
+    Call transitions run as Redis scripts (chat.helper.call_state);
+    without Redis there is no call signalling → 503.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def handle_exception(self, exc):
+        if isinstance(exc, CallStateUnavailable):
+            return Response(
+                {"detail": "Calls are temporarily unavailable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return super().handle_exception(exc)
+
 
 # ===========================
 # START CALL
 # ===========================
-class StartCallView(APIView):
-    permission_classes = [IsAuthenticated]
+class StartCallView(CallStateView):
 
     def post(self, request, room_id):
         # ✅ normalize user id (SAME AS CHAT)
@@ -27,16 +47,21 @@ class StartCallView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        room = get_object_or_404(ChatRoom, id=room_id, is_active=True)
+        # cached membership → no DB hit on the signalling path
+        room = get_room_membership(room_id)
+        if room is None or not room.is_active:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # ✅ permission check (UUID vs UUID)
-        if user_uuid not in (room.user_id, room.trainer_user_id):
+        if not room.has_participant(user_uuid):
             return Response(
                 {"detail": "Forbidden"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        target_user_id = room.other_participant_id(user_uuid)
+        target_user_id = (
+            room.trainer_user_id if user_uuid == room.user_id else room.user_id
+        )
 
         # 🚫 prevent self-call
         if target_user_id == user_uuid:
@@ -45,12 +70,6 @@ class StartCallView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 🔥 cleanup stale ringing calls
-        Call.objects.filter(
-            room=room,
-            status=Call.STATUS_RINGING,
-        ).update(status=Call.STATUS_ENDED)
-
         # ✅ determine caller role (UUID-safe)
         caller_role = (
             Call.CALLER_USER
@@ -58,55 +77,73 @@ class StartCallView(APIView):
             else Call.CALLER_TRAINER
         )
 
-        # ✅ create call (DB FIRST)
-        call = Call.objects.create(
-            room=room,
-            started_by=user_uuid,
-            caller_role=caller_role,
-            status=Call.STATUS_RINGING,
+        call_id = uuid.uuid4()
+
+        # ✅ atomic: replaces a ringing call, refuses over an active one
+        started, detail = call_state.start_call(
+            call_id, room.id, user_uuid, target_user_id, caller_role
+        )
+        if not started:
+            return Response(
+                {"detail": "A call is already in progress"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if detail:
+            replaced = call_state.end_call(detail, only_status=call_state.STATUS_RINGING)
+            if replaced:
+                finish_call(replaced, Call.END_MISSED)
+
+        # 🔔 WS notify callee
+        emit_user_call_event(
+            target_user_id,
+            {
+                "type": "INCOMING_CALL",
+                "call_id": str(call_id),
+                "room_id": str(room.id),
+                "from_user": str(user_uuid),
+            },
         )
 
-        def on_commit_actions():
-            # 🔔 WS notify callee
-            emit_user_call_event(
-                target_user_id,
-                {
-                    "type": "INCOMING_CALL",
-                    "call_id": str(call.id),
+        # 🔔 PUSH → trainer ONLY when USER starts call
+        if caller_role == Call.CALLER_USER:
+            push = outbox.trainer_event(
+                event="INCOMING_CALL",
+                payload={
+                    "trainer_user_id": str(room.trainer_user_id),
+                    "call_id": str(call_id),
                     "room_id": str(room.id),
-                    "from_user": str(call.started_by),
                 },
             )
-
-            # 🔔 PUSH → trainer ONLY when USER starts call
-            if call.caller_role == Call.CALLER_USER:
-                emit_webhook.delay(
-                    event="INCOMING_CALL",
-                    payload={
-                        "trainer_user_id": str(room.trainer_user_id),
-                        "call_id": str(call.id),
-                        "room_id": str(room.id),
-                    },
-                )
-            else:
-                # 🔔 Trainer → User (user push)
-                send_user_notification.delay(
-                    user_id=str(room.user_id),
-                    title="Incoming Call 📞",
-                    body="Your trainer is calling you",
-                    data={
+        else:
+            # 🔔 Trainer → User (user push, never coalesced)
+            push = outbox.task(
+                "user_app.tasks.send_user_notification",
+                kwargs={
+                    "user_id": str(room.user_id),
+                    "title": "Incoming Call 📞",
+                    "body": "Your trainer is calling you",
+                    "data": {
                         "type": "INCOMING_CALL",
-                        "call_id": str(call.id),
+                        "call_id": str(call_id),
                     },
-                )
+                },
+            )
+
+        # ⏰ unanswered → CALL_MISSED (beat sweeper is the backstop)
+        expire = outbox.task(
+            "chat.tasks.expire_ringing_call",
+            kwargs={"call_id": str(call_id)},
+            countdown=call_state.RING_TIMEOUT_SEC,
+        )
 
-        # ✅ same commit pattern as chat
-        transaction.on_commit(on_commit_actions)
+        # one insert instead of two broker round trips in the request
+        outbox.add(push, expire)
 
         return Response(
             {
-                "call_id": str(call.id),
-                "status": call.status,
+                "call_id": str(call_id),
+                "status": Call.STATUS_RINGING,
             },
             status=status.HTTP_201_CREATED,
         )
@@ -114,105 +151,85 @@ class StartCallView(APIView):
 # ===========================
 # ACCEPT CALL
 # ===========================
+class AcceptCallView(CallStateView):
 
-import logging
-
-logger = logging.getLogger(__name__)
-
-class AcceptCallView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    @transaction.atomic
     def post(self, request, call_id):
-        call = get_object_or_404(Call, id=call_id)
-
         user_id = str(request.user.id)
-        caller_id = str(call.started_by)
-        room = call.room
 
-        if str(room.user_id) == caller_id:
-            receiver_id = str(room.trainer_user_id)
-        else:
-            receiver_id = str(room.user_id)
+        accepted, detail = call_state.accept_call(call_id, user_id)
 
-        logger.warning("🔍 ACCEPT CALL DEBUG")
-        logger.warning(" - request.user.id = %s", user_id)
-        logger.warning(" - caller_id = %s", caller_id)
-        logger.warning(" - receiver_id = %s", receiver_id)
+        if not accepted:
+            if detail == "gone":
+                return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        if user_id != receiver_id:
-            return Response(
-                {"detail": "Only the called user can accept this call"},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+            if detail == "forbidden":
+                return Response(
+                    {"detail": "Only the called user can accept this call"},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
 
-        if call.status != Call.STATUS_RINGING:
             return Response(
                 {"detail": "Call not ringing"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        call.status = Call.STATUS_ACTIVE
-        call.save(update_fields=["status"])
+        caller_id = detail
 
         emit_user_call_event(caller_id, {
             "type": "CALL_ACCEPTED",
-            "call_id": str(call.id),
+            "call_id": str(call_id),
         })
-        emit_user_call_event(receiver_id, {
+        emit_user_call_event(user_id, {
             "type": "CALL_ACCEPTED",
-            "call_id": str(call.id),
+            "call_id": str(call_id),
         })
-        emit_call_event(call.id, {
+        emit_call_event(call_id, {
             "type": "CALL_ACCEPTED",
-            "call_id": str(call.id),
+            "call_id": str(call_id),
         })
 
-        return Response({"status": "active"})
+        return Response({
+            "status": Call.STATUS_ACTIVE,
+            "heartbeat_timeout_sec": call_state.HEARTBEAT_TIMEOUT_SEC,
+        })
 
 # ===========================
 # END CALL
 # ===========================
-class EndCallView(APIView):
-    permission_classes = [IsAuthenticated]
+class EndCallView(CallStateView):
 
-    @transaction.atomic
     def post(self, request, call_id):
-        call = get_object_or_404(Call, id=call_id)
+        state = call_state.end_call(call_id, request.user.id)
 
-        logger.warning("🔍 END CALL DEBUG")
-        logger.warning(" - request.user.id = %s", request.user.id)
-        logger.warning(" - call.started_by = %s", call.started_by)
-        logger.warning(" - room.user_id = %s", call.room.user_id)
-        logger.warning(" - room.trainer_user_id = %s", call.room.trainer_user_id)
+        if state is None:
+            if Call.objects.filter(id=call_id).exists():
+                return Response({"status": "already ended"}, status=200)
 
-        participants = {
-            str(call.started_by),
-            str(call.room.user_id),
-            str(call.room.trainer_user_id),
-        }
+            if call_state.get_call(call_id):
+                return Response(
+                    {"detail": "Not allowed"},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
 
-        if str(request.user.id) not in participants:
-            return Response(
-                {"detail": "Not allowed"},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        if call.status == Call.STATUS_ENDED:
-            return Response({"status": "already ended"}, status=200)
+        finish_call(state, Call.END_ENDED)
 
-        call.status = Call.STATUS_ENDED
-        call.save(update_fields=["status"])
+        return Response({"status": "ended"}, status=200)
 
-        for uid in participants:
-            emit_user_call_event(uid, {
-                "type": "CALL_ENDED",
-                "call_id": str(call.id),
-            })
+# ===========================
+# HEARTBEAT (active calls only)
+# ===========================
+class CallHeartbeatView(CallStateView):
 
-        emit_call_event(call.id, {
-            "type": "CALL_ENDED",
-            "call_id": str(call.id),
-        })
+    def post(self, request, call_id):
+        if not call_state.heartbeat(call_id, request.user.id):
+            return Response(
+                {"detail": "Call not active"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        return Response({"status": "ended"}, status=200)
\ No newline at end of file
+        return Response({
+            "status": Call.STATUS_ACTIVE,
+            "heartbeat_timeout_sec": call_state.HEARTBEAT_TIMEOUT_SEC,
+        })
@@ -3,22 +3,32 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import ListAPIView
+from django.http import HttpResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
 from chat.models import ChatRoom, Message
 from chat.serializers import UserMessageCreateSerializer, MessageSerializer
-from chat.pagination import ChatMessageCursorPagination
-from chat.ws_notify import notify_new_message
+from chat.pagination import ChatMessageCursorPagination, ChatSearchPagination
+from chat.ws_notify import notify_new_message, notify_room_read
 import uuid
 
-from user_app.tasks import emit_webhook
+from .helper.chat_sync import decode_sync_cursor, sync_changes
+from .helper.message_encoder import encode, encode_message, message_dict
+from .helper.message_archive import (
+    decode_archive_cursor,
+    encode_archive_cursor,
+    read_archive,
+)
+from .helper.message_events import notify_message_recipient
+from .helper.message_search import search_messages
 from .helper.message_normalizer import normalize_for_ws
+from .helper.room_state import mark_room_read, record_new_message
 from django.db.models import Q
 from django.db import transaction
-from user_app.tasks import send_user_notification
+from django.utils import timezone
 
 # -------------------------------------------------
-# USER CHAT ROOM LIST (with has_unread)
+# USER CHAT ROOM LIST (denormalized unread counters)
 # -------------------------------------------------
 class UserChatRoomListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -26,6 +36,7 @@ class UserChatRoomListView(APIView):
     def get(self, request):
         user_id = str(request.user.id)
 
+        # ✅ single indexed query, no per-room unread lookups
         rooms = ChatRoom.objects.filter(
             Q(user_id=user_id) | Q(trainer_user_id=user_id),
             is_active=True,
@@ -34,12 +45,7 @@ class UserChatRoomListView(APIView):
         data = []
 
         for room in rooms:
-            has_unread = Message.objects.filter(
-                room=room,
-                read_at__isnull=True,
-            ).exclude(
-                sender_user_id=user_id
-            ).exists()
+            unread_count = getattr(room, room.unread_field_for(user_id))
 
             data.append(
                 {
@@ -47,8 +53,10 @@ class UserChatRoomListView(APIView):
                     "user_id": room.user_id,
                     "trainer_user_id": room.trainer_user_id,
                     "last_message_at": room.last_message_at,
+                    "last_message_preview": room.last_message_preview,
                     "created_at": room.created_at,
-                    "has_unread": has_unread,
+                    "unread_count": unread_count,
+                    "has_unread": unread_count > 0,
                 }
             )
 
@@ -56,37 +64,233 @@ class UserChatRoomListView(APIView):
 
 
 # -------------------------------------------------
-# CHAT HISTORY (AUTO MARK AS READ)
+# CHAT HISTORY (pure read, newest page advances read cursor)
 # -------------------------------------------------
 class ChatHistoryView(ListAPIView):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = ChatMessageCursorPagination
 
-    def get_queryset(self):
-        room = get_object_or_404(
-            ChatRoom,
-            id=self.kwargs["room_id"],
-        )
+    def get_room(self):
+        if not hasattr(self, "_room"):
+            self._room = get_object_or_404(
+                ChatRoom,
+                id=self.kwargs["room_id"],
+            )
+        return self._room
 
+    def is_participant(self, room):
         user_id = str(self.request.user.id)
 
         # 🔐 UUID-safe authorization
-        if user_id not in (str(room.user_id), str(room.trainer_user_id)):
-            return Message.objects.none()
+        return user_id in (str(room.user_id), str(room.trainer_user_id))
 
-        # ✅ AUTO MARK AS READ
-        Message.objects.filter(
-            room=room,
-            read_at__isnull=True,
-        ).exclude(
-            sender_user_id=user_id
-        ).update(read_at=now())
+    def get_queryset(self):
+        room = self.get_room()
+
+        if not self.is_participant(room):
+            return Message.objects.none()
 
         return Message.objects.filter(
             room=room,
             is_deleted=False,
-        ).order_by("created_at")
+            is_ready=True,
+        ).defer("search_vector").order_by("created_at")
+
+    def list(self, request, *args, **kwargs):
+        room = self.get_room()
+
+        # ❄️ past the hot boundary: page through archived chunks instead
+        if self.paginator.archive_cursor_query_param in request.query_params:
+            return self.archive_page(request, room)
+
+        # ✅ only the newest page marks read; older-page scrolls are pure reads
+        first_page = not request.query_params.get(self.paginator.cursor_query_param)
+
+        if first_page and self.is_participant(room):
+            cursor = mark_room_read(room, request.user.id)
+            if cursor:
+                notify_room_read(room.id, request.user.id, cursor)
+
+        page = self.paginate_queryset(self.get_queryset())
+
+        next_link = self.paginator.get_next_link()
+        if (
+            not self.paginator.has_next
+            and room.archived_through is not None
+            and self.is_participant(room)
+        ):
+            # hot table exhausted → the client keeps following "next"
+            next_link = self.archive_link(request, "")
+
+        # same encoder as the send path (no DRF field walk per message)
+        return HttpResponse(
+            encode(
+                {
+                    "next": next_link,
+                    "previous": self.paginator.get_previous_link(),
+                    "results": [
+                        message_dict(m, room=room, request=request) for m in page
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def archive_link(self, request, token):
+        url = remove_query_param(
+            request.build_absolute_uri(),
+            self.paginator.cursor_query_param,
+        )
+        return replace_query_param(url, self.paginator.archive_cursor_query_param, token)
+
+    def archive_page(self, request, room):
+        if not self.is_participant(room):
+            messages, has_more = [], False
+        else:
+            try:
+                cursor = decode_archive_cursor(
+                    request.query_params[self.paginator.archive_cursor_query_param]
+                )
+            except ValueError:
+                return Response(
+                    {"detail": "Invalid archive cursor"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            messages, has_more = read_archive(room, cursor, self.paginator.page_size)
+
+        return HttpResponse(
+            encode(
+                {
+                    "next": (
+                        self.archive_link(request, encode_archive_cursor(messages[-1]))
+                        if has_more
+                        else None
+                    ),
+                    "previous": None,
+                    "results": [
+                        message_dict(m, room=room, request=request) for m in messages
+                    ],
+                }
+            ),
+            content_type="application/json",
+        )
+
+
+# -------------------------------------------------
+# MESSAGE SEARCH (ranked, one room or all of the caller's rooms)
+# -------------------------------------------------
+class ChatSearchView(APIView):
+    """
+    Ranked full-text search over the caller's rooms (`q`, optional
+    `room_id`). Covers hot messages only: messages moved to the archive
+    (older than 90 days) are not searched; page through history for them.
+    """
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = ChatSearchPagination
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+
+        if not 2 <= len(query) <= 200:
+            return Response(
+                {"detail": "q must be 2-200 characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user_id = str(request.user.id)
+
+        # past conversations stay searchable after the room is closed
+        rooms = ChatRoom.objects.filter(Q(user_id=user_id) | Q(trainer_user_id=user_id))
+
+        room_id = request.query_params.get("room_id")
+        if room_id:
+            try:
+                rooms = rooms.filter(id=uuid.UUID(room_id))
+            except ValueError:
+                return Response(
+                    {"detail": "Invalid room_id"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        room_ids = list(rooms.values_list("id", flat=True))
+
+        if room_id and not room_ids:
+            return Response(
+                {"detail": "Forbidden"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(
+            search_messages(room_ids, query),
+            request,
+            view=self,
+        )
+
+        return HttpResponse(
+            encode(
+                {
+                    "count": paginator.page.paginator.count,
+                    "next": paginator.get_next_link(),
+                    "previous": paginator.get_previous_link(),
+                    "results": [message_dict(m, request=request) for m in page],
+                }
+            ),
+            content_type="application/json",
+        )
+
+
+# -------------------------------------------------
+# DELTA SYNC (app resume: one request for every room)
+# -------------------------------------------------
+class ChatSyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            cursor = decode_sync_cursor(request.query_params.get("since", ""))
+        except ValueError:
+            return Response(
+                {"detail": "Invalid since cursor"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # taken BEFORE reading, so nothing committed meanwhile is skipped
+        now = timezone.now()
+
+        return HttpResponse(
+            encode(sync_changes(request.user.id, cursor, now, request=request)),
+            content_type="application/json",
+        )
+
+
+# -------------------------------------------------
+# MARK ROOM READ (single-row cursor upsert)
+# -------------------------------------------------
+class MarkRoomReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, room_id):
+        room = get_object_or_404(ChatRoom, id=room_id)
+
+        user_id = str(request.user.id)
+        if user_id not in (str(room.user_id), str(room.trainer_user_id)):
+            return Response(
+                {"detail": "Forbidden"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        cursor = mark_room_read(room, user_id)
+        if cursor:
+            notify_room_read(room.id, user_id, cursor)
+
+        return Response(
+            {"last_read_at": getattr(room, room.read_cursor_field_for(user_id))},
+            status=status.HTTP_200_OK,
+        )
 
 
 # -------------------------------------------------
@@ -127,54 +331,36 @@ class SendTextMessageView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # ✅ CREATE ORM MESSAGE
-        msg = Message.objects.create(
-            room=room,
-            sender_user_id=user_uuid,
-            sender_role=(
-                Message.SENDER_USER
-                if user_uuid == room.user_id
-                else Message.SENDER_TRAINER
-            ),
-            type=Message.TEXT,
-            text=text,
-        )
+        # ✅ CREATE ORM MESSAGE + room counters in one transaction
+        with transaction.atomic():
+            msg = Message.objects.create(
+                room=room,
+                sender_user_id=user_uuid,
+                sender_role=(
+                    Message.SENDER_USER
+                    if user_uuid == room.user_id
+                    else Message.SENDER_TRAINER
+                ),
+                type=Message.TEXT,
+                text=text,
+            )
 
-        room.last_message_at = msg.created_at
-        room.save(update_fields=["last_message_at"])
-
-        def on_commit_actions():
-            # WS notify
-            notify_new_message(room.id, msg)
-
-            # 🔔 Notify trainer ONLY when user sends message
-            if msg.sender_role == Message.SENDER_USER:
-                emit_webhook.delay(
-                    event="NEW_CHAT_MESSAGE",
-                    payload={
-                        "trainer_user_id": str(room.trainer_user_id),
-                        "chat_room_id": str(room.id),
-                    },
-                )
-            else:
-                # 🔔 Trainer → User (user push)
-                send_user_notification.delay(
-                    user_id=str(room.user_id),
-                    title="New Message 💬",
-                    body="Your trainer sent you a message",
-                    data={
-                        "type": "NEW_CHAT_MESSAGE",
-                        "room_id": str(room.id),
-                    },
-                )
+            record_new_message(room, msg)
 
-        # ✅ Fire only after DB commit
-        transaction.on_commit(on_commit_actions)
+            # 🔔 push / trainer event to the other participant (outbox)
+            notify_message_recipient(room, msg)
+
+        # ✅ encode ONCE: same bytes for the HTTP body and the WS event
+        body = encode_message(msg)
+
+        # ✅ WS notify only after DB commit
+        transaction.on_commit(lambda: notify_new_message(room.id, msg, body))
 
         # ✅ HTTP RESPONSE
-        return Response(
-            MessageSerializer(msg).data,
+        return HttpResponse(
+            body,
             status=status.HTTP_201_CREATED,
+            content_type="application/json",
         )
 
 
@@ -212,57 +398,37 @@ class SendMediaMessageView(APIView):
         file = serializer.validated_data.get("file")
         msg_type = serializer.validated_data["type"]
 
-        msg = Message.objects.create(
-            room=room,
-            sender_user_id=user_uuid,
-            sender_role=(
-                Message.SENDER_USER
-                if user_uuid == room.user_id
-                else Message.SENDER_TRAINER
-            ),
-            type=msg_type,
-            text=serializer.validated_data.get("text", ""),
-            file=file,
-            duration_sec=serializer.validated_data.get("duration_sec"),
-            file_size=file.size if file else None,
-            mime_type=file.content_type if file else "",
-        )
+        with transaction.atomic():
+            msg = Message.objects.create(
+                room=room,
+                sender_user_id=user_uuid,
+                sender_role=(
+                    Message.SENDER_USER
+                    if user_uuid == room.user_id
+                    else Message.SENDER_TRAINER
+                ),
+                type=msg_type,
+                text=serializer.validated_data.get("text", ""),
+                file=file,
+                duration_sec=serializer.validated_data.get("duration_sec"),
+                file_size=file.size if file else None,
+                mime_type=file.content_type if file else "",
+            )
 
-        room.last_message_at = msg.created_at
-        room.save(update_fields=["last_message_at"])
+            record_new_message(room, msg)
 
-        # ✅ CRITICAL FIX: notify AFTER commit, send ORM instance
-        def on_commit_actions():
-            # WS notify
-            notify_new_message(room.id, msg)
-
-            # 🔔 Notify trainer ONLY when user sends message
-            if msg.sender_role == Message.SENDER_USER:
-                emit_webhook.delay(
-                    event="NEW_CHAT_MESSAGE",
-                    payload={
-                        "trainer_user_id": str(room.trainer_user_id),
-                        "chat_room_id": str(room.id),
-                    },
-                )
-            else:
-                # 🔔 Trainer → User (user push)
-                send_user_notification.delay(
-                    user_id=str(room.user_id),
-                    title="New Message 💬",
-                    body="Your trainer sent you a message",
-                    data={
-                        "type": "NEW_CHAT_MESSAGE",
-                        "room_id": str(room.id),
-                    },
-                )
+            # 🔔 push / trainer event to the other participant (outbox)
+            notify_message_recipient(room, msg)
 
+        # ✅ CRITICAL FIX: notify AFTER commit, send ORM instance
+        # ✅ encode ONCE: same bytes for the HTTP body and the WS event
+        body = encode_message(msg)
 
-        # ✅ Fire only after DB commit
-        transaction.on_commit(on_commit_actions)
+        # ✅ WS notify only after DB commit
+        transaction.on_commit(lambda: notify_new_message(room.id, msg, body))
 
-        # ✅ HTTP response is serialized normally
-        return Response(
-            MessageSerializer(msg).data,
+        return HttpResponse(
+            body,
             status=status.HTTP_201_CREATED,
+            content_type="application/json",
         )
\ No newline at end of file
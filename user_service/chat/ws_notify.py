@@ -2,27 +2,61 @@ from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.db import transaction
 
-from .serializers import MessageSerializer
+from .helper.message_encoder import encode_message
 from .helper.message_normalizer import normalize_for_ws
 
-def notify_new_message(room_id, message):
+def message_event(message, encoded=None):
     """
-    message MUST be a Message ORM instance
+    Group event for a Message instance (saved or not yet persisted).
+    The payload travels pre-encoded so consumers never re-serialize it.
+    """
+    if encoded is None:
+        encoded = encode_message(message)
+
+    return {
+        "type": "chat_message",
+        "payload_json": encoded.decode(),
+    }
+
+
+def notify_new_message(room_id, message, encoded=None):
+    """
+    message MUST be a Message ORM instance;
+    pass `encoded` when the caller already has its wire bytes
     """
 
     def _send():
         channel_layer = get_channel_layer()
 
-        payload = MessageSerializer(message).data
-        payload = normalize_for_ws(payload)
+        async_to_sync(channel_layer.group_send)(
+            f"chat_{room_id}",
+            message_event(message, encoded),
+        )
+
+    # send only after DB commit
+    transaction.on_commit(_send)
+
+
+def notify_room_read(room_id, reader_id, last_read_at):
+    """
+    Read receipt: the other participant learns the reader's cursor.
+    """
+
+    def _send():
+        channel_layer = get_channel_layer()
 
         async_to_sync(channel_layer.group_send)(
             f"chat_{room_id}",
             {
-                "type": "chat_message",
-                "payload": payload,
+                "type": "chat_read",
+                "payload": normalize_for_ws(
+                    {
+                        "room_id": room_id,
+                        "reader_id": reader_id,
+                        "last_read_at": last_read_at,
+                    }
+                ),
             },
         )
 
-    # send only after DB commit
     transaction.on_commit(_send)
@@ -46,6 +46,12 @@ case "${SERVICE_ROLE:-web}" in
     python manage.py run_rabbit_trainer_consumer
     ;;
 
+  outbox_relay)
+    wait_for "rabbitmq" "5672" "RabbitMQ"
+    echo "Starting outbox relay..."
+    python manage.py run_outbox_relay
+    ;;
+
   celery_worker)
     wait_for "rabbitmq" "5672" "RabbitMQ"
     echo "Starting Celery worker..."
@@ -6,6 +6,26 @@ class AIServiceError(Exception):
     pass
 
 
+class AIServiceBusy(AIServiceError):
+    """
+    ai_service deferred the call (shared LLM quota is busy).
+    Retry after `retry_after` seconds instead of failing.
+    """
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"AI service busy, retry in {retry_after}s")
+
+
+def raise_if_busy(response):
+    if response.status_code == 429:
+        try:
+            retry_after = int(response.headers.get("Retry-After", 30))
+        except ValueError:
+            retry_after = 30
+        raise AIServiceBusy(retry_after)
+
+
 def generate_diet_plan(profile_data: dict):
     url = f"{settings.AI_SERVICE_BASE_URL}/api/v1/diet/generate/"
 
@@ -18,6 +38,8 @@ def generate_diet_plan(profile_data: dict):
     except requests.RequestException:
         raise AIServiceError("AI service unreachable")
 
+    raise_if_busy(response)
+
     if response.status_code != 200:
         raise AIServiceError(response.text)
 
@@ -44,6 +66,8 @@ def estimate_nutrition(food_text: str) -> dict:
     except requests.RequestException as e:
         raise AIServiceError("AI service not reachable") from e
 
+    raise_if_busy(response)
+
     if response.status_code != 200:
         raise AIServiceError(f"AI service error: {response.status_code}")
 
@@ -3,6 +3,8 @@ import sys
 import requests
 from django.conf import settings
 
+from .ai_client import raise_if_busy
+
 
 def request_ai_workout(payload: dict) -> dict:
     url = f"{settings.AI_SERVICE_BASE_URL}/api/v1/workout/generate/"
@@ -17,6 +19,8 @@ def request_ai_workout(payload: dict) -> dict:
         timeout=60,
     )
 
+    raise_if_busy(response)
+
     if response.status_code != 200:
         sys.stderr.write("\n❌❌❌ WORKOUT AI ERROR ❌❌❌\n")
         sys.stderr.write(f"STATUS: {response.status_code}\n")
@@ -0,0 +1,154 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from user_app.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+RELAY_BATCH = 500
+MAX_ATTEMPTS = 10
+MAX_BACKOFF_SEC = 300
+
+
+# -------------------------------------------------
+# PRODUCER SIDE (inside the caller's transaction)
+# -------------------------------------------------
+def trainer_event(*, event, payload):
+    return OutboxEvent(
+        kind=OutboxEvent.KIND_TRAINER_EVENT,
+        payload={"event": event, "payload": payload},
+    )
+
+
+def user_push(*, user_id, title, body, data=None):
+    """
+    Coalesced push (queue_user_notification once relayed).
+    """
+    return OutboxEvent(
+        kind=OutboxEvent.KIND_USER_PUSH,
+        payload={"user_id": str(user_id), "title": title, "body": body, "data": data},
+    )
+
+
+def task(name, *, kwargs=None, countdown=None):
+    """
+    Any Celery task by name. countdown is fixed now (as an eta), so a
+    relay retry does not push it back.
+    """
+    eta = None
+    if countdown:
+        eta = (timezone.now() + timedelta(seconds=countdown)).isoformat()
+
+    return OutboxEvent(
+        kind=OutboxEvent.KIND_TASK,
+        payload={"name": name, "kwargs": kwargs or {}, "eta": eta},
+    )
+
+
+def add(*events):
+    """
+    Write outbox rows. Call inside the transaction of the change they
+    belong to: they commit (or roll back) with it.
+    """
+    if len(events) == 1:
+        events[0].save(force_insert=True)
+    elif events:
+        OutboxEvent.objects.bulk_create(events)
+
+
+# -------------------------------------------------
+# RELAY SIDE
+# -------------------------------------------------
+def _send_trainer_events(payloads):
+    from user_app.helper.trainer_events import publish_trainer_events
+
+    publish_trainer_events([(p["event"], p["payload"]) for p in payloads])
+
+
+def _send_user_pushes(payloads):
+    from user_app.tasks import queue_user_notifications
+
+    # same text for many users → one pipelined Redis round trip
+    groups = defaultdict(list)
+    for p in payloads:
+        key = json.dumps([p["title"], p["body"], p.get("data")], sort_keys=True)
+        groups[key].append(p["user_id"])
+
+    for key, user_ids in groups.items():
+        title, body, data = json.loads(key)
+        queue_user_notifications(user_ids=user_ids, title=title, body=body, data=data)
+
+
+def _send_tasks(payloads):
+    from celery import current_app
+
+    with current_app.producer_or_acquire() as producer:
+        for p in payloads:
+            current_app.send_task(
+                p["name"],
+                kwargs=p["kwargs"],
+                eta=datetime.fromisoformat(p["eta"]) if p.get("eta") else None,
+                producer=producer,
+            )
+
+
+SENDERS = {
+    OutboxEvent.KIND_TRAINER_EVENT: _send_trainer_events,
+    OutboxEvent.KIND_USER_PUSH: _send_user_pushes,
+    OutboxEvent.KIND_TASK: _send_tasks,
+}
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2 ** attempts, MAX_BACKOFF_SEC))
+
+
+def relay_batch(limit=RELAY_BATCH):
+    """
+    Publish up to `limit` due rows, oldest first, one send per kind,
+    and delete them. SKIP LOCKED: several relays never take the same row.
+    A kind that fails is retried later as a whole: delivery is
+    at-least-once, consumers already tolerate duplicates.
+    → number of rows taken
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(available_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+            .order_by("id")[:limit]
+        )
+        if not rows:
+            return 0
+
+        by_kind = defaultdict(list)
+        for row in rows:
+            by_kind[row.kind].append(row)
+
+        sent, failed = [], []
+        for kind, events in by_kind.items():
+            try:
+                SENDERS[kind]([e.payload for e in events])
+                sent.extend(events)
+            except Exception:
+                logger.exception("Outbox relay failed for %d %s events", len(events), kind)
+                failed.extend(events)
+
+        OutboxEvent.objects.filter(id__in=[e.id for e in sent]).delete()
+
+        for e in failed:
+            e.attempts += 1
+            e.available_at = now + _backoff(e.attempts)
+            if e.attempts >= MAX_ATTEMPTS:
+                logger.error("Outbox event %s gave up after %d attempts", e.id, e.attempts)
+
+        OutboxEvent.objects.bulk_update(failed, ["attempts", "available_at"])
+
+    return len(rows)
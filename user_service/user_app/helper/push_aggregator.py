@@ -0,0 +1,255 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# BUFFER LAYOUT
+# -----------------------------
+# push:buf:<user_id>  list of pending events (JSON), oldest first
+# push:due            zset: user_id scored by the ms its window closes
+# push:flush          marker: a flush task is already scheduled
+# push:send_failures  consecutive failed FCM sends (restore backoff)
+DUE_KEY = "push:due"
+FLUSH_MARKER_KEY = "push:flush"
+SEND_FAILURES_KEY = "push:send_failures"
+
+MAX_EVENTS_PER_USER = 100  # a runaway producer cannot grow one buffer forever
+BUFFER_TTL_SEC = 60 * 60  # buffers never outlive a lost flusher
+FLUSH_BATCH_USERS = 1000
+# restored batches wait 1 s, 2 s, 4 s … up to this while FCM keeps failing
+RESTORE_BACKOFF_MAX_SEC = 60
+
+# type → (title, body) when several events of that type collapse into one push
+COLLAPSED_TEXT = {
+    "NEW_CHAT_MESSAGE": ("New Messages 💬", "Your trainer sent you {count} messages"),
+}
+
+
+def buffer_key(user_id):
+    return f"push:buf:{user_id}"
+
+
+# KEYS: buffer, due, marker
+# ARGV: event_json, user_id, due_ms, window_ms, max_events, ttl
+# → 1 when the caller must schedule the flush task, else 0
+_BUFFER_LUA = """
+redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[5]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+
+-- first event opens the window: later ones never push it back
+redis.call('ZADD', KEYS[2], 'NX', ARGV[3], ARGV[2])
+
+if redis.call('SET', KEYS[3], '1', 'NX', 'PX', ARGV[4]) then
+  return 1
+end
+return 0
+"""
+
+# KEYS: due
+# ARGV: now_ms, limit
+# → {{user_id, {event_json, ...}}, ...}
+_CLAIM_LUA = """
+local users = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local out = {}
+
+for _, user in ipairs(users) do
+  local key = 'push:buf:' .. user
+  out[#out + 1] = {user, redis.call('LRANGE', key, 0, -1)}
+  redis.call('DEL', key)
+  redis.call('ZREM', KEYS[1], user)
+end
+
+return out
+"""
+
+
+class PushBufferUnavailable(Exception):
+    """Redis for the push buffer is down: send unbuffered instead."""
+
+
+_client = None
+_scripts = {}
+
+
+def _get_client():
+    global _client
+
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(
+            settings.PUSH_BUFFER_REDIS_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+            decode_responses=True,
+        )
+        _scripts.update(
+            buffer=_client.register_script(_BUFFER_LUA),
+            claim=_client.register_script(_CLAIM_LUA),
+        )
+
+    return _client
+
+
+def _call(fn, *args, **kwargs):
+    try:
+        _get_client()
+        return fn(*args, **kwargs)
+    except Exception as e:
+        logger.exception("Push buffer unavailable")
+        raise PushBufferUnavailable(str(e)) from e
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def window_ms():
+    return int(settings.PUSH_COALESCE_WINDOW_SEC * 1000)
+
+
+# -------------------------------------------------
+# PRODUCER SIDE
+# -------------------------------------------------
+def buffer_notification(user_id, title, body, data=None):
+    """
+    Append one event to the user's window.
+    → True when no flush is scheduled yet (the caller schedules it).
+    """
+    event = json.dumps({"title": title, "body": body, "data": data or {}})
+
+    return bool(
+        _call(
+            lambda: _scripts["buffer"](
+                keys=[buffer_key(user_id), DUE_KEY, FLUSH_MARKER_KEY],
+                args=[
+                    event,
+                    str(user_id),
+                    _now_ms() + window_ms(),
+                    window_ms(),
+                    MAX_EVENTS_PER_USER,
+                    BUFFER_TTL_SEC,
+                ],
+            )
+        )
+    )
+
+
+def buffer_notifications(user_ids, title, body, data=None):
+    """
+    Same event for many users in one pipelined round trip (the flush
+    then multicasts it). → True when the caller schedules the flush.
+    """
+    event = json.dumps({"title": title, "body": body, "data": data or {}})
+
+    def run():
+        pipe = _client.pipeline(transaction=False)
+        for user_id in user_ids:
+            _scripts["buffer"](
+                keys=[buffer_key(user_id), DUE_KEY, FLUSH_MARKER_KEY],
+                args=[
+                    event,
+                    str(user_id),
+                    _now_ms() + window_ms(),
+                    window_ms(),
+                    MAX_EVENTS_PER_USER,
+                    BUFFER_TTL_SEC,
+                ],
+                client=pipe,
+            )
+        return any(pipe.execute())
+
+    return bool(user_ids) and _call(run)
+
+
+# -------------------------------------------------
+# FLUSH SIDE
+# -------------------------------------------------
+def claim_due(limit=FLUSH_BATCH_USERS):
+    """
+    Atomically take every user whose window has closed.
+    → {user_id: [event, ...]}
+    """
+    rows = _call(lambda: _scripts["claim"](keys=[DUE_KEY], args=[_now_ms(), limit]))
+    return {user_id: [json.loads(e) for e in events] for user_id, events in rows}
+
+
+def restore(batch):
+    """
+    Put claimed events back (FCM unreachable), due after a backoff that
+    doubles with every consecutive failure: the chained flush waits for
+    it instead of spinning against a down FCM.
+    """
+    client = _get_client()
+
+    failures = _call(client.incr, SEND_FAILURES_KEY)
+    _call(client.expire, SEND_FAILURES_KEY, BUFFER_TTL_SEC)
+    due_ms = _now_ms() + min(2 ** (failures - 1), RESTORE_BACKOFF_MAX_SEC) * 1000
+
+    pipe = client.pipeline()
+
+    for user_id, events in batch.items():
+        pipe.lpush(buffer_key(user_id), *[json.dumps(e) for e in reversed(events)])
+        pipe.expire(buffer_key(user_id), BUFFER_TTL_SEC)
+        pipe.zadd(DUE_KEY, {user_id: due_ms})
+
+    _call(pipe.execute)
+
+
+def reset_backoff():
+    """FCM took a batch again."""
+    _call(_get_client().delete, SEND_FAILURES_KEY)
+
+
+def next_flush_in():
+    """
+    Seconds until the earliest open window closes, claiming the flush
+    marker. None when nothing is buffered or a flush is already scheduled.
+    """
+    client = _get_client()
+    head = _call(client.zrange, DUE_KEY, 0, 0, withscores=True)
+    if not head:
+        return None
+
+    delay_ms = max(int(head[0][1]) - _now_ms(), 0)
+    if not _call(client.set, FLUSH_MARKER_KEY, "1", nx=True, px=max(delay_ms, 1)):
+        return None
+
+    return delay_ms / 1000
+
+
+def collapse(events):
+    """
+    One push per (type, room): the latest event wins, with a count
+    and plural text when several were buffered.
+    → [(title, body, data)]
+    """
+    groups = {}
+
+    for event in events:
+        data = event.get("data") or {}
+        key = (data.get("type") or event["title"], data.get("room_id", ""))
+
+        count = groups[key][1] + 1 if key in groups else 1
+        groups[key] = (event, count)
+
+    out = []
+    for (kind, _), (event, count) in groups.items():
+        title, body = event["title"], event["body"]
+        data = dict(event.get("data") or {})
+
+        if count > 1:
+            # FCM data values must be strings
+            data["count"] = str(count)
+            if kind in COLLAPSED_TEXT:
+                title, body = COLLAPSED_TEXT[kind]
+                body = body.format(count=count)
+
+        out.append((title, body, data))
+
+    return out
@@ -0,0 +1,53 @@
+from django.conf import settings
+from kombu import Connection, Exchange, Queue
+from kombu.pools import producers
+
+# trainer-facing events (TRAINER_BOOKED, NEW_CHAT_MESSAGE, INCOMING_CALL):
+# trainer_service consumes them in batches, any number of consumers
+exchange = Exchange("trainer_events", type="topic", durable=True)
+
+# declared from the producer too, so nothing is dropped before the
+# first consumer has ever started
+queue = Queue(
+    "trainer_service.trainer_events",
+    exchange,
+    routing_key="trainer.#",
+    durable=True,
+)
+
+_connection = None
+
+
+def _get_connection():
+    global _connection
+
+    if _connection is None:
+        _connection = Connection(settings.CELERY_BROKER_URL)
+
+    return _connection
+
+
+def publish_trainer_events(events):
+    """
+    Replaces emit_webhook: persistent messages on the broker instead of
+    a Celery task plus an HTTP POST to trainer_service per event.
+    events: [(event, payload)], all over one pooled producer.
+    Raises on failure: the outbox relay (the only caller) retries.
+    """
+    with producers[_get_connection()].acquire(block=True, timeout=2) as producer:
+        for event, payload in events:
+            producer.publish(
+                {"event": event, "payload": payload},
+                exchange=exchange,
+                routing_key=f"trainer.{event.lower()}",
+                serializer="json",
+                delivery_mode=2,
+                declare=[queue],
+                retry=True,
+                retry_policy={
+                    "max_retries": 3,
+                    "interval_start": 0,
+                    "interval_step": 0.5,
+                    "interval_max": 2,
+                },
+            )
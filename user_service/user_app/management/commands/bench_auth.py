@@ -0,0 +1,105 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from rest_framework_simplejwt.backends import TokenBackend
+
+from user_service.common import jwt_verifier
+from user_service.common.auth import SimpleJWTAuth
+
+
+def legacy_authenticate(request, jwt_settings):
+    # the previous SimpleJWTAuth: new TokenBackend + full verify per request
+    token = request.META["HTTP_AUTHORIZATION"].split(" ", 1)[1].strip()
+    backend = TokenBackend(
+        algorithm=jwt_settings["ALGORITHM"],
+        signing_key=jwt_settings["SIGNING_KEY"],
+        verifying_key=jwt_settings["VERIFYING_KEY"],
+    )
+    payload = backend.decode(token, verify=True)
+    return SimpleNamespace(id=payload.get("sub"), is_authenticated=True), token
+
+
+def _rsa_keys():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return private, public
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark: per-request JWT auth cost, previous SimpleJWTAuth vs the "
+        "shared cached verifier (cold and warm), HS256 and RS256."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=200, help="distinct users")
+        parser.add_argument("--requests", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        private, public = _rsa_keys()
+        modes = {
+            "HS256": (
+                {"ALGORITHM": "HS256", "SIGNING_KEY": "bench-secret-0123456789abcdef0123", "VERIFYING_KEY": ""},
+                "bench-secret-0123456789abcdef0123",
+            ),
+            # services only get the public key; auth_service signs
+            "RS256": ({"ALGORITHM": "RS256", "SIGNING_KEY": "", "VERIFYING_KEY": public}, private),
+        }
+
+        for algorithm, (jwt_settings, signing_key) in modes.items():
+            signer = TokenBackend(algorithm=algorithm, signing_key=signing_key)
+            exp = int(time.time()) + 3600
+            tokens = [
+                signer.encode({"sub": str(uuid.uuid4()), "roles": ["user"], "exp": exp})
+                for _ in range(options["tokens"])
+            ]
+            factory = RequestFactory()
+            requests = [
+                factory.get("/", HTTP_AUTHORIZATION=f"Bearer {tokens[i % len(tokens)]}")
+                for i in range(options["requests"])
+            ]
+
+            with override_settings(SIMPLE_JWT=jwt_settings):
+                jwt_verifier.reset_verifier()
+                auth = SimpleJWTAuth()
+
+                self._run(algorithm, "legacy", requests, lambda r: legacy_authenticate(r, jwt_settings))
+
+                verifier = jwt_verifier.get_verifier()
+
+                # every token once, nothing cached yet
+                self._run(algorithm, "cold", requests[: len(tokens)], auth.authenticate)
+                # steady state: the same users keep calling
+                self._run(algorithm, "warm", requests, auth.authenticate)
+
+                self.stdout.write(
+                    f"{'':<6} cache hits {verifier.hits}  misses {verifier.misses}"
+                )
+
+            jwt_verifier.reset_verifier()
+
+    def _run(self, algorithm, label, requests, authenticate):
+        started = time.perf_counter()
+        for request in requests:
+            user, _ = authenticate(request)
+            assert user.is_authenticated
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{algorithm:<6} {label:<7} {len(requests):7d} requests  "
+            f"{elapsed / len(requests) * 1e6:8.1f} µs/request  "
+            f"{len(requests) / elapsed:9.0f} requests/s"
+        )
@@ -0,0 +1,204 @@
+import importlib
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+import requests
+from celery.app.task import Task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from user_app import tasks
+from user_app.helper import outbox, push_aggregator, push_devices
+from user_app.models import OutboxEvent, PushDevice, UserProfile
+from user_service import providers
+
+from .bench_premium_expiry import FakeAuth
+
+LAMBDA_DIR = settings.BASE_DIR / "aws" / "lambda" / "premium_expired_email"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark: end-to-end throughput of the notification pipeline "
+        "(outbox → relay → push buffer → FCM) and the premium pipeline "
+        "(downgrade → SQS → email lambda → SES) against the fake providers "
+        "(user_service/providers.py). Needs Redis at PUSH_BUFFER_REDIS_URL; "
+        "run with --settings=user_service.settings_loadtest for a throwaway DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--events", type=int, default=5, help="pushes per user")
+        parser.add_argument("--expired", type=int, default=2000, help="expired premium users")
+        parser.add_argument("--latency-ms", type=float, default=20, help="every fake provider")
+        parser.add_argument("--error-rate", type=float, default=0.01, help="every fake provider")
+        parser.add_argument("--window", type=float, default=0.2, help="coalescing window (s)")
+        parser.add_argument("--lambda-batch", type=int, default=100, help="SQS records per invocation")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            call_command("migrate", verbosity=0, interactive=False)
+
+        for name in providers.FAKES:
+            fake = providers.fake(name)
+            fake.reset()
+            fake.latency = options["latency_ms"] / 1000
+            fake.error_rate = options["error_rate"]
+
+        enqueued = []
+        apply_async = Task.apply_async
+        # counted, not executed: the harness drives flushes itself
+        Task.apply_async = lambda task, args=None, kwargs=None, **o: enqueued.append(task.name)
+
+        try:
+            with override_settings(
+                PROVIDER_BACKEND="fake", PUSH_COALESCE_WINDOW_SEC=options["window"]
+            ):
+                self.notification_pipeline(options)
+                self.premium_pipeline(options)
+        finally:
+            Task.apply_async = apply_async
+            push_aggregator._get_client().delete(push_aggregator.FLUSH_MARKER_KEY)
+
+        self.stdout.write(f"celery tasks enqueued {len(enqueued)}")
+
+    # -------------------------------------------------
+    # NOTIFICATIONS
+    # -------------------------------------------------
+    def notification_pipeline(self, options):
+        fcm = providers.fake("fcm")
+
+        devices = [
+            PushDevice(user_id=uuid.uuid4(), token=f"bench-token-{uuid.uuid4().hex}")
+            for _ in range(options["users"])
+        ]
+        PushDevice.objects.bulk_create(devices, batch_size=500)
+        cache_keys = [push_devices._cache_key(d.user_id) for d in devices]
+
+        try:
+            started = time.perf_counter()
+
+            # one request transaction per event, like the chat / booking views
+            for _ in range(options["events"]):
+                for d in devices:
+                    with transaction.atomic():
+                        outbox.add(
+                            outbox.user_push(
+                                user_id=d.user_id,
+                                title="New Message 💬",
+                                body="Your trainer sent you a message",
+                                data={"type": "NEW_CHAT_MESSAGE", "room_id": str(d.id)},
+                            )
+                        )
+            written = time.perf_counter()
+
+            while outbox.relay_batch():
+                pass
+            relayed = time.perf_counter()
+
+            # play the worker: flush once every window has closed
+            time.sleep(options["window"])
+            while push_aggregator._get_client().zcard(push_aggregator.DUE_KEY):
+                tasks.flush_user_notifications.run()
+            flushed = time.perf_counter()
+
+            events = options["events"] * len(devices)
+            pruned = len(devices) - PushDevice.objects.filter(
+                id__in=[d.id for d in devices]
+            ).count()
+
+            self._stage("outbox write", events, written - started)
+            self._stage("relay", events, relayed - written)
+            self._stage("flush + fcm", events, flushed - relayed)
+            self.stdout.write(
+                f"notifications  {events} events → {fcm.item_count()} pushes in "
+                f"{fcm.call_count()} fcm calls, {pruned} dead tokens pruned, "
+                f"{events / (flushed - started):.0f} events/s end to end"
+            )
+        finally:
+            PushDevice.objects.filter(id__in=[d.id for d in devices]).delete()
+            OutboxEvent.objects.filter(kind=OutboxEvent.KIND_USER_PUSH).delete()
+            cache.delete_many(cache_keys)
+
+    # -------------------------------------------------
+    # PREMIUM EXPIRY
+    # -------------------------------------------------
+    def premium_pipeline(self, options):
+        sqs, ses = providers.fake("sqs"), providers.fake("ses")
+        handler = self._email_lambda(ses)
+
+        expired_at = timezone.now() - timedelta(minutes=1)
+        profiles = [
+            UserProfile(user_id=uuid.uuid4(), is_premium=True, premium_expires_at=expired_at)
+            for _ in range(options["expired"])
+        ]
+        UserProfile.objects.bulk_create(profiles, batch_size=1000)
+
+        auth = FakeAuth(options["latency_ms"] / 1000)
+        post = requests.post
+        requests.post = auth.post
+
+        try:
+            started = time.perf_counter()
+
+            # SQS failures stay pending: the next scheduled run retries them
+            runs = 0
+            while UserProfile.objects.filter(
+                id__in=[p.id for p in profiles], premium_expiry_pending=True
+            ).exists() or not runs:
+                tasks.handle_expired_premium_users.run()
+                runs += 1
+            queued = time.perf_counter()
+
+            records = [
+                {"messageId": str(uuid.uuid4()), "body": body} for body in sqs.bodies
+            ]
+            emailed = retried = 0
+            while records:
+                failed = []
+                for i in range(0, len(records), options["lambda_batch"]):
+                    batch = records[i : i + options["lambda_batch"]]
+                    result = handler({"Records": batch}, None)
+                    ids = {f["itemIdentifier"] for f in result["batchItemFailures"]}
+                    failed.extend(r for r in batch if r["messageId"] in ids)
+                    emailed += len(batch) - len(ids)
+                retried += len(failed)
+                records = failed
+            sent = time.perf_counter()
+
+            self._stage("downgrade + sqs", len(sqs.bodies), queued - started)
+            self._stage("lambda + ses", emailed, sent - queued)
+            self.stdout.write(
+                f"premium        {len(profiles)} expired → {len(sqs.bodies)} queued in "
+                f"{sqs.call_count()} sqs calls over {runs} runs, {auth.calls} auth calls, "
+                f"{emailed} emailed in {ses.call_count()} ses calls ({retried} redelivered), "
+                f"{emailed / (sent - started):.0f} users/s end to end"
+            )
+        finally:
+            requests.post = post
+            UserProfile.objects.filter(id__in=[p.id for p in profiles]).delete()
+            OutboxEvent.objects.filter(kind=OutboxEvent.KIND_USER_PUSH).delete()
+
+    def _email_lambda(self, ses):
+        os.environ.setdefault("AWS_DEFAULT_REGION", settings.AWS_REGION or "us-east-1")
+        os.environ.setdefault("FROM_EMAIL", "no-reply@example.com")
+
+        if str(LAMBDA_DIR) not in sys.path:
+            sys.path.insert(0, str(LAMBDA_DIR))
+        lambda_function = importlib.import_module("lambda_function")
+
+        lambda_function.ses = ses
+        return lambda_function.lambda_handler
+
+    def _stage(self, label, items, elapsed):
+        self.stdout.write(
+            f"  {label:<16} {items:7d} in {elapsed:7.2f} s  {items / max(elapsed, 1e-9):9.0f} /s"
+        )
@@ -0,0 +1,108 @@
+import time
+import uuid
+from datetime import timedelta
+
+import requests
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from user_app import tasks
+from user_app.models import OutboxEvent, UserProfile
+from user_service import providers
+
+
+class FakeAuth:
+    """
+    Stand-in for auth_service's bulk email endpoint: one sleep per call.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def post(self, url, json=None, timeout=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+
+        # ~1 in 256 users has no auth record
+        emails = {
+            user_id: f"{user_id[:8]}@example.com"
+            for user_id in json["user_ids"]
+            if not user_id.endswith("00")
+        }
+
+        class _Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"emails": emails}
+
+        return _Response()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark: handle_expired_premium_users against a fake auth service "
+        "and the fake SQS (user_service/providers.py), including a retry after partial SQS failures. "
+        "Run with --settings=user_service.settings_loadtest for a throwaway DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--auth-latency-ms", type=float, default=20)
+        parser.add_argument("--sqs-latency-ms", type=float, default=15)
+        parser.add_argument("--fail-rate", type=float, default=0.02, help="SQS entry failures, first run")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            call_command("migrate", verbosity=0, interactive=False)
+
+        expired_at = timezone.now() - timedelta(minutes=1)
+        profiles = [
+            UserProfile(user_id=uuid.uuid4(), is_premium=True, premium_expires_at=expired_at)
+            for _ in range(options["users"])
+        ]
+        UserProfile.objects.bulk_create(profiles, batch_size=1000)
+
+        auth = FakeAuth(options["auth_latency_ms"] / 1000)
+        sqs = providers.fake("sqs")
+        sqs.reset()
+        sqs.latency = options["sqs_latency_ms"] / 1000
+        post = requests.post
+        requests.post = auth.post
+
+        try:
+            for run, fail_rate in (("first run", options["fail_rate"]), ("retry", 0.0)):
+                sqs.error_rate = fail_rate
+                auth.calls = 0
+                sqs.calls.clear()
+
+                started = time.perf_counter()
+                with override_settings(PROVIDER_BACKEND="fake"):
+                    result = tasks.handle_expired_premium_users.run()
+                elapsed = time.perf_counter() - started
+
+                pending = UserProfile.objects.filter(
+                    id__in=[p.id for p in profiles], premium_expiry_pending=True
+                ).count()
+                self.stdout.write(
+                    f"{run:<10} {elapsed:7.2f} s  auth calls {auth.calls:5d}  "
+                    f"sqs batch calls {sqs.call_count():5d}  pending after {pending:5d}  ({result})"
+                )
+            # expiry pushes wait in the outbox for the relay
+            pushes = OutboxEvent.objects.filter(kind=OutboxEvent.KIND_USER_PUSH).count()
+        finally:
+            requests.post = post
+            UserProfile.objects.filter(id__in=[p.id for p in profiles]).delete()
+            OutboxEvent.objects.filter(kind=OutboxEvent.KIND_USER_PUSH).delete()
+
+        duplicates = sum(1 for n in sqs.sent.values() if n > 1)
+        legacy = options["users"] * (options["auth_latency_ms"] + options["sqs_latency_ms"]) / 1000
+        self.stdout.write(
+            f"emails {len(sqs.sent)}  duplicates {duplicates}  pushes queued {pushes}  "
+            f"(per-user serial calls at these latencies: ~{legacy:.0f} s)"
+        )
@@ -0,0 +1,152 @@
+import time
+import uuid
+
+from celery.app.task import Task
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from user_app import tasks
+from user_app.helper import push_aggregator, push_devices
+from user_app.models import PushDevice
+from user_service import providers
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark: per-event send_user_notification vs the coalescing push "
+        "buffer, against the fake FCM (user_service/providers.py). Needs Redis at PUSH_BUFFER_REDIS_URL; "
+        "run with --settings=user_service.settings_loadtest for a throwaway DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--messages", type=int, default=10, help="chat pushes per user")
+        parser.add_argument("--latency-ms", type=float, default=20, help="fake FCM round trip")
+        parser.add_argument("--window", type=float, default=0.5, help="coalescing window (s)")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            call_command("migrate", verbosity=0, interactive=False)
+
+        devices = [
+            PushDevice(user_id=uuid.uuid4(), token=f"fake-token-{i}")
+            for i in range(options["users"])
+        ]
+        PushDevice.objects.bulk_create(devices, batch_size=500)
+
+        # burst: chat messages interleaved across users, then one identical
+        # broadcast-style push per user (multicast candidate)
+        events = [
+            dict(
+                user_id=str(d.user_id),
+                title="New Message 💬",
+                body="Your trainer sent you a message",
+                data={"type": "NEW_CHAT_MESSAGE", "room_id": str(d.id)},
+            )
+            for _ in range(options["messages"])
+            for d in devices
+        ] + [
+            dict(
+                user_id=str(d.user_id),
+                title="Premium Expired ⏳",
+                body="Your premium subscription has expired.",
+                data={"type": "PREMIUM_EXPIRED"},
+            )
+            for d in devices
+        ]
+
+        # both runs start with a cold token cache
+        cache_keys = [push_devices._cache_key(d.user_id) for d in devices]
+
+        try:
+            cache.delete_many(cache_keys)
+            self._report("per-event", self._per_event(events, options))
+
+            cache.delete_many(cache_keys)
+            with override_settings(PUSH_COALESCE_WINDOW_SEC=options["window"]):
+                self._report("coalesced", self._coalesced(events, options))
+        finally:
+            PushDevice.objects.filter(id__in=[d.id for d in devices]).delete()
+            cache.delete_many(cache_keys)
+
+    # -------------------------------------------------
+    # HARNESS
+    # -------------------------------------------------
+    def _patched(self, enqueued, options):
+        fake = providers.fake("fcm")
+        fake.reset()
+        fake.latency = options["latency_ms"] / 1000
+        fake.error_rate = 0
+
+        backend = override_settings(PROVIDER_BACKEND="fake")
+        apply_async = Task.apply_async
+
+        def record(task, args=None, kwargs=None, **options):
+            # counted, not executed: the harness drives flushes itself
+            enqueued.append((task.name, options.get("countdown")))
+
+        backend.enable()
+        Task.apply_async = record
+
+        def restore():
+            backend.disable()
+            Task.apply_async = apply_async
+
+        return fake, restore
+
+    def _per_event(self, events, options):
+        enqueued = []
+        fake, restore = self._patched(enqueued, options)
+
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for event in events:
+                    tasks.send_user_notification.delay(**event)
+                    tasks.send_user_notification.run(**event)
+        finally:
+            restore()
+
+        return fake, len(enqueued), len(queries), time.perf_counter() - started
+
+    def _coalesced(self, events, options):
+        enqueued = []
+        fake, restore = self._patched(enqueued, options)
+
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for event in events:
+                    tasks.queue_user_notification(**event)
+
+                # play the worker: run each flush when its countdown is due
+                flushed = 0
+                while flushed < len(enqueued):
+                    _, countdown = enqueued[flushed]
+                    time.sleep(countdown or 0)
+                    tasks.flush_user_notifications.run()
+                    flushed += 1
+        finally:
+            restore()
+            push_aggregator._get_client().delete(push_aggregator.FLUSH_MARKER_KEY)
+
+        return fake, len(enqueued), len(queries), time.perf_counter() - started
+
+    def _report(self, label, result):
+        fake, task_count, query_count, elapsed = result
+        provider_calls = fake.call_count()
+        calls = "  ".join(
+            f"{method}={fake.call_count(method)}"
+            for method in ("send", "send_each", "send_each_for_multicast")
+            if fake.call_count(method)
+        )
+
+        self.stdout.write(
+            f"{label:<10} tasks {task_count:6d}  db queries {query_count:6d}  "
+            f"fcm calls {provider_calls:6d} ({calls})  "
+            f"pushes {fake.item_count():6d}  {elapsed:7.2f} s"
+        )
@@ -0,0 +1,62 @@
+import logging
+import os
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from user_app.helper.outbox import RELAY_BATCH, relay_batch
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+
+# how long an empty outbox is left alone; a full batch loops immediately
+IDLE_SLEEP_MS = float(os.getenv("OUTBOX_RELAY_IDLE_MS", "200"))
+
+stop_requested = False
+
+
+def handle_signal(signum, frame):
+    global stop_requested
+    logger.info("Signal %s received, shutting down outbox relay...", signum)
+    stop_requested = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Drains outbox_event into RabbitMQ / Celery in batches "
+        "(SKIP LOCKED: run as many relays as needed)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=RELAY_BATCH)
+        parser.add_argument("--idle-ms", type=float, default=IDLE_SLEEP_MS)
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
+
+        logger.info("Outbox relay started")
+
+        while not stop_requested:
+            # long-lived process: drop connections the DB closed on us
+            close_old_connections()
+
+            try:
+                taken = relay_batch(options["batch_size"])
+            except Exception:
+                logger.exception("Outbox relay batch failed")
+                time.sleep(1)
+                continue
+
+            if taken:
+                logger.info("Relayed %d outbox events", taken)
+
+            if taken < options["batch_size"]:
+                time.sleep(options["idle_ms"] / 1000)
+
+        logger.info("Outbox relay shut down cleanly")
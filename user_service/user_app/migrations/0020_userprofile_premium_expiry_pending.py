@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_app", "0019_pushdevice"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="premium_expiry_pending",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                condition=models.Q(("premium_expiry_pending", True)),
+                fields=["id"],
+                name="user_profile_expiry_pending",
+            ),
+        ),
+    ]
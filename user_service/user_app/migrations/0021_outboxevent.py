@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_app", "0020_userprofile_premium_expiry_pending"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("task", "Celery task"),
+                            ("trainer_event", "Trainer event"),
+                            ("user_push", "Buffered user push"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("payload", models.JSONField()),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "outbox_event",
+                "indexes": [
+                    models.Index(fields=["available_at"], name="outbox_event_available")
+                ],
+            },
+        ),
+    ]
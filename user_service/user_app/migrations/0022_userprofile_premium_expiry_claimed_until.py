@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_app", "0021_outboxevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="premium_expiry_claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -3,6 +3,7 @@ import uuid
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 
 # ---------- choices ----------
 GENDER_CHOICES = [
@@ -90,6 +91,10 @@ class UserProfile(models.Model):
 
     is_premium = models.BooleanField(default=False)
     premium_expires_at = models.DateTimeField(null=True, blank=True)
+    # downgraded, expiry email / push not confirmed yet (retries resume here)
+    premium_expiry_pending = models.BooleanField(default=False)
+    # a run is notifying this pending row until then (lease, not a lock)
+    premium_expiry_claimed_until = models.DateTimeField(null=True, blank=True)
     profile_completed = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -104,6 +109,11 @@ class UserProfile(models.Model):
             models.Index(fields=["user_id"]),
             models.Index(fields=["goal"]),
             models.Index(fields=["is_premium"]),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(premium_expiry_pending=True),
+                name="user_profile_expiry_pending",
+            ),
         ]
 
     def __str__(self):
@@ -326,3 +336,66 @@ class WorkoutLog(models.Model):
     class Meta:
         unique_together = ("user_id", "date", "exercise_name")
         db_table = "workout_log"
+
+
+class PushDevice(models.Model):
+    """
+    One row per FCM registration token: a user can have several devices.
+    Read through helper/push_devices (cached), never directly on send.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    user_id = models.UUIDField(db_index=True)
+    # a token moves to whoever signed in last on that device
+    token = models.TextField(unique=True)
+    platform = models.CharField(max_length=16, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "push_device"
+
+    def __str__(self):
+        return f"PushDevice {self.user_id} {self.platform}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect of a write (trainer event, push, delayed task), inserted
+    in the same transaction as that write. run_outbox_relay publishes
+    the rows in batches and deletes them: nothing is lost if the process
+    dies after commit, nothing is sent for a rolled-back write.
+    Build rows with helper/outbox, never directly.
+    """
+
+    KIND_TASK = "task"
+    KIND_TRAINER_EVENT = "trainer_event"
+    KIND_USER_PUSH = "user_push"
+
+    KIND_CHOICES = [
+        (KIND_TASK, "Celery task"),
+        (KIND_TRAINER_EVENT, "Trainer event"),
+        (KIND_USER_PUSH, "Buffered user push"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    payload = models.JSONField()
+
+    # failed publishes back off; rows past MAX_ATTEMPTS stay for inspection
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "outbox_event"
+        indexes = [
+            models.Index(fields=["available_at"], name="outbox_event_available"),
+        ]
+
+    def __str__(self):
+        return f"OutboxEvent {self.id} {self.kind}"
@@ -1,7 +1,6 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-import razorpay
 from .models import PremiumPlan, UserProfile
 from .permissions import IsAdmin
 from rest_framework import status
@@ -9,6 +8,7 @@ from django.conf import settings
 from datetime import timedelta
 from django.utils import timezone
 from django.core.cache import cache
+from user_service import providers
 
 
 class AdminPremiumPlanView(APIView):
@@ -110,9 +110,7 @@ class CreatePremiumOrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
+        client = providers.razorpay_client()
 
         order = client.order.create({
             "amount": plan.price * 100,  # paise
@@ -136,9 +134,7 @@ class VerifyPremiumPaymentView(APIView):
     def post(self, request):
         data = request.data
 
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
+        client = providers.razorpay_client()
 
         try:
             client.utility.verify_payment_signature({
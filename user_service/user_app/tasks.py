@@ -1,15 +1,19 @@
 # user_app/tasks.py
 from celery import shared_task
+from celery.exceptions import Retry
+from chat.helper.room_membership import invalidate_room_membership
 from chat.models import ChatRoom
 
 from .helper.ai_client import estimate_nutrition
 from .models import MealLog, TrainerBooking
 import sys
-from datetime import date
+import uuid
+from datetime import date, timedelta
 from decimal import Decimal
 
 from celery import shared_task
 from django.db import transaction
+from django.db.models import Q
 from requests.exceptions import ConnectionError, Timeout
 
 from .helper.ai_client_workout import request_ai_workout
@@ -23,17 +27,19 @@ import requests
 from celery import shared_task
 
 
-from user_service.firebase.push import send_push
+from user_service import providers
+from user_service.firebase.push import invalid_tokens, send_push_batch
+from .helper import outbox, push_aggregator
+from .helper.push_devices import get_push_tokens, get_push_tokens_many, prune_push_tokens
 from .models import UserProfile
 
 
-from .helper.ai_client import generate_diet_plan, AIServiceError
+from .helper.ai_client import generate_diet_plan, AIServiceError, AIServiceBusy
 from .helper.ai_payload import build_payload_from_profile
 from .models import DietPlan, UserProfile
 
 
 import json
-import boto3
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
@@ -44,7 +50,46 @@ import requests
 from django.conf import settings
 
 from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# AI quota deferrals (429 from ai_service) are not failures:
+# retry them on their own budget instead of the error budget.
+AI_BUSY_MAX_RETRIES = 20
+
+
+def defer_while_ai_busy(task, exc):
+    """
+    Re-run `task` after exc.retry_after. The deferral count travels in
+    its `ai_busy_retries` kwarg and request.retries is carried over as
+    is, so deferrals never use up the autoretry budget for real errors
+    (self.retry() would count against both).
+
+    Returns only once AI_BUSY_MAX_RETRIES is spent: the caller then
+    fails the work the way it fails any other error.
+    """
+    request = task.request
+    busy = request.kwargs.get("ai_busy_retries", 0) + 1
+
+    if busy > AI_BUSY_MAX_RETRIES:
+        return
+
+    sig = task.signature_from_request(
+        request,
+        kwargs={**request.kwargs, "ai_busy_retries": busy},
+        countdown=exc.retry_after,
+        retries=request.retries,
+    )
+
+    # same hand-off as Task.retry(): eager apply() re-runs the signature
+    if not request.is_eager:
+        sig.apply_async()
+
+    raise Retry(exc=exc, when=exc.retry_after, is_eager=request.is_eager, sig=sig)
+
 #webhook event with celery for notifications to trainer side
+# (superseded by helper/trainer_events; kept so already-queued tasks still run)
 
 
 @shared_task(
@@ -84,17 +129,113 @@ def send_user_notification(
     body,
     data=None,
 ):
-    profile = UserProfile.objects.filter(user_id=user_id).first()
+    tokens = get_push_tokens(user_id)
 
-    if not profile or not profile.fcm_token:
+    if not tokens:
         return
 
-    send_push(
-        token=profile.fcm_token,
-        title=title,
-        body=body,
-        data=data,
-    )
+    # every device of the user, one multicast call
+    results = send_push_batch([(tokens, title, body, data)])
+    prune_push_tokens(invalid_tokens(results))
+
+
+def queue_user_notification(*, user_id, title, body, data=None):
+    """
+    Buffered push: events for one user within PUSH_COALESCE_WINDOW_SEC
+    collapse into one notification, flushed for all users in one batch.
+    Time-critical pushes (incoming calls) keep using send_user_notification.
+    """
+    try:
+        schedule = push_aggregator.buffer_notification(user_id, title, body, data)
+    except push_aggregator.PushBufferUnavailable:
+        # fail open: one task per event, as before
+        send_user_notification.delay(user_id=user_id, title=title, body=body, data=data)
+        return
+
+    if schedule:
+        flush_user_notifications.apply_async(
+            countdown=settings.PUSH_COALESCE_WINDOW_SEC
+        )
+
+
+def queue_user_notifications(*, user_ids, title, body, data=None):
+    """
+    queue_user_notification for many users at once (one Redis round trip).
+    """
+    try:
+        schedule = push_aggregator.buffer_notifications(user_ids, title, body, data)
+    except push_aggregator.PushBufferUnavailable:
+        for user_id in user_ids:
+            send_user_notification.delay(user_id=user_id, title=title, body=body, data=data)
+        return
+
+    if schedule:
+        flush_user_notifications.apply_async(
+            countdown=settings.PUSH_COALESCE_WINDOW_SEC
+        )
+
+
+@shared_task
+def relay_outbox():
+    """
+    Beat backstop for run_outbox_relay: drains the outbox while no
+    relay process is running.
+    """
+    for _ in range(20):
+        if outbox.relay_batch() < outbox.RELAY_BATCH:
+            break
+
+
+@shared_task
+def flush_user_notifications():
+    """
+    Send every closed window: one cached token lookup and one FCM batch /
+    multicast call per 500 pushes. Also runs from beat as a backstop.
+    """
+    try:
+        batch = push_aggregator.claim_due()
+    except push_aggregator.PushBufferUnavailable:
+        return
+
+    if batch:
+        tokens = get_push_tokens_many(batch)
+
+        pushes = [
+            (tokens[user_id], title, body, data)
+            for user_id, events in batch.items()
+            if tokens.get(user_id)
+            for title, body, data in push_aggregator.collapse(events)
+        ]
+
+        try:
+            results = send_push_batch(pushes)
+        except Exception:
+            logger.exception("FCM batch send failed, re-buffering %d users", len(batch))
+            try:
+                push_aggregator.restore(batch)
+            except push_aggregator.PushBufferUnavailable:
+                pass
+            results = []
+        else:
+            try:
+                push_aggregator.reset_backoff()
+            except push_aggregator.PushBufferUnavailable:
+                pass
+
+        failed = sum(1 for _, error in results if error is not None)
+        if failed:
+            logger.warning("FCM rejected %d of %d pushes", failed, len(results))
+
+        prune_push_tokens(invalid_tokens(results))
+
+    # windows still open (or a full claim left more due): chain the next flush
+    try:
+        delay = push_aggregator.next_flush_in()
+    except push_aggregator.PushBufferUnavailable:
+        return
+
+    if delay is not None:
+        flush_user_notifications.apply_async(countdown=delay)
 
 
 
@@ -106,14 +247,18 @@ def send_user_notification(
     retry_backoff=10,
     retry_kwargs={"max_retries": 3},
 )
-def estimate_nutrition_task(self, meal_log_id):
+def estimate_nutrition_task(self, meal_log_id, ai_busy_retries=0):
     meal = MealLog.objects.get(id=meal_log_id)
 
     # idempotent
     if meal.calories > 0:
         return
 
-    result = estimate_nutrition(", ".join(meal.items))
+    try:
+        result = estimate_nutrition(", ".join(meal.items))
+    except AIServiceBusy as e:
+        defer_while_ai_busy(self, e)
+        raise
     total = result["total"]
 
     meal.calories = total.get("calories", 0)
@@ -123,7 +268,7 @@ def estimate_nutrition_task(self, meal_log_id):
     meal.save()
 
     # 🔔 USER NOTIFICATION (PROGRESS UPDATED)
-    send_user_notification.delay(
+    queue_user_notification(
         user_id=str(meal.user_id),
         title="Progress Updated 🍽️",
         body="Check your progress!",
@@ -150,7 +295,7 @@ def normalize_durations(exercises, min_minutes, max_minutes):
     autoretry_for=(ConnectionError, Timeout),
     retry_kwargs={"max_retries": 3},
 )
-def generate_weekly_workout_task(self, user_id, workout_type):
+def generate_weekly_workout_task(self, user_id, workout_type, ai_busy_retries=0):
     week_start, week_end = get_week_range(date.today())
 
     plan = WorkoutPlan.objects.get(
@@ -225,7 +370,7 @@ def generate_weekly_workout_task(self, user_id, workout_type):
             estimated_weekly_calories=int(total_daily * Decimal("7")),
             status="ready",
         )
-        send_user_notification.delay(
+        queue_user_notification(
             user_id=str(user_id),
             title="Workout Plan Ready 💪",
             body="Your new workout plan has been generated. Time to train!",
@@ -238,6 +383,11 @@ def generate_weekly_workout_task(self, user_id, workout_type):
         return "created"
 
     except Exception as e:
+        if isinstance(e, AIServiceBusy):
+            # plan stays "pending" → deferred, not failed (until the
+            # deferral budget is spent)
+            defer_while_ai_busy(self, e)
+
         # -------------------------
         # SAVE FAILURE
         # -------------------------
@@ -258,7 +408,7 @@ def generate_weekly_workout_task(self, user_id, workout_type):
     retry_backoff=10,
     retry_kwargs={"max_retries": 3},
 )
-def generate_diet_plan_task(self, plan_id):
+def generate_diet_plan_task(self, plan_id, ai_busy_retries=0):
     plan = DietPlan.objects.select_for_update().get(id=plan_id)
 
     # Idempotency guard
@@ -268,7 +418,11 @@ def generate_diet_plan_task(self, plan_id):
     profile = UserProfile.objects.get(user_id=plan.user_id)
     payload = build_payload_from_profile(profile)
 
-    ai_response = generate_diet_plan(payload)
+    try:
+        ai_response = generate_diet_plan(payload)
+    except AIServiceBusy as e:
+        defer_while_ai_busy(self, e)
+        raise
 
     plan.daily_calories = ai_response["daily_calories"]
     plan.macros = ai_response["macros"]
@@ -277,7 +431,7 @@ def generate_diet_plan_task(self, plan_id):
     plan.status = "ready"
     plan.save()
 
-    send_user_notification.delay(
+    queue_user_notification(
         user_id=str(plan.user_id),
         title="Diet Plan Ready 🥗",
         body="Your personalized diet plan is ready to follow.",
@@ -293,16 +447,158 @@ def generate_diet_plan_task(self, plan_id):
 
 
 
-def fetch_email_from_auth(user_id):
+# one chunk = one bulk auth call and up to 50 SQS batch calls
+PREMIUM_EXPIRY_CHUNK = 500
+SQS_BATCH_LIMIT = 10
+
+
+def fetch_emails_from_auth(user_ids):
+    """
+    → {user_id: email}; users unknown to auth are absent.
+    """
     response = requests.post(
-        f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/users/email/",
-        json={"user_id": str(user_id)},
+        f"{settings.AUTH_SERVICE_URL}/api/v1/auth/internal/users/emails/",
+        json={"user_ids": [str(u) for u in user_ids]},
+        headers={"X-Internal-Token": settings.INTERNAL_SERVICE_TOKEN},
         timeout=10,
     )
 
     response.raise_for_status()
-    return response.json()["email"]
+    return response.json()["emails"]
+
+
+def _downgrade_expired_chunk(now, after_id):
+    """
+    Keyset page of expired premium profiles → downgraded and flagged
+    pending in one transaction. → the page's rows (empty when done)
+    """
+    with transaction.atomic():
+        rows = list(
+            UserProfile.objects.select_for_update(skip_locked=True)
+            .filter(is_premium=True, premium_expires_at__lt=now, id__gt=after_id)
+            .order_by("id")
+            .values_list("id", "user_id")[:PREMIUM_EXPIRY_CHUNK]
+        )
+        if not rows:
+            return rows
 
+        UserProfile.objects.filter(id__in=[pk for pk, _ in rows]).update(
+            is_premium=False,
+            premium_expires_at=None,
+            premium_expiry_pending=True,
+        )
+
+    cache.delete_many([f"profile:{user_id}:v1" for _, user_id in rows])
+    return rows
+
+
+PREMIUM_EXPIRED_PUSH = {
+    "title": "Premium Expired ⏳",
+    "body": "Your premium subscription has expired. Renew to continue premium features.",
+    "data": {
+        "type": "PREMIUM_EXPIRED",
+    },
+}
+
+# longer than one chunk's auth call + SQS batches ever take
+PREMIUM_EXPIRY_LEASE = timedelta(minutes=10)
+
+
+def _claim_expired_chunk(after_id):
+    """
+    Keyset page of pending profiles nobody else is notifying. Row locks
+    (SKIP LOCKED) last only for the claim; the lease then keeps
+    overlapping runs (beat + a retry, two workers) off these users
+    while auth and SQS are called. → [(profile_id, user_id)]
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            UserProfile.objects.select_for_update(skip_locked=True)
+            .filter(premium_expiry_pending=True, id__gt=after_id)
+            .filter(
+                Q(premium_expiry_claimed_until__isnull=True)
+                | Q(premium_expiry_claimed_until__lt=now)
+            )
+            .order_by("id")
+            .values_list("id", "user_id")[:PREMIUM_EXPIRY_CHUNK]
+        )
+
+        if rows:
+            UserProfile.objects.filter(id__in=[pk for pk, _ in rows]).update(
+                premium_expiry_claimed_until=now + PREMIUM_EXPIRY_LEASE
+            )
+
+    return rows
+
+
+def _mark_expiry_notified(rows):
+    """
+    Checkpoint for users whose email SQS accepted (or who have none):
+    leave the pending set, push queued in the same short transaction,
+    so nothing already sent is ever sent again.
+    """
+    with transaction.atomic():
+        UserProfile.objects.filter(id__in=[pk for pk, _ in rows]).update(
+            premium_expiry_pending=False,
+            premium_expiry_claimed_until=None,
+        )
+        outbox.add(
+            *[outbox.user_push(user_id=user_id, **PREMIUM_EXPIRED_PUSH) for _, user_id in rows]
+        )
+
+
+def _notify_expired_chunk(sqs, rows):
+    """
+    rows: [(profile_id, user_id)] claimed by this run.
+    Email via SQS batches, checkpointed per batch; rows not accepted
+    are released for the next run. → number notified
+    """
+    notified = 0
+
+    try:
+        emails = fetch_emails_from_auth([user_id for _, user_id in rows])
+
+        no_email, entries = [], []
+        for pk, user_id in rows:
+            email = emails.get(str(user_id))
+            if email:
+                entries.append((pk, user_id, email))
+            else:
+                logger.warning("No email in auth for expired user %s", user_id)
+                no_email.append((pk, user_id))
+
+        if no_email:
+            _mark_expiry_notified(no_email)
+            notified += len(no_email)
+
+        for i in range(0, len(entries), SQS_BATCH_LIMIT):
+            batch = entries[i : i + SQS_BATCH_LIMIT]
+            response = sqs.send_message_batch(
+                QueueUrl=settings.AWS_PREMIUM_EXPIRED_QUEUE_URL,
+                Entries=[
+                    {"Id": str(pk), "MessageBody": json.dumps({"email": email})}
+                    for pk, _, email in batch
+                ],
+            )
+
+            accepted = {entry["Id"] for entry in response.get("Successful", [])}
+            for failure in response.get("Failed", []):
+                logger.warning("SQS rejected premium-expired entry %s: %s", failure["Id"], failure)
+
+            done = [(pk, user_id) for pk, user_id, _ in batch if str(pk) in accepted]
+            if done:
+                _mark_expiry_notified(done)
+                notified += len(done)
+
+    finally:
+        # rejected / never reached: the next run (or the retry) takes them
+        UserProfile.objects.filter(
+            id__in=[pk for pk, _ in rows], premium_expiry_pending=True
+        ).update(premium_expiry_claimed_until=None)
+
+    return notified
 
 
 @shared_task(
@@ -314,55 +610,33 @@ def fetch_email_from_auth(user_id):
 def handle_expired_premium_users(self):
     now = timezone.now()
 
-    expired_profiles = list(
-        UserProfile.objects.filter(
-            is_premium=True,
-            premium_expires_at__lt=now,
-        )
-    )
-
-    if not expired_profiles:
-        return "No expired premium users"
-
-    #  Bulk update DB (FAST)
-    for profile in expired_profiles:
-        profile.is_premium = False
-        profile.premium_expires_at = None
-
-    UserProfile.objects.bulk_update(
-        expired_profiles,
-        fields=["is_premium", "premium_expires_at"],
-    )
+    # 1️⃣ downgrade in keyset chunks (short transactions, no full list in memory)
+    downgraded = 0
+    after_id = uuid.UUID(int=0)
+    while True:
+        rows = _downgrade_expired_chunk(now, after_id)
+        if not rows:
+            break
+        downgraded += len(rows)
+        after_id = rows[-1][0]
 
-    for profile in expired_profiles:
-        cache_key = f"profile:{profile.user_id}:v1"
-        cache.delete(cache_key)
-
-    for profile in expired_profiles:
-        send_user_notification.delay(
-            user_id=str(profile.user_id),
-            title="Premium Expired ⏳",
-            body="Your premium subscription has expired. Renew to continue premium features.",
-            data={
-                "type": "PREMIUM_EXPIRED",
-            },
-        )
-
-    #  External calls
-    sqs = boto3.client("sqs", region_name=settings.AWS_REGION)
+    # 2️⃣ notify everything pending, including leftovers of a failed run
+    sqs = providers.sqs()
 
     processed = 0
-    for profile in expired_profiles:
-        email = fetch_email_from_auth(profile.user_id)
+    after_id = uuid.UUID(int=0)
+    while True:
+        rows = _claim_expired_chunk(after_id)
+        if not rows:
+            break
 
-        sqs.send_message(
-            QueueUrl=settings.AWS_PREMIUM_EXPIRED_QUEUE_URL,
-            MessageBody=json.dumps({"email": email}),
-        )
+        processed += _notify_expired_chunk(sqs, rows)
+        after_id = rows[-1][0]
 
-        processed += 1
+    if not downgraded and not processed:
+        return "No expired premium users"
 
-    return f"{processed} users downgraded & notified"
+    return f"{downgraded} users downgraded, {processed} notified"
 
 
 
@@ -415,11 +689,13 @@ def handle_booking_decision(self, payload):
             booking.save(update_fields=["status"])
 
             # Ensure only one active room
-            ChatRoom.objects.filter(
+            active_rooms = ChatRoom.objects.filter(
                 user_id=user_id,
                 trainer_user_id=trainer_user_id,
                 is_active=True,
-            ).update(is_active=False)
+            )
+            room_ids = list(active_rooms.values_list("id", flat=True))
+            active_rooms.update(is_active=False, updated_at=timezone.now())
 
             room = ChatRoom.objects.filter(
                 user_id=user_id,
@@ -429,25 +705,29 @@ def handle_booking_decision(self, payload):
 
             if room:
                 room.is_active = True
-                room.save(update_fields=["is_active"])
+                room.save(update_fields=["is_active", "updated_at"])
             else:
-                ChatRoom.objects.create(
+                room = ChatRoom.objects.create(
                     user_id=user_id,
                     trainer_user_id=trainer_user_id,
                     is_active=True,
                 )
+            room_ids.append(room.id)
+
+            # WS membership cache must see the new active flag
+            transaction.on_commit(lambda: invalidate_room_membership(*room_ids))
 
         elif action == "reject":
             booking.status = TrainerBooking.STATUS_REJECTED
             booking.save(update_fields=["status"])
 
         # -------------------------
-        # 🔔 NOTIFY USER (AFTER COMMIT)
+        # 🔔 NOTIFY USER (outbox: relayed after commit)
         # -------------------------
-        def notify_user():
-            if action == "approve":
-                send_user_notification.delay(
-                    user_id=str(user_id),
+        if action == "approve":
+            outbox.add(
+                outbox.user_push(
+                    user_id=user_id,
                     title="Trainer Approved 🎉",
                     body="Your trainer has approved your booking. You can now chat or call.",
                     data={
@@ -455,10 +735,12 @@ def handle_booking_decision(self, payload):
                         "booking_id": str(booking_id),
                     },
                 )
+            )
 
-            elif action == "reject":
-                send_user_notification.delay(
-                    user_id=str(user_id),
+        elif action == "reject":
+            outbox.add(
+                outbox.user_push(
+                    user_id=user_id,
                     title="Booking Rejected ❌",
                     body="Your trainer has rejected the booking.",
                     data={
@@ -466,5 +748,4 @@ def handle_booking_decision(self, payload):
                         "booking_id": str(booking_id),
                     },
                 )
-
-        transaction.on_commit(notify_user)
\ No newline at end of file
+            )
\ No newline at end of file
@@ -1,8 +1,10 @@
 # user_app/views.py
 import requests
+from chat.helper.room_membership import invalidate_room_membership
 from chat.models import ChatRoom
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -11,7 +13,7 @@ from .models import TrainerBooking, UserProfile
 from .serializers import UserProfileSerializer
 from .permissions import IsPremiumUser
 from django.core.cache import cache
-from .tasks import emit_webhook
+from .helper import outbox
 
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -106,19 +108,23 @@ class BookTrainerView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        booking = TrainerBooking.objects.create(
-            user_id=user_id,
-            trainer_user_id=trainer_user_id,
-        )
+        # ✅ booking + trainer event commit together (outbox)
+        with transaction.atomic():
+            booking = TrainerBooking.objects.create(
+                user_id=user_id,
+                trainer_user_id=trainer_user_id,
+            )
 
-        emit_webhook.delay(
-            event="TRAINER_BOOKED",
-            payload={
-                "booking_id": str(booking.id),
-                "trainer_user_id": str(trainer_user_id),
-                "user_id": str(user_id),
-            },
-        )
+            outbox.add(
+                outbox.trainer_event(
+                    event="TRAINER_BOOKED",
+                    payload={
+                        "booking_id": str(booking.id),
+                        "trainer_user_id": str(trainer_user_id),
+                        "user_id": str(user_id),
+                    },
+                )
+            )
 
         return Response(
             {
@@ -208,11 +214,16 @@ class RemoveTrainerView(APIView):
             booking.status = TrainerBooking.STATUS_CANCELLED
             booking.save(update_fields=["status"])
 
-            ChatRoom.objects.filter(
+            rooms = ChatRoom.objects.filter(
                 user_id=request.user.id,
                 trainer_user_id=trainer_user_id,
                 is_active=True,
-            ).update(is_active=False)
+            )
+            room_ids = list(rooms.values_list("id", flat=True))
+            rooms.update(is_active=False, updated_at=timezone.now())
+
+            # 🔐 closed rooms must stop accepting WS connects
+            transaction.on_commit(lambda: invalidate_room_membership(*room_ids))
 
         return Response(
             {"detail": "Trainer removed"},
@@ -1,8 +1,11 @@
+import logging
 import os
 import firebase_admin
 from firebase_admin import credentials
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 
 def initialize_firebase():
     if not firebase_admin._apps:
@@ -13,5 +16,11 @@ def initialize_firebase():
             "firebase-admin.json",
         )
 
+        # fake providers (settings_loadtest): FCM is never called, so no
+        # service account is needed; anywhere else a missing file fails here
+        if settings.PROVIDER_BACKEND == "fake" and not os.path.exists(cred_path):
+            logger.warning("Firebase credentials not found at %s, fake FCM only", cred_path)
+            return
+
         cred = credentials.Certificate(cred_path)
         firebase_admin.initialize_app(cred)
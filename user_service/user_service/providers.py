@@ -0,0 +1,285 @@
+"""
+External providers behind one switch.
+
+PROVIDER_BACKEND=live (default): FCM, SQS, SES and Razorpay for real.
+PROVIDER_BACKEND=fake: in-process stand-ins with the same call surface.
+They record every call, sleep FAKE_PROVIDER_LATENCY_MS per round trip
+and fail FAKE_PROVIDER_ERROR_RATE of the items the way the real API
+reports it. Use them for local runs, load tests and the bench_* commands.
+"""
+
+import hashlib
+import hmac
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.conf import settings
+
+
+class ProviderDown(ConnectionError):
+    """Raised by every call of a fake whose `down` flag is set."""
+
+
+class FakeProvider:
+    """
+    calls: [(method, items)] in call order, one entry per round trip.
+    """
+
+    def __init__(self, latency=None, error_rate=None):
+        self.latency = (
+            settings.FAKE_PROVIDER_LATENCY_MS / 1000 if latency is None else latency
+        )
+        self.error_rate = (
+            settings.FAKE_PROVIDER_ERROR_RATE if error_rate is None else error_rate
+        )
+        self.down = False
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, method, items=1):
+        if self.down:
+            raise ProviderDown(f"{type(self).__name__}.{method}: provider down")
+
+        with self._lock:
+            self.calls.append((method, items))
+        time.sleep(self.latency)
+
+    def _fails(self):
+        return self.error_rate and random.random() < self.error_rate
+
+    def call_count(self, method=None):
+        return sum(1 for m, _ in self.calls if method in (None, m))
+
+    def item_count(self, method=None):
+        return sum(n for m, n in self.calls if method in (None, m))
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+        self.down = False
+
+
+# -------------------------------------------------
+# FCM (firebase_admin.messaging surface)
+# -------------------------------------------------
+class FakeFCM(FakeProvider):
+    """
+    Failed items come back as UnregisteredError, so token pruning runs.
+    """
+
+    def _responses(self, n):
+        from firebase_admin import messaging
+
+        return SimpleNamespace(
+            responses=[
+                SimpleNamespace(success=False, exception=messaging.UnregisteredError("fake"))
+                if self._fails()
+                else SimpleNamespace(success=True, exception=None, message_id=uuid.uuid4().hex)
+                for _ in range(n)
+            ]
+        )
+
+    def send(self, message, dry_run=False, app=None):
+        self._call("send")
+        if self._fails():
+            from firebase_admin import messaging
+
+            raise messaging.UnregisteredError("fake")
+        return f"projects/fake/messages/{uuid.uuid4().hex}"
+
+    def send_each(self, messages, dry_run=False, app=None):
+        self._call("send_each", len(messages))
+        return self._responses(len(messages))
+
+    def send_each_for_multicast(self, multicast_message, dry_run=False, app=None):
+        self._call("send_each_for_multicast", len(multicast_message.tokens))
+        return self._responses(len(multicast_message.tokens))
+
+
+# -------------------------------------------------
+# AWS (boto3 client surface)
+# -------------------------------------------------
+class FakeSQS(FakeProvider):
+    """
+    Failed entries come back in Failed, like throttled ones. sent keeps
+    how often each entry Id was accepted (duplicate checks).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = {}
+        self.bodies = []
+
+    def reset(self):
+        super().reset()
+        self.sent.clear()
+        self.bodies.clear()
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self._call("send_message_batch", len(Entries))
+
+        ok, failed = [], []
+        for entry in Entries:
+            if self._fails():
+                failed.append({"Id": entry["Id"], "Code": "Throttled", "SenderFault": False})
+                continue
+
+            with self._lock:
+                self.sent[entry["Id"]] = self.sent.get(entry["Id"], 0) + 1
+                self.bodies.append(entry["MessageBody"])
+            ok.append({"Id": entry["Id"], "MessageId": str(uuid.uuid4())})
+
+        return {"Successful": ok, "Failed": failed}
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        self._call("send_message")
+        if self._fails():
+            raise ProviderDown("Throttling: fake SQS")
+
+        with self._lock:
+            self.bodies.append(MessageBody)
+        return {"MessageId": str(uuid.uuid4())}
+
+
+class FakeSES(FakeProvider):
+    def send_email(self, **kwargs):
+        self._call("send_email")
+        if self._fails():
+            raise ProviderDown("Throttling: Maximum sending rate exceeded")
+        return {"MessageId": str(uuid.uuid4())}
+
+    def send_bulk_templated_email(self, **kwargs):
+        destinations = kwargs["Destinations"]
+        self._call("send_bulk_templated_email", len(destinations))
+
+        return {
+            "Status": [
+                {"Status": "MessageRejected", "Error": "fake"}
+                if self._fails()
+                else {"Status": "Success", "MessageId": str(uuid.uuid4())}
+                for _ in destinations
+            ]
+        }
+
+
+# -------------------------------------------------
+# RAZORPAY (razorpay.Client surface)
+# -------------------------------------------------
+class SignatureVerificationError(Exception):
+    pass
+
+
+class FakeRazorpay(FakeProvider):
+    """
+    Orders are made up; signatures are checked exactly like Razorpay
+    does (HMAC-SHA256 of "<order_id>|<payment_id>" with the key secret),
+    so sign() gives clients a payment that verifies.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.order = SimpleNamespace(create=self._create_order)
+        self.utility = SimpleNamespace(verify_payment_signature=self._verify)
+
+    @staticmethod
+    def _secret():
+        return (settings.RAZORPAY_KEY_SECRET or "fake-secret").encode()
+
+    def sign(self, order_id, payment_id):
+        return hmac.new(
+            self._secret(), f"{order_id}|{payment_id}".encode(), hashlib.sha256
+        ).hexdigest()
+
+    def _create_order(self, data):
+        self._call("order.create")
+        if self._fails():
+            raise ProviderDown("fake Razorpay: order creation failed")
+
+        return {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": data["amount"],
+            "currency": data.get("currency", "INR"),
+            "status": "created",
+        }
+
+    def _verify(self, params):
+        self._call("utility.verify_payment_signature")
+
+        expected = self.sign(params["razorpay_order_id"], params["razorpay_payment_id"])
+        if not hmac.compare_digest(expected, params["razorpay_signature"]):
+            raise SignatureVerificationError("Razorpay Signature Verification Failed")
+        return True
+
+
+# -------------------------------------------------
+# ACCESSORS
+# -------------------------------------------------
+FAKES = {
+    "fcm": FakeFCM,
+    "sqs": FakeSQS,
+    "ses": FakeSES,
+    "razorpay": FakeRazorpay,
+}
+
+_fakes = {}
+_fakes_lock = threading.Lock()
+
+
+def is_fake():
+    return settings.PROVIDER_BACKEND == "fake"
+
+
+def fake(name):
+    """
+    The process-wide fake for `name`: callers and benchmarks see the
+    same recorded calls.
+    """
+    with _fakes_lock:
+        if name not in _fakes:
+            _fakes[name] = FAKES[name]()
+        return _fakes[name]
+
+
+def fcm():
+    if is_fake():
+        return fake("fcm")
+
+    from firebase_admin import messaging
+
+    return messaging
+
+
+def sqs():
+    if is_fake():
+        return fake("sqs")
+
+    import boto3
+
+    # AWS_SQS_ENDPOINT_URL points at a local stand-in (localstack / moto)
+    return boto3.client(
+        "sqs",
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.AWS_SQS_ENDPOINT_URL or None,
+    )
+
+
+def ses():
+    if is_fake():
+        return fake("ses")
+
+    import boto3
+
+    return boto3.client("ses", region_name=settings.AWS_REGION)
+
+
+def razorpay_client():
+    if is_fake():
+        return fake("razorpay")
+
+    import razorpay
+
+    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
@@ -42,13 +42,19 @@ MIDDLEWARE = [
 
 # -------------------------------------------------------------------
 
+# HS256 (default): JWT_SIGNING_KEY is the shared secret.
+# RS256 / ES256: JWT_VERIFYING_KEY is auth_service's public key (PEM, "\n"
+# escapes allowed) and JWT_SIGNING_KEY stays unset here.
 SIMPLE_JWT = {
-    "ALGORITHM": "HS256",
-    "SIGNING_KEY": config("JWT_SIGNING_KEY"),
+    "ALGORITHM": config("JWT_ALGORITHM", default="HS256"),
+    "SIGNING_KEY": config("JWT_SIGNING_KEY", default=""),
+    "VERIFYING_KEY": config("JWT_VERIFYING_KEY", default="").replace("\\n", "\n"),
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),  # short lived
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+# verified access tokens kept in memory per process (common/jwt_verifier.py)
+JWT_VERIFY_CACHE_SIZE = config("JWT_VERIFY_CACHE_SIZE", default=10000, cast=int)
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "user_service.common.auth.SimpleJWTAuth",
@@ -128,6 +134,9 @@ TRAINER_SERVICE_URL = os.getenv("TRAINER_SERVICE_URL")
 AI_SERVICE_BASE_URL = os.getenv("AI_SERVICE_BASE_URL")
 AI_KNOWLEDGE_SERVICE_URL=os.getenv("AI_KNOWLEDGE_SERVICE_URL")
 
+# sent as X-Internal-Token to auth_service internal/ routes
+INTERNAL_SERVICE_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", "")
+
 CELERY_BROKER_URL = os.getenv("RABBIT_URL")
 
 # CELERY CONF
@@ -165,15 +174,42 @@ CELERY_BEAT_SCHEDULE = {
         "task": "user_app.tasks.handle_expired_premium_users",
         "schedule": crontab(minute="*/360"),
     },
+    "purge-stale-chat-uploads-hourly": {
+        "task": "chat.tasks.purge_stale_uploads",
+        "schedule": crontab(minute=0),
+    },
+    "archive-old-chat-messages-nightly": {
+        "task": "chat.tasks.archive_old_messages",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "sweep-call-deadlines-every-minute": {
+        "task": "chat.tasks.sweep_call_deadlines",
+        "schedule": crontab(minute="*"),
+    },
+    "flush-push-buffer-every-minute": {
+        "task": "user_app.tasks.flush_user_notifications",
+        "schedule": crontab(minute="*"),
+    },
+    "relay-outbox-every-minute": {
+        "task": "user_app.tasks.relay_outbox",
+        "schedule": crontab(minute="*"),
+    },
 }
 
 
 AWS_REGION = os.getenv("AWS_REGION")
 AWS_PREMIUM_EXPIRED_QUEUE_URL = os.getenv("AWS_PREMIUM_EXPIRED_QUEUE_URL")
+# local stand-in (localstack / moto server); unset → real AWS
+AWS_SQS_ENDPOINT_URL = os.getenv("AWS_SQS_ENDPOINT_URL")
 
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY= os.getenv("AWS_SECRET_ACCESS_KEY")
 
+# live | fake: in-process FCM / SQS / SES / Razorpay (user_service/providers.py)
+PROVIDER_BACKEND = os.getenv("PROVIDER_BACKEND", "live")
+FAKE_PROVIDER_LATENCY_MS = float(os.getenv("FAKE_PROVIDER_LATENCY_MS", "20"))
+FAKE_PROVIDER_ERROR_RATE = float(os.getenv("FAKE_PROVIDER_ERROR_RATE", "0"))
+
 
 UPSTASH_REDIS_URL = os.getenv("UPSTASH_REDIS_URL")
 
@@ -191,4 +227,31 @@ CACHES = {
 }
 
 # If Redis is down, app should still work (fail-open)
-DJANGO_REDIS_IGNORE_EXCEPTIONS = True
\ No newline at end of file
+DJANGO_REDIS_IGNORE_EXCEPTIONS = True
+
+# Live call state (ringing / active). Separate from the fail-open cache:
+# transitions must be atomic and durable for the length of a call.
+CALL_STATE_REDIS_URL = os.getenv("CALL_STATE_REDIS_URL", "redis://redis:6379/3")
+
+# Push coalescing: events for one user within the window become one push
+PUSH_BUFFER_REDIS_URL = os.getenv("PUSH_BUFFER_REDIS_URL", "redis://redis:6379/4")
+PUSH_COALESCE_WINDOW_SEC = float(os.getenv("PUSH_COALESCE_WINDOW_SEC", "3"))
+
+# Call signalling: fraction of relayed SDP / ICE messages traced
+CALL_SIGNAL_TRACE_SAMPLE_RATE = float(os.getenv("CALL_SIGNAL_TRACE_SAMPLE_RATE", "0.01"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # sampled JSON traces (chat.helper.signal_relay)
+        "chat.signal": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,53 @@
+"""
+Self-contained settings for the WebSocket load harness:
+
+    python manage.py loadtest_ws --settings=user_service.settings_loadtest
+
+No Postgres, Upstash, RabbitMQ, Firebase, AWS or Razorpay needed. Set
+LOADTEST_CHANNEL_REDIS=redis://localhost:6379/0 to measure the
+real channels_redis layer against a local Redis instead of in-memory.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("JWT_SIGNING_KEY", "loadtest-only-signing-key-0123456789")
+
+from .settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv(
+            "LOADTEST_DB", os.path.join(tempfile.gettempdir(), "user_service_loadtest.sqlite3")
+        ),
+    }
+}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+_redis_layer = os.getenv("LOADTEST_CHANNEL_REDIS")
+
+CHANNEL_LAYERS = {
+    "default": (
+        {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [_redis_layer]},
+        }
+        if _redis_layer
+        else {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            # fanout bursts: one group_send per room per round
+            "CONFIG": {"capacity": 1000},
+        }
+    ),
+}
+
+# nothing leaves the process
+CELERY_TASK_ALWAYS_EAGER = True
+PROVIDER_BACKEND = "fake"
+CALL_SIGNAL_TRACE_SAMPLE_RATE = 0.0